@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Alert Aggregator
+Rolls repeated Suricata alerts up per signature, source, destination and time window
+"""
+
+import json
+import time
+import heapq
+import threading
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from ids_index import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Distinct destination ports remembered per group
+MAX_PORTS = 10
+
+
+def _isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class AlertAggregator:
+    """Streaming (signature_id, src_ip, dest_ip, window) rollup of alerts.
+
+    Each alert lands in the group for its signature, endpoints and the time
+    window containing it: `window` seconds, or the override for its signature in
+    `windows`. A group closes once alert time has moved `grace` seconds past the
+    end of its window, and is then emitted to the listeners as one rollup with
+    its count and first/last seen. When alerts stop, expire() moves that clock on
+    by wall time less `lag` (how far eve.json may trail), so the last window
+    still closes. Open groups are kept in least-recently-updated order; past
+    `max_groups` the idlest ones are emitted early, so memory stays bounded
+    however many scanners are active.
+    """
+
+    def __init__(self, window=300, windows=None, max_groups=10000, grace=10, lag=30, history=500):
+        self.window = window
+        self.windows = dict(windows or {})
+        self.max_groups = max_groups
+        self.grace = grace
+        self.lag = lag
+        self._groups = OrderedDict()
+        self._deadlines = []
+        self._sequence = 0
+        self._closed = deque(maxlen=history)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._clock = None
+        self.alerts_in = 0
+        self.rollups_out = 0
+        self.evicted = 0
+
+    def add_listener(self, callback):
+        """Call `callback(rollups)` with every batch of closed groups"""
+        self._listeners.append(callback)
+
+    def window_for(self, signature_id):
+        return self.windows.get(signature_id, self.window)
+
+    def add(self, alerts):
+        """Fold normalized alerts (see eve_tailer.normalize_alert) into their groups"""
+        closed = []
+        with self._lock:
+            for alert in alerts:
+                try:
+                    ts = parse_timestamp(alert["timestamp"])
+                except (TypeError, ValueError):
+                    continue
+                self.alerts_in += 1
+                sid = alert["signature_id"]
+                window = self.window_for(sid)
+                start = int(ts // window) * window
+                key = (sid, alert["src_ip"], alert["dest_ip"], start)
+                group = self._groups.get(key)
+                if group is None:
+                    group = self._groups[key] = {
+                        "signature_id": sid,
+                        "signature": alert["signature"],
+                        "category": alert["category"],
+                        "severity": alert["severity"],
+                        "src_ip": alert["src_ip"],
+                        "dest_ip": alert["dest_ip"],
+                        "proto": alert["proto"],
+                        "window_start": start,
+                        "window_seconds": window,
+                        "first_seen": ts,
+                        "last_seen": ts,
+                        "count": 0,
+                        "dest_ports": []
+                    }
+                    self._sequence += 1
+                    heapq.heappush(self._deadlines, (start + window, self._sequence, key))
+                    if len(self._groups) > self.max_groups:
+                        # Least recently updated first
+                        _, idle = self._groups.popitem(last=False)
+                        self.evicted += 1
+                        closed.append(idle)
+                else:
+                    self._groups.move_to_end(key)
+                group["count"] += 1
+                if ts < group["first_seen"]:
+                    group["first_seen"] = ts
+                if ts > group["last_seen"]:
+                    group["last_seen"] = ts
+                port = alert["dest_port"]
+                if port is not None and port not in group["dest_ports"] and len(group["dest_ports"]) < MAX_PORTS:
+                    group["dest_ports"].append(port)
+                if self._clock is None or ts > self._clock:
+                    self._clock = ts
+            closed.extend(self._expire())
+        self._emit(closed)
+
+    def expire(self, now=None):
+        """Close groups by wall clock as well, for quiet periods with no newer alert"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._clock = now - self.lag if self._clock is None else max(self._clock, now - self.lag)
+            closed = self._expire()
+        self._emit(closed)
+
+    def _expire(self):
+        """Close groups whose window ended more than `grace` seconds before the clock"""
+        closed = []
+        while self._deadlines and self._deadlines[0][0] + self.grace <= self._clock:
+            _, _, key = heapq.heappop(self._deadlines)
+            group = self._groups.pop(key, None)
+            if group is not None:  # not already evicted
+                closed.append(group)
+        return closed
+
+    def flush(self):
+        """Close every open group (on shutdown)"""
+        with self._lock:
+            closed = list(self._groups.values())
+            self._groups.clear()
+            self._deadlines = []
+        self._emit(closed)
+
+    def _emit(self, groups):
+        if not groups:
+            return
+        rollups = [self._rollup(group, closed=True) for group in groups]
+        with self._lock:
+            self._closed.extend(zip((group["last_seen"] for group in groups), rollups))
+            self.rollups_out += len(rollups)
+        for listener in self._listeners:
+            try:
+                listener(rollups)
+            except Exception as e:
+                logger.error(f"Error in alert rollup listener: {e}")
+
+    @staticmethod
+    def _rollup(group, closed):
+        rollup = dict(group)
+        rollup["dest_ports"] = list(group["dest_ports"])
+        rollup["first_seen"] = _isoformat(group["first_seen"])
+        rollup["last_seen"] = _isoformat(group["last_seen"])
+        rollup["window_start"] = _isoformat(group["window_start"])
+        rollup["closed"] = closed
+        return rollup
+
+    def recent(self, limit=20):
+        """Most recently updated rollups, open groups included, newest first.
+
+        A group evicted early and then reopened for the same window appears
+        once, as its newest part.
+        """
+        with self._lock:
+            candidates = []
+            for key in reversed(self._groups):
+                if len(candidates) >= limit:
+                    break
+                group = self._groups[key]
+                candidates.append((group["last_seen"], self._rollup(group, closed=False)))
+            candidates.extend(reversed(self._closed))
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        rollups = {}
+        for _, rollup in candidates:
+            key = (rollup["signature_id"], rollup["src_ip"], rollup["dest_ip"], rollup["window_start"])
+            if key not in rollups:
+                rollups[key] = rollup
+                if len(rollups) == limit:
+                    break
+        return list(rollups.values())
+
+    def get_stats(self):
+        with self._lock:
+            groups = self.rollups_out + len(self._groups)
+            return {
+                "window": self.window,
+                "window_overrides": len(self.windows),
+                "open_groups": len(self._groups),
+                "max_groups": self.max_groups,
+                "alerts_in": self.alerts_in,
+                "rollups_out": self.rollups_out,
+                "evicted": self.evicted,
+                # Alerts per group, closed and open
+                "reduction": round(self.alerts_in / groups, 1) if groups else None
+            }
+
+
+class RollupFileSink:
+    """Appends closed rollups to a JSON-lines file for forwarders (Filebeat, Logstash, ...)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, rollups):
+        lines = "".join(json.dumps(dict(rollup, event_type="alert_rollup"), default=str) + "\n"
+                        for rollup in rollups)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+def parse_windows(text):
+    """Per-signature windows from "2402000=3600,2210044=60" (SID=seconds)"""
+    windows = {}
+    for item in (text or "").split(","):
+        if not item.strip():
+            continue
+        sid, seconds = item.split("=", 1)
+        windows[int(sid)] = int(seconds)
+    return windows
@@ -6,180 +6,554 @@ Central access point for all security tools with changelog functionality
 
 import os
 import json
-import subprocess
+import base64
+import hashlib
+import socket
 import logging
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response
 from flask_cors import CORS
 import threading
 import time
 import signal
 import sys
 
-# Configure logging
+from changelog_store import (
+    SegmentedChangelogStore, BatchedChangelogWriter, ChangelogStats, ChangelogCompactor
+)
+from container_events import DockerApiEventSource
+from docker_api import DockerClient, DockerAPIError, format_ports, private_port
+from snapshot_cache import SnapshotCache
+from tool_registry import ToolRegistry
+from system_sampler import SystemSampler
+from timeseries_store import TimeSeriesStore
+from container_stats import ContainerStatsCollector, TOP_ORDERINGS
+from dashboard_stream import DashboardStream, StreamFull, fingerprint
+from container_jobs import JobManager, JobQueueFull, JOB_ACTIONS, dependency_stages
+from health_probes import ToolProbeEngine
+from eve_tailer import EveTailer, severity_name
+from ids_index import IdsIndex, GROUP_BY_COLUMNS, parse_timestamp
+from alert_aggregator import AlertAggregator, RollupFileSink, parse_windows
+from instrumentation import REGISTRY, CONTENT_TYPE, instrument_flask, family, histogram_lines
+
+# Configure logging; the log file is only created once something is logged
+LOG_FILE = os.environ.get('LOG_FILE', 'portal.log')
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('portal.log'),
-        logging.StreamHandler()
-    ]
+    handlers=([logging.FileHandler(LOG_FILE, delay=True)] if LOG_FILE else []) + [logging.StreamHandler()]
 )
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app)
 
 # Configuration
 PORT = int(os.environ.get('PORT', 5500))
-CHANGELOG_FILE = 'changelog.json'
+CHANGELOG_FILE = os.environ.get('CHANGELOG_FILE', 'changelog.json')
 CONTAINER_STATUS_FILE = 'container_status.json'
+CHANGELOG_DIR = os.environ.get('CHANGELOG_DIR', 'changelog.d')
+CHANGELOG_SEGMENT_BYTES = int(os.environ.get('CHANGELOG_SEGMENT_BYTES', 4 * 1024 * 1024))
+CHANGELOG_SEGMENT_AGE = int(os.environ.get('CHANGELOG_SEGMENT_AGE', 24 * 3600))
+CHANGELOG_TAIL_SIZE = int(os.environ.get('CHANGELOG_TAIL_SIZE', 5000))
+CHANGELOG_WRITER_MODE = os.environ.get('CHANGELOG_WRITER_MODE', 'async')
+CHANGELOG_QUEUE_SIZE = int(os.environ.get('CHANGELOG_QUEUE_SIZE', 10000))
+CHANGELOG_FLUSH_INTERVAL_MS = int(os.environ.get('CHANGELOG_FLUSH_INTERVAL_MS', 250))
+CHANGELOG_FLUSH_BATCH = int(os.environ.get('CHANGELOG_FLUSH_BATCH', 500))
+CHANGELOG_COMPACT_INTERVAL = int(os.environ.get('CHANGELOG_COMPACT_INTERVAL', 600))
+CHANGELOG_RETENTION_FILE = os.environ.get('CHANGELOG_RETENTION_FILE')
+MONITOR_MODE = os.environ.get('MONITOR_MODE', 'events')
+MONITOR_POLL_INTERVAL = int(os.environ.get('MONITOR_POLL_INTERVAL', 30))
+MONITOR_RECONCILE_INTERVAL = int(os.environ.get('MONITOR_RECONCILE_INTERVAL', 300))
+DOCKER_HOST = os.environ.get('DOCKER_HOST', 'unix:///var/run/docker.sock')
+DOCKER_API_TIMEOUT = int(os.environ.get('DOCKER_API_TIMEOUT', 10))
+DOCKER_API_POOL_SIZE = int(os.environ.get('DOCKER_API_POOL_SIZE', 8))
+CONTAINER_STATS_INTERVAL = int(os.environ.get('CONTAINER_STATS_INTERVAL', 30))
+CONTAINER_STATS_WORKERS = int(os.environ.get('CONTAINER_STATS_WORKERS', 4))
+CONTAINER_METRICS_WINDOWS = {"1h": 3600, "24h": 24 * 3600}
+CONTAINER_STATUS_TTL = float(os.environ.get('CONTAINER_STATUS_TTL', 5))
+COMPOSE_PROJECTS = [p for p in os.environ.get('COMPOSE_PROJECTS', 'cyber-blue-test').split(',') if p.strip()]
+TOOL_REGISTRY_FILE = os.environ.get('TOOL_REGISTRY_FILE')
+SYSTEM_SAMPLE_INTERVAL = float(os.environ.get('SYSTEM_SAMPLE_INTERVAL', 5))
+METRICS_FILE = os.environ.get('METRICS_FILE', 'metrics.tsdb')
+METRICS_SAVE_INTERVAL = int(os.environ.get('METRICS_SAVE_INTERVAL', 60))
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+STREAM_TRENDS_INTERVAL = float(os.environ.get('STREAM_TRENDS_INTERVAL', 60))
+STREAM_MAX_CLIENTS = int(os.environ.get('STREAM_MAX_CLIENTS', 16))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 32))
+JOB_HISTORY = int(os.environ.get('JOB_HISTORY', 200))
+JOB_PARALLELISM = int(os.environ.get('JOB_PARALLELISM', 2))
+TOOL_PROBE_HOST = os.environ.get('TOOL_PROBE_HOST')
+TOOL_PROBE_INTERVAL = float(os.environ.get('TOOL_PROBE_INTERVAL', 30))
+TOOL_PROBE_TIMEOUT = float(os.environ.get('TOOL_PROBE_TIMEOUT', 5))
+TOOL_PROBE_JITTER = float(os.environ.get('TOOL_PROBE_JITTER', 0.2))
+TOOL_PROBE_CONCURRENCY = int(os.environ.get('TOOL_PROBE_CONCURRENCY', 16))
+TOOL_PROBE_SLOW_MS = float(os.environ.get('TOOL_PROBE_SLOW_MS', 2000))
+EVE_JSON_PATH = os.environ.get('EVE_JSON_PATH', '../suricata/logs/eve.json')
+EVE_ALERT_WINDOW = int(os.environ.get('EVE_ALERT_WINDOW', 1000))
+EVE_POLL_INTERVAL = float(os.environ.get('EVE_POLL_INTERVAL', 1))
+EVE_BACKFILL_BYTES = int(os.environ.get('EVE_BACKFILL_BYTES', 4 * 1024 * 1024))
+ALERT_AGG_WINDOW = int(os.environ.get('ALERT_AGG_WINDOW', 300))
+ALERT_AGG_WINDOWS = parse_windows(os.environ.get('ALERT_AGG_WINDOWS'))
+ALERT_AGG_MAX_GROUPS = int(os.environ.get('ALERT_AGG_MAX_GROUPS', 10000))
+ALERT_AGG_LAG = float(os.environ.get('ALERT_AGG_LAG', 30))
+ALERT_ROLLUP_FILE = os.environ.get('ALERT_ROLLUP_FILE')
+IDS_INDEX_DIR = os.environ.get('IDS_INDEX_DIR', 'ids-index')
+IDS_INDEX_PARTITION_SECONDS = int(os.environ.get('IDS_INDEX_PARTITION_SECONDS', 3600))
+IDS_INDEX_SEGMENT_ROWS = int(os.environ.get('IDS_INDEX_SEGMENT_ROWS', 65536))
+IDS_INDEX_RETENTION_DAYS = int(os.environ.get('IDS_INDEX_RETENTION_DAYS', 30))
+SNAPSHOT_SECTIONS = ("server_info", "metrics", "tools", "trends", "security_events", "network")
+TREND_WINDOWS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+
+# Instrumentation exported on /metrics
+CHANGELOG_ADD_SECONDS = REGISTRY.histogram(
+    "portal_changelog_add_duration_seconds", "Time add_entry spends on the calling thread")
+MONITOR_RECONCILE_SECONDS = REGISTRY.histogram(
+    "portal_monitor_reconcile_duration_seconds", "Duration of a full container status diff")
+MONITOR_EVENTS = REGISTRY.counter(
+    "portal_monitor_events_total", "Docker lifecycle events applied by the monitor", ("action",))
+CONTAINER_STATS_PASS_SECONDS = REGISTRY.histogram(
+    "portal_container_stats_pass_duration_seconds", "Duration of one stats pass over the running containers")
+
+# Dashboard polling writes an api_call/page_access entry per request; keep
+# those raw for an hour, then as per-minute counts for 30 days
+DEFAULT_RETENTION_POLICIES = [
+    {"action": "api_call", "raw_ttl": 3600, "rollup": 60, "rollup_ttl": 30 * 24 * 3600},
+    {"action": "page_access", "raw_ttl": 3600, "rollup": 60, "rollup_ttl": 30 * 24 * 3600}
+]
 
 # Global flag for graceful shutdown
 shutdown_flag = False
 
 def signal_handler(signum, frame):
-    """Handle shutdown signals gracefully"""
-    global shutdown_flag
+    """Handle shutdown signals gracefully (development server only; under
+    gunicorn the worker drains requests and gunicorn.conf.py shuts down)"""
     logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-    shutdown_flag = True
+    shutdown_background_services()
     sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
-
 class ChangelogManager:
-    """Manages changelog entries for all system activities"""
+    """Manages changelog entries for all system activities
+    
+    Nothing is read or written until start() or the first use, so building
+    one (at import) leaves the filesystem alone.
+    """
     
-    def __init__(self, changelog_file):
+    def __init__(self, changelog_file, changelog_dir=CHANGELOG_DIR, writer_mode=CHANGELOG_WRITER_MODE):
         self.changelog_file = changelog_file
-        self.load_changelog()
+        self.changelog_dir = changelog_dir
+        self.writer_mode = writer_mode
+        self.store = None
+        self.writer = None
+        self.compactor = None
+        self._open_lock = threading.Lock()
+        # A single writer lock orders id allocation, the in-memory tail and
+        # the disk queue; readers work from snapshots and never take it
+        self._write_lock = threading.Lock()
+    
+    def open(self):
+        """Load the segments, migrating the legacy JSON file once (idempotent)"""
+        if self.store is not None:
+            return
+        with self._open_lock:
+            if self.store is not None:
+                return
+            store = self.load_changelog()
+            self._next_id = store.last_id + 1
+            self.stats = ChangelogStats()
+            self.stats.rebuild(store)
+            
+            if self.writer_mode == 'async':
+                self.writer = BatchedChangelogWriter(
+                    store,
+                    max_queue=CHANGELOG_QUEUE_SIZE,
+                    flush_interval=CHANGELOG_FLUSH_INTERVAL_MS / 1000.0,
+                    batch_size=CHANGELOG_FLUSH_BATCH
+                )
+            
+            self.compactor = ChangelogCompactor(
+                store,
+                self.load_retention_policies(),
+                interval=CHANGELOG_COMPACT_INTERVAL
+            )
+            # Published last: a non-None store means everything above is ready
+            self.store = store
+    
+    def start(self):
+        """Open the changelog and start the background writer and compactor threads"""
+        self.open()
+        if self.writer:
+            self.writer.start()
+        self.compactor.start()
+    
+    def load_retention_policies(self):
+        """Load retention policies from CHANGELOG_RETENTION_FILE, or the defaults"""
+        if not CHANGELOG_RETENTION_FILE:
+            return DEFAULT_RETENTION_POLICIES
+        try:
+            with open(CHANGELOG_RETENTION_FILE, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading retention policies from {CHANGELOG_RETENTION_FILE}, using defaults: {e}")
+            return DEFAULT_RETENTION_POLICIES
     
     def load_changelog(self):
-        """Load existing changelog from file"""
+        """Load existing changelog segments, migrating the legacy JSON file once"""
         try:
-            if os.path.exists(self.changelog_file):
-                with open(self.changelog_file, 'r') as f:
-                    self.changelog = json.load(f)
-            else:
-                self.changelog = {
-                    "entries": [],
-                    "metadata": {
-                        "created": datetime.now().isoformat(),
-                        "version": "1.0.0",
-                        "total_entries": 0
-                    }
-                }
-                self.save_changelog()
+            store = SegmentedChangelogStore(
+                self.changelog_dir,
+                max_segment_bytes=CHANGELOG_SEGMENT_BYTES,
+                max_segment_age=CHANGELOG_SEGMENT_AGE,
+                tail_size=CHANGELOG_TAIL_SIZE
+            )
+            if os.path.exists(self.changelog_file) and store.total_entries == 0:
+                store.migrate_legacy(self.changelog_file)
+            return store
         except Exception as e:
             logger.error(f"Error loading changelog: {e}")
-            self.changelog = {"entries": [], "metadata": {"created": datetime.now().isoformat(), "version": "1.0.0", "total_entries": 0}}
+            raise
     
     def save_changelog(self):
-        """Save changelog to file"""
+        """Flush pending changelog writes to disk"""
+        if self.store is None:
+            return
         try:
-            with open(self.changelog_file, 'w') as f:
-                json.dump(self.changelog, f, indent=2)
+            if self.writer:
+                self.writer.flush()
+            self.store.flush()
         except Exception as e:
             logger.error(f"Error saving changelog: {e}")
     
+    def close(self):
+        """Drain the background writer and release the active segment"""
+        if self.store is None:
+            return
+        try:
+            self.compactor.stop()
+            if self.writer:
+                self.writer.stop()
+            self.store.close()
+        except Exception as e:
+            logger.error(f"Error closing changelog: {e}")
+    
     def add_entry(self, action, details, user="system", level="info"):
-        """Add a new changelog entry"""
+        """Add a new changelog entry; its id is None if it was dropped or could not be saved"""
+        self.open()
+        started = time.perf_counter()
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": None,
             "action": action,
             "details": details,
             "user": user,
             "level": level,
-            "id": len(self.changelog["entries"]) + 1
+            "id": None
         }
         
-        self.changelog["entries"].append(entry)
-        self.changelog["metadata"]["total_entries"] = len(self.changelog["entries"])
-        self.save_changelog()
+        with self._write_lock:
+            entry["timestamp"] = datetime.now().isoformat()
+            entry["id"] = self._next_id
+            accepted = False
+            try:
+                if self.writer:
+                    # Disk writes happen on the writer thread; entries the queue
+                    # cannot take are dropped and counted rather than blocking
+                    accepted = self.writer.submit(entry)
+                    if accepted:
+                        self.store.stage(entry)
+                        self.stats.add(entry)
+                else:
+                    self.store.append(entry)
+                    self.stats.add(entry)
+                    accepted = True
+            except Exception as e:
+                logger.error(f"Error saving changelog: {e}")
+            # Only stored entries use up an id, so ids on disk stay contiguous
+            if accepted:
+                self._next_id += 1
+            else:
+                entry["id"] = None
         
         logger.info(f"Changelog entry added: {action} - {details}")
+        CHANGELOG_ADD_SECONDS.observe(time.perf_counter() - started)
         return entry
     
     def get_entries(self, limit=None, level=None):
         """Get changelog entries with optional filtering"""
-        entries = self.changelog["entries"]
-        
-        if level:
-            entries = [e for e in entries if e["level"] == level]
-        
-        if limit:
-            entries = entries[-limit:]
-        
+        entries, _ = self.query_entries(limit=limit, level=level)
         return entries
     
-    def get_stats(self):
-        """Get changelog statistics"""
-        entries = self.changelog["entries"]
-        stats = {
-            "total_entries": len(entries),
-            "by_level": {},
-            "by_action": {},
-            "recent_activity": len([e for e in entries if self._is_recent(e["timestamp"])])
-        }
-        
-        for entry in entries:
-            # Count by level
-            level = entry["level"]
-            stats["by_level"][level] = stats["by_level"].get(level, 0) + 1
-            
-            # Count by action
-            action = entry["action"]
-            stats["by_action"][action] = stats["by_action"].get(action, 0) + 1
+    def query_entries(self, limit=None, level=None, action=None, user=None,
+                      since=None, until=None, cursor=None):
+        """Query entries through the secondary indexes
         
-        return stats
+        Returns the newest matching entries in chronological order together
+        with an opaque cursor for the next (older) page, or None when there
+        are no more matches.
+        """
+        before = self._decode_cursor(cursor) if cursor else None
+        self.open()
+        results = self.store.query(
+            filters={"level": level, "action": action, "user": user},
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            limit=limit,
+            before=before
+        )
+        next_cursor = None
+        if results and len(results) == limit and results[-1][0] > 0:
+            next_cursor = self._encode_cursor(results[-1][0])
+        return [entry for _, entry in reversed(results)], next_cursor
+    
+    @staticmethod
+    def _encode_cursor(seq):
+        return base64.urlsafe_b64encode(f"seq:{seq}".encode()).decode().rstrip('=')
     
-    def _is_recent(self, timestamp, hours=24):
-        """Check if timestamp is within recent hours"""
+    @staticmethod
+    def _decode_cursor(cursor):
         try:
-            entry_time = datetime.fromisoformat(timestamp)
-            return (datetime.now() - entry_time).total_seconds() < hours * 3600
-        except:
-            return False
+            padded = cursor + '=' * (-len(cursor) % 4)
+            prefix, seq = base64.urlsafe_b64decode(padded.encode()).decode().split(':', 1)
+            if prefix != 'seq':
+                raise ValueError
+            return int(seq)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    
+    def get_entry_count(self):
+        """Get the total number of stored entries"""
+        self.open()
+        return self.store.total_entries
+    
+    def get_writer_stats(self):
+        """Get persistence queue statistics"""
+        self.open()
+        if self.writer:
+            return self.writer.get_stats()
+        return {"mode": "sync"}
+    
+    def get_stats(self):
+        """Get changelog statistics"""
+        self.open()
+        stats = self.stats.snapshot()
+        stats["writer"] = self.get_writer_stats()
+        stats["compactor"] = self.compactor.get_stats()
+        return stats
 
 class ContainerMonitor:
     """Monitors Docker container status for all tools"""
     
-    def __init__(self, changelog_manager):
+    # Status each lifecycle event leaves a container in
+    EVENT_STATUS = {
+        "create": ("created", "Created", "yellow"),
+        "start": ("running", "Up", "green"),
+        "restart": ("running", "Up", "green"),
+        "unpause": ("running", "Up", "green"),
+        "pause": ("running", "Up (Paused)", "green"),
+        "die": ("stopped", "Exited", "red"),
+        "stop": ("stopped", "Exited", "red")
+    }
+    
+    # Engine API container State -> (status, status_color)
+    STATE_STATUS = {
+        "running": ("running", "green"),
+        "paused": ("running", "green"),
+        "restarting": ("running", "green"),
+        "exited": ("stopped", "red"),
+        "dead": ("stopped", "red"),
+        "created": ("created", "yellow")
+    }
+    
+    def __init__(self, changelog_manager, docker_client, mode=MONITOR_MODE, event_source=None,
+                 poll_interval=MONITOR_POLL_INTERVAL, reconcile_interval=MONITOR_RECONCILE_INTERVAL,
+                 status_ttl=CONTAINER_STATUS_TTL, tool_registry=None,
+                 stats_interval=CONTAINER_STATS_INTERVAL, stats_workers=CONTAINER_STATS_WORKERS):
         self.changelog = changelog_manager
+        self.docker = docker_client
+        self.tools = tool_registry or ToolRegistry()
+        self.stats = ContainerStatsCollector(docker_client, workers=stats_workers)
+        self.stats_interval = stats_interval
+        self.stats_thread = None
+        self._listeners = []
         self.previous_status = {}
         self.monitoring = False
         self.monitor_thread = None
+        self.event_thread = None
         self.container_status = {}
+        self.mode = mode
+        self.event_source = event_source or DockerApiEventSource(docker_client)
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.events_processed = 0
+        self.last_event = None
+        self.stream_connected = False
+        self.last_reconcile = None
+        # Every endpoint reads container status through this one snapshot
+        self.status_cache = SnapshotCache(self.fetch_container_status, ttl=status_ttl,
+                                          name="container_status")
+        self._status_lock = threading.Lock()
+        self._stop_event = threading.Event()
     
     def start_monitoring(self):
         """Start container monitoring in background thread"""
         if not self.monitoring:
             self.monitoring = True
+            self._stop_event.clear()
             self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self.monitor_thread.start()
-            logger.info("Container monitoring started")
+            if self.mode == 'events':
+                self.event_thread = threading.Thread(target=self._event_loop, daemon=True)
+                self.event_thread.start()
+            if self.stats_interval > 0:
+                self.stats_thread = threading.Thread(target=self._stats_loop, daemon=True)
+                self.stats_thread.start()
+            logger.info(f"Container monitoring started ({self.mode} mode)")
     
     def stop_monitoring(self):
         """Stop container monitoring"""
         self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join()
+        self._stop_event.set()
+        if self.mode == 'events':
+            self.event_source.close()
+        for thread in (self.monitor_thread, self.event_thread, self.stats_thread):
+            if thread:
+                thread.join(10)
+        self.stats.close()
         logger.info("Container monitoring stopped")
     
+    def _stats_loop(self):
+        """Background loop collecting resource stats for every running container"""
+        while self.monitoring:
+            try:
+                all_containers = self.get_all_container_status()
+                running = [name for name, info in all_containers.items() if info["status"] == "running"]
+                with CONTAINER_STATS_PASS_SECONDS.time():
+                    self.stats.collect(running)
+                self.stats.forget(all_containers)
+            except Exception as e:
+                logger.error(f"Error collecting container stats: {e}")
+            self._stop_event.wait(self.stats_interval)
+    
     def _monitor_loop(self):
-        """Background monitoring loop"""
+        """Background loop doing a full status diff; a slow safety net in events mode"""
+        interval = self.reconcile_interval if self.mode == 'events' else self.poll_interval
         while self.monitoring:
             try:
-                current_status = self.get_all_container_status()
-                self._check_status_changes(current_status)
-                self.container_status = current_status
-                self.previous_status = {name: status["status"] for name, status in current_status.items()}
-                time.sleep(30)  # Check every 30 seconds
+                self.reconcile()
+                self._stop_event.wait(interval)
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(60)  # Wait longer on error
+                self._stop_event.wait(60)  # Wait longer on error
+    
+    def reconcile(self):
+        """Diff a full container listing against the known state"""
+        with MONITOR_RECONCILE_SECONDS.time():
+            self._reconcile()
+    
+    def _reconcile(self):
+        current_status = self.fetch_container_status()
+        with self._status_lock:
+            self._check_status_changes(current_status)
+            self.container_status = current_status
+            statuses = {name: status["status"] for name, status in current_status.items()}
+            changed = statuses != self.previous_status
+            self.previous_status = statuses
+            self.last_reconcile = time.time()
+            self._publish(current_status)
+        if changed:
+            self._notify(current_status)
+    
+    def add_listener(self, callback):
+        """Call `callback(container_status)` whenever a container changes state"""
+        self._listeners.append(callback)
+    
+    def _notify(self, current_status):
+        for listener in self._listeners:
+            try:
+                listener(current_status)
+            except Exception as e:
+                logger.error(f"Error in container status listener: {e}")
+    
+    def _publish(self, current_status):
+        """Feed the shared status cache from the monitor"""
+        if self.last_reconcile is None:
+            # Events applied before the first full listing only cover part of the fleet
+            return
+        # While the event stream is live the snapshot stays current until the
+        # next reconcile; otherwise it ages out like any loaded snapshot
+        ttl = self.reconcile_interval if self.stream_connected else None
+        self.status_cache.put(current_status, ttl=ttl)
+    
+    def _event_loop(self):
+        """Background loop applying Docker lifecycle events as they arrive"""
+        backoff = 1
+        while self.monitoring:
+            try:
+                events = self.event_source.events()
+                self.stream_connected = True
+                for event in events:
+                    if not self.monitoring:
+                        break
+                    self.handle_event(event)
+                    backoff = 1
+            except Exception as e:
+                logger.error(f"Error reading container events: {e}")
+            finally:
+                if self.stream_connected:
+                    # Changes may go unseen until the stream is back
+                    self.stream_connected = False
+                    self.status_cache.invalidate()
+            if self.monitoring:
+                # The stream dropped; events may have been missed, so resync
+                logger.warning(f"Container event stream ended, reconnecting in {backoff}s")
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 60)
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logger.error(f"Error reconciling container status: {e}")
+    
+    def handle_event(self, event):
+        """Apply a single normalized lifecycle event to the status map"""
+        name = event.get("name")
+        action = event.get("action", "").split(':')[0]
+        if not name:
+            return
+        self.events_processed += 1
+        MONITOR_EVENTS.inc(action)
+        self.last_event = event
+        timestamp = datetime.fromtimestamp(event["time"]).isoformat() if event.get("time") else datetime.now().isoformat()
+        
+        with self._status_lock:
+            current_status = dict(self.container_status)
+            if action == "destroy":
+                current_status.pop(name, None)
+            elif action in self.EVENT_STATUS:
+                status_type, status_text, status_color = self.EVENT_STATUS[action]
+                if action == "die" and event.get("exit_code") is not None:
+                    status_text = f"Exited ({event['exit_code']})"
+                info = dict(current_status.get(name) or {
+                    "name": name,
+                    "ports": "",
+                    "image": event.get("image", ""),
+                    "size": ""
+                })
+                info.update({
+                    "status": status_type,
+                    "status_text": status_text,
+                    "status_color": status_color,
+                    "last_updated": timestamp
+                })
+                current_status[name] = info
+            else:
+                return
+            
+            self._check_status_changes(current_status)
+            self.container_status = current_status
+            self.previous_status = {n: status["status"] for n, status in current_status.items()}
+            self._publish(current_status)
+        self._notify(current_status)
     
     def _check_status_changes(self, current_status):
         """Check for container status changes and log them"""
@@ -212,113 +586,56 @@ class ContainerMonitor:
     
     def get_container_count(self):
         """Get running container count"""
-        try:
-            result = subprocess.run(
-                ['docker', 'ps', '--format', 'table {{.Names}}'],
-                capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                return len(lines) - 1  # Subtract header line
-            return 0
-        except Exception as e:
-            logger.error(f"Error getting container count: {e}")
-            return 0
+        return len([c for c in self.get_all_container_status().values() if c["status"] == "running"])
     
     def get_all_container_status(self):
-        """Get detailed status for all containers"""
+        """Get detailed status for all containers from the shared snapshot"""
         try:
-            result = subprocess.run(
-                ['docker', 'ps', '-a', '--format', '{{.Names}}\t{{.Status}}\t{{.Ports}}\t{{.Image}}\t{{.Size}}'],
-                capture_output=True, text=True, timeout=10
-            )
-            
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                containers = {}
-                
-                for line in lines:
-                    if line.strip():
-                        # Split by tab character
-                        parts = line.split('\t')
-                        if len(parts) >= 5:
-                            name = parts[0].strip()
-                            status = parts[1].strip()
-                            ports = parts[2].strip()
-                            image = parts[3].strip()
-                            size = parts[4].strip()
-                            
-                            # Determine status type
-                            if "Up" in status:
-                                status_type = "running"
-                                status_color = "green"
-                            elif "Exited" in status:
-                                status_type = "stopped"
-                                status_color = "red"
-                            elif "Created" in status:
-                                status_type = "created"
-                                status_color = "yellow"
-                            else:
-                                status_type = "unknown"
-                                status_color = "gray"
-                            
-                            containers[name] = {
-                                "name": name,
-                                "status": status_type,
-                                "status_text": status,
-                                "status_color": status_color,
-                                "ports": ports,
-                                "image": image,
-                                "size": size,
-                                "last_updated": datetime.now().isoformat()
-                            }
-                
-                return containers
-            return {}
+            return self.status_cache.get()
         except Exception as e:
             logger.error(f"Error getting container status: {e}")
             return {}
     
-    def get_tool_container_status(self):
+    def fetch_container_status(self):
+        """List every container from Docker; raises DockerAPIError on failure"""
+        containers = {}
+        for container in self.docker.list_containers(all=True):
+            names = container.get("Names") or []
+            if not names:
+                continue
+            name = names[0].lstrip('/')
+            status_type, status_color = self.STATE_STATUS.get(
+                container.get("State", ""), ("unknown", "gray"))
+            
+            containers[name] = {
+                "name": name,
+                "status": status_type,
+                "status_text": container.get("Status", ""),
+                "status_color": status_color,
+                "ports": format_ports(container.get("Ports")),
+                "image": container.get("Image", ""),
+                # Sizes need ?size=1, which makes the daemon walk every layer
+                "size": "",
+                "last_updated": datetime.now().isoformat()
+            }
+        
+        return containers
+    
+    def get_tool_container_status(self, all_containers=None):
         """Get status for tool-specific containers"""
-        all_containers = self.get_all_container_status()
+        if all_containers is None:
+            all_containers = self.get_all_container_status()
+        resolved = self.tools.resolve(all_containers)
         tool_containers = {}
         
-        # Map tool names to possible container names (with fallbacks)
-        tool_container_map = {
-            "velociraptor": ["velociraptor"],
-            "wazuh": ["wazuh", "wazuh-dashboard", "cyber-blue-test-wazuh.dashboard-1"],
-            "wazuh-dashboard": ["wazuh", "wazuh-dashboard", "cyber-blue-test-wazuh.dashboard-1"],
-            "misp": ["misp", "misp-core", "cyber-blue-test-misp-core-1"],
-            "cyberchef": ["cyber-blue-test-cyberchef-1", "cyberchef"],
-            "thehive": ["cyber-blue-test-thehive-1", "thehive"],
-            "cortex": ["cyber-blue-test-cortex-1", "cortex"],
-            "fleetdm": ["fleet-server", "cyber-blue-test-fleet-server-1"],
-            "arkime": ["arkime-test", "arkime", "cyber-blue-test-arkime-1"],
-            "caldera": ["caldera", "cyber-blue-test-caldera-1"],
-            "evebox": ["evebox", "cyber-blue-test-evebox-1"],
-            "wireshark": ["wireshark", "cyber-blue-test-wireshark-1"],
-            "mitre": ["mitre-navigator", "cyber-blue-test-mitre-navigator-1"],
-            "mitre-navigator": ["mitre-navigator", "cyber-blue-test-mitre-navigator-1"],
-            "portainer": ["portainer", "cyber-blue-test-portainer-1"],
-            "shuffle": ["shuffle-frontend", "cyber-blue-test-shuffle-frontend-1"]
-        }
-        
-        def find_container_name(possible_names):
-            """Find the first matching container name from the list"""
-            for name in possible_names:
-                if name in all_containers:
-                    return name
-            return None
-        
-        for tool_name, possible_names in tool_container_map.items():
-            container_name = find_container_name(possible_names)
+        for tool_name in self.tools.tools:
+            container_name = resolved.get(tool_name)
             if container_name:
                 tool_containers[tool_name] = all_containers[container_name]
             else:
                 # Container not found
                 tool_containers[tool_name] = {
-                    "name": possible_names[0] if possible_names else tool_name,
+                    "name": self.tools.default_container_name(tool_name),
                     "status": "not_found",
                     "status_text": "Container not found",
                     "status_color": "gray",
@@ -332,35 +649,10 @@ class ContainerMonitor:
     
     def get_container_name_for_tool(self, tool_name):
         """Get the actual container name for a tool"""
-        all_containers = self.get_all_container_status()
-        
-        # Map tool names to possible container names (with fallbacks)
-        tool_container_map = {
-            "velociraptor": ["velociraptor"],
-            "wazuh": ["wazuh", "wazuh-dashboard", "cyber-blue-test-wazuh.dashboard-1"],
-            "wazuh-dashboard": ["wazuh", "wazuh-dashboard", "cyber-blue-test-wazuh.dashboard-1"],
-            "misp": ["misp", "misp-core", "cyber-blue-test-misp-core-1"],
-            "cyberchef": ["cyber-blue-test-cyberchef-1", "cyberchef"],
-            "thehive": ["cyber-blue-test-thehive-1", "thehive"],
-            "cortex": ["cyber-blue-test-cortex-1", "cortex"],
-            "fleetdm": ["fleet-server", "cyber-blue-test-fleet-server-1"],
-            "arkime": ["arkime-test", "arkime", "cyber-blue-test-arkime-1"],
-            "caldera": ["caldera", "cyber-blue-test-caldera-1"],
-            "evebox": ["evebox", "cyber-blue-test-evebox-1"],
-            "wireshark": ["wireshark", "cyber-blue-test-wireshark-1"],
-            "mitre": ["mitre-navigator", "cyber-blue-test-mitre-navigator-1"],
-            "mitre-navigator": ["mitre-navigator", "cyber-blue-test-mitre-navigator-1"],
-            "portainer": ["portainer", "cyber-blue-test-portainer-1"],
-            "shuffle": ["shuffle-frontend", "cyber-blue-test-shuffle-frontend-1"]
-        }
-        
-        if tool_name in tool_container_map:
-            for name in tool_container_map[tool_name]:
-                if name in all_containers:
-                    return name
+        container_name = self.tools.container_for_tool(tool_name, self.get_all_container_status())
         
         # If not found in tool mapping, return the original name
-        return tool_name
+        return container_name or tool_name
     
     def start_container(self, container_name):
         """Start a specific container"""
@@ -368,19 +660,18 @@ class ContainerMonitor:
             # Try to find the actual container name if it's a tool name
             actual_container_name = self.get_container_name_for_tool(container_name)
             
-            result = subprocess.run(
-                ['docker', 'start', actual_container_name],
-                capture_output=True, text=True, timeout=30
+            try:
+                self.docker.start_container(actual_container_name)
+            except DockerAPIError as e:
+                return {"success": False, "message": f"Failed to start container: {e}"}
+            finally:
+                self.status_cache.invalidate()
+            self.changelog.add_entry(
+                "container_started",
+                f"Container '{actual_container_name}' started manually",
+                level="info"
             )
-            if result.returncode == 0:
-                self.changelog.add_entry(
-                    "container_started",
-                    f"Container '{actual_container_name}' started manually",
-                    level="info"
-                )
-                return {"success": True, "message": f"Container {actual_container_name} started successfully"}
-            else:
-                return {"success": False, "message": f"Failed to start container: {result.stderr}"}
+            return {"success": True, "message": f"Container {actual_container_name} started successfully"}
         except Exception as e:
             logger.error(f"Error starting container {container_name}: {e}")
             return {"success": False, "message": f"Error starting container: {str(e)}"}
@@ -391,19 +682,18 @@ class ContainerMonitor:
             # Try to find the actual container name if it's a tool name
             actual_container_name = self.get_container_name_for_tool(container_name)
             
-            result = subprocess.run(
-                ['docker', 'stop', actual_container_name],
-                capture_output=True, text=True, timeout=30
+            try:
+                self.docker.stop_container(actual_container_name)
+            except DockerAPIError as e:
+                return {"success": False, "message": f"Failed to stop container: {e}"}
+            finally:
+                self.status_cache.invalidate()
+            self.changelog.add_entry(
+                "container_stopped",
+                f"Container '{actual_container_name}' stopped manually",
+                level="info"
             )
-            if result.returncode == 0:
-                self.changelog.add_entry(
-                    "container_stopped",
-                    f"Container '{actual_container_name}' stopped manually",
-                    level="info"
-                )
-                return {"success": True, "message": f"Container {actual_container_name} stopped successfully"}
-            else:
-                return {"success": False, "message": f"Failed to stop container: {result.stderr}"}
+            return {"success": True, "message": f"Container {actual_container_name} stopped successfully"}
         except Exception as e:
             logger.error(f"Error stopping container {container_name}: {e}")
             return {"success": False, "message": f"Error stopping container: {str(e)}"}
@@ -414,26 +704,63 @@ class ContainerMonitor:
             # Try to find the actual container name if it's a tool name
             actual_container_name = self.get_container_name_for_tool(container_name)
             
-            result = subprocess.run(
-                ['docker', 'restart', actual_container_name],
-                capture_output=True, text=True, timeout=30
+            try:
+                self.docker.restart_container(actual_container_name)
+            except DockerAPIError as e:
+                return {"success": False, "message": f"Failed to restart container: {e}"}
+            finally:
+                self.status_cache.invalidate()
+            self.changelog.add_entry(
+                "container_restarted",
+                f"Container '{actual_container_name}' restarted manually",
+                level="info"
             )
-            if result.returncode == 0:
-                self.changelog.add_entry(
-                    "container_restarted",
-                    f"Container '{actual_container_name}' restarted manually",
-                    level="info"
-                )
-                return {"success": True, "message": f"Container {actual_container_name} restarted successfully"}
-            else:
-                return {"success": False, "message": f"Failed to restart container: {result.stderr}"}
+            return {"success": True, "message": f"Container {actual_container_name} restarted successfully"}
         except Exception as e:
             logger.error(f"Error restarting container {container_name}: {e}")
             return {"success": False, "message": f"Error restarting container: {str(e)}"}
 
 # Initialize managers
 changelog_manager = ChangelogManager(CHANGELOG_FILE)
-container_monitor = ContainerMonitor(changelog_manager)
+docker_client = DockerClient(DOCKER_HOST, timeout=DOCKER_API_TIMEOUT, pool_size=DOCKER_API_POOL_SIZE)
+tool_registry = ToolRegistry.from_file(TOOL_REGISTRY_FILE, projects=COMPOSE_PROJECTS)
+container_monitor = ContainerMonitor(changelog_manager, docker_client, tool_registry=tool_registry)
+system_sampler = SystemSampler(SYSTEM_SAMPLE_INTERVAL)
+# Docker networks rarely change; share one listing between requests
+network_cache = SnapshotCache(docker_client.list_networks, ttl=60, name="docker_networks")
+metrics_store = TimeSeriesStore(METRICS_FILE)
+metrics_store.load()
+
+def run_container_action(action, container_name):
+    """Job runner: one start/stop/restart through the container monitor"""
+    return getattr(container_monitor, f"{action}_container")(container_name)
+
+job_manager = JobManager(run_container_action, workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+                         history=JOB_HISTORY, parallelism=JOB_PARALLELISM)
+
+def record_trends(sample):
+    """Record a system sample plus container state into the trends store"""
+    all_containers = container_monitor.get_all_container_status()
+    values = {
+        "cpu_percent": sample["cpu_percent"],
+        "memory_percent": sample["memory_percent"],
+        "containers_running": len([c for c in all_containers.values() if c["status"] == "running"])
+    }
+    for tool_name, container_info in container_monitor.get_tool_container_status().items():
+        values[f"tool:{tool_name}"] = 1 if container_info["status"] == "running" else 0
+    metrics_store.record(values, sample["time"])
+    
+    if metrics_store.last_saved is None or time.time() - metrics_store.last_saved >= METRICS_SAVE_INTERVAL:
+        save_trends()
+
+def save_trends():
+    """Persist the trends store"""
+    try:
+        metrics_store.save()
+    except Exception as e:
+        logger.error(f"Error saving metrics history to {METRICS_FILE}: {e}")
+
+system_sampler.add_listener(record_trends)
 
 @app.route('/')
 def index():
@@ -474,39 +801,79 @@ def get_tool_container_status():
         logger.error(f"Error in tool container status API: {e}")
         return jsonify({"tool_containers": {}, "error": str(e)}), 500
 
-@app.route('/api/containers/<container_name>/start', methods=['POST'])
-def start_container(container_name):
-    """Start a specific container API endpoint"""
+def queue_container_action(container_name, action):
+    """Queue a container action as a background job; 202 with the job to poll"""
     try:
-        result = container_monitor.start_container(container_name)
-        changelog_manager.add_entry("container_action", f"Container '{container_name}' start requested", user="api_user")
-        return jsonify(result)
+        job = job_manager.submit(action, container_name)
+        changelog_manager.add_entry("container_action", f"Container '{container_name}' {action} requested (job {job['id']})", user="api_user")
+        return jsonify({"success": True, "message": f"Container {action} queued", "job": job}), 202
+    except JobQueueFull as e:
+        return jsonify({"success": False, "message": str(e)}), 429
     except Exception as e:
-        logger.error(f"Error starting container {container_name}: {e}")
+        logger.error(f"Error queueing {action} for container {container_name}: {e}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
+@app.route('/api/containers/<container_name>/start', methods=['POST'])
+def start_container(container_name):
+    """Start a specific container API endpoint"""
+    return queue_container_action(container_name, "start")
+
 @app.route('/api/containers/<container_name>/stop', methods=['POST'])
 def stop_container(container_name):
     """Stop a specific container API endpoint"""
-    try:
-        result = container_monitor.stop_container(container_name)
-        changelog_manager.add_entry("container_action", f"Container '{container_name}' stop requested", user="api_user")
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error stopping container {container_name}: {e}")
-        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+    return queue_container_action(container_name, "stop")
 
 @app.route('/api/containers/<container_name>/restart', methods=['POST'])
 def restart_container(container_name):
     """Restart a specific container API endpoint"""
+    return queue_container_action(container_name, "restart")
+
+@app.route('/api/categories')
+def get_categories():
+    """Categories available for bulk actions, with their start order"""
     try:
-        result = container_monitor.restart_container(container_name)
-        changelog_manager.add_entry("container_action", f"Container '{container_name}' restart requested", user="api_user")
-        return jsonify(result)
+        return jsonify({"categories": {
+            category: {"containers": sorted(graph), "stages": dependency_stages(graph)}
+            for category, graph in tool_registry.categories.items()
+        }})
     except Exception as e:
-        logger.error(f"Error restarting container {container_name}: {e}")
+        logger.error(f"Error listing categories: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/categories/<category>/<action>', methods=['POST'])
+def bulk_container_action(category, action):
+    """Start/stop/restart every container of a category in dependency order"""
+    graph = tool_registry.categories.get(category)
+    if graph is None:
+        return jsonify({"success": False, "message": f"Unknown category '{category}'"}), 404
+    if action not in JOB_ACTIONS:
+        return jsonify({"success": False, "message": f"Unknown action '{action}'"}), 400
+    try:
+        parallelism = request.args.get('parallelism', JOB_PARALLELISM, type=int)
+        parallelism = max(1, min(parallelism, JOB_WORKERS))
+        job = job_manager.submit_bulk(action, category, graph, parallelism)
+        changelog_manager.add_entry("container_action", f"Category '{category}' {action} requested (job {job['id']})", user="api_user")
+        return jsonify({"success": True, "message": f"Category {action} queued", "job": job}), 202
+    except JobQueueFull as e:
+        return jsonify({"success": False, "message": str(e)}), 429
+    except Exception as e:
+        logger.error(f"Error queueing {action} for category {category}: {e}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
+@app.route('/api/jobs')
+def get_jobs():
+    """Recent container jobs, newest first"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), JOB_HISTORY)
+    return jsonify({"jobs": job_manager.list(limit), "stats": job_manager.get_stats()})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Progress of one container job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    return jsonify(job)
+
 @app.route('/api/containers/stats')
 def get_container_stats():
     """Get container statistics API endpoint"""
@@ -544,14 +911,72 @@ def get_container_stats():
         logger.error(f"Error in container stats API: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/containers/<container_name>/metrics')
+def get_container_metrics(container_name):
+    """Get resource usage history for one container (or tool) API endpoint"""
+    try:
+        timeframe = request.args.get('timeframe', '1h')
+        if timeframe not in CONTAINER_METRICS_WINDOWS:
+            return jsonify({"error": f"Unknown timeframe '{timeframe}', use one of {', '.join(CONTAINER_METRICS_WINDOWS)}"}), 400
+        
+        actual_container_name = container_monitor.get_container_name_for_tool(container_name)
+        if actual_container_name not in container_monitor.get_all_container_status():
+            return jsonify({"error": f"Container '{container_name}' not found"}), 404
+        
+        resolution, starts, series = container_monitor.stats.history(
+            actual_container_name, CONTAINER_METRICS_WINDOWS[timeframe]
+        )
+        return jsonify({
+            "container": actual_container_name,
+            "timeframe": timeframe,
+            "resolution": resolution,
+            "latest": container_monitor.stats.latest(actual_container_name),
+            "timestamps": starts,
+            "series": series
+        })
+    except Exception as e:
+        logger.error(f"Error in container metrics API for {container_name}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/containers/top')
+def get_top_containers():
+    """Get the heaviest resource consumers API endpoint"""
+    try:
+        by = request.args.get('by', 'cpu')
+        if by not in TOP_ORDERINGS:
+            return jsonify({"error": f"Unknown ordering '{by}', use one of {', '.join(TOP_ORDERINGS)}"}), 400
+        limit = min(max(request.args.get('limit', 5, type=int), 1), 100)
+        
+        return jsonify({
+            "by": by,
+            "containers": container_monitor.stats.top(by, limit),
+            "collector": container_monitor.stats.get_stats()
+        })
+    except Exception as e:
+        logger.error(f"Error in top containers API: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/changelog')
 def get_changelog():
     """Get changelog entries API endpoint"""
     try:
         limit = request.args.get('limit', type=int)
-        level = request.args.get('level')
-        entries = changelog_manager.get_entries(limit=limit, level=level)
-        return jsonify({"entries": entries})
+        if limit is not None and limit < 1:
+            return jsonify({"entries": [], "error": "limit must be at least 1"}), 400
+        since = request.args.get('since')
+        until = request.args.get('until')
+        entries, next_cursor = changelog_manager.query_entries(
+            limit=limit,
+            level=request.args.get('level'),
+            action=request.args.get('action'),
+            user=request.args.get('user'),
+            since=datetime.fromisoformat(since) if since else None,
+            until=datetime.fromisoformat(until) if until else None,
+            cursor=request.args.get('cursor')
+        )
+        return jsonify({"entries": entries, "next_cursor": next_cursor})
+    except ValueError as e:
+        return jsonify({"entries": [], "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error in changelog API: {e}")
         return jsonify({"entries": [], "error": str(e)}), 500
@@ -577,78 +1002,82 @@ def add_changelog_entry():
         level = data.get('level', 'info')
         
         entry = changelog_manager.add_entry(action, details, user, level)
+        if entry["id"] is None:
+            return jsonify({"success": False, "error": "Changelog entry could not be stored"}), 503
         return jsonify({"success": True, "entry": entry})
     except Exception as e:
         logger.error(f"Error adding changelog entry: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/server-info')
-def get_server_info():
-    """Get server information API endpoint"""
+def detect_server_ip():
+    """Best guess at the address browsers reach the portal on"""
     try:
-        import socket
+        # Priority 1: Use HOST_IP environment variable (set in Docker Compose)
+        host_ip = os.environ.get('HOST_IP')
+        if host_ip:
+            logger.info(f"Using HOST_IP environment variable: {host_ip}")
+            return host_ip
         
-        # Get the actual server IP (not localhost)
-        def get_server_ip():
+        # Priority 2: Detect if we're in a container and try to find host IP
+        if os.path.exists('/.dockerenv'):
+            logger.info("Detected container environment, attempting to find host IP")
+            
+            # Try to get default gateway (Docker host)
             try:
-                # Priority 1: Use HOST_IP environment variable (set in Docker Compose)
-                import os
-                host_ip = os.environ.get('HOST_IP')
-                if host_ip:
-                    logger.info(f"Using HOST_IP environment variable: {host_ip}")
-                    return host_ip
-                
-                # Priority 2: Detect if we're in a container and try to find host IP
-                if os.path.exists('/.dockerenv'):
-                    logger.info("Detected container environment, attempting to find host IP")
-                    
-                    # Try to get default gateway (Docker host)
-                    try:
-                        import subprocess
-                        result = subprocess.run(['ip', 'route', 'show', 'default'], 
-                                              capture_output=True, text=True, timeout=5)
-                        if result.returncode == 0:
-                            for line in result.stdout.split('\n'):
-                                if 'default via' in line:
-                                    gateway = line.split('via')[1].split()[0]
-                                    logger.info(f"Found gateway: {gateway}")
-                                    
-                                    # For your setup, try common host IPs
-                                    if gateway.startswith('172.18.'):
-                                        potential_host = "10.0.0.40"  # Your known host IP
-                                        logger.info(f"Using known host IP for Docker network: {potential_host}")
-                                        return potential_host
-                                    break
-                    except Exception as e:
-                        logger.warning(f"Could not determine gateway: {e}")
-                
-                # Priority 3: Traditional socket method for non-container environments
-                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                    s.connect(("8.8.8.8", 80))
-                    detected_ip = s.getsockname()[0]
-                    
-                    # If it's a container IP, fall back to known host IP
-                    if detected_ip.startswith('172.'):
-                        logger.warning(f"Detected container IP {detected_ip}, using fallback host IP")
-                        return "10.0.0.40"  # Your known host IP
-                    
-                    return detected_ip
-                    
+                import subprocess
+                result = subprocess.run(['ip', 'route', 'show', 'default'], 
+                                      capture_output=True, text=True, timeout=5)
+                if result.returncode == 0:
+                    for line in result.stdout.split('\n'):
+                        if 'default via' in line:
+                            gateway = line.split('via')[1].split()[0]
+                            logger.info(f"Found gateway: {gateway}")
+                            
+                            # For your setup, try common host IPs
+                            if gateway.startswith('172.18.'):
+                                potential_host = "10.0.0.40"  # Your known host IP
+                                logger.info(f"Using known host IP for Docker network: {potential_host}")
+                                return potential_host
+                            break
             except Exception as e:
-                logger.error(f"Error detecting server IP: {e}")
-                # Final fallback
-                return "10.0.0.40"  # Your known host IP
-        
-        server_ip = get_server_ip()
-        hostname = socket.gethostname()
+                logger.warning(f"Could not determine gateway: {e}")
         
-        return jsonify({
-            "hostname": hostname,
-            "server_ip": server_ip,
-            "port": PORT,
-            "portal_url": f"http://{server_ip}:{PORT}",
-            "timestamp": datetime.now().isoformat()
-        })
+        # Priority 3: Traditional socket method for non-container environments
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            detected_ip = s.getsockname()[0]
+            
+            # If it's a container IP, fall back to known host IP
+            if detected_ip.startswith('172.'):
+                logger.warning(f"Detected container IP {detected_ip}, using fallback host IP")
+                return "10.0.0.40"  # Your known host IP
+            
+            return detected_ip
+            
+    except Exception as e:
+        logger.error(f"Error detecting server IP: {e}")
+        # Final fallback
+        return "10.0.0.40"  # Your known host IP
+
+# IP detection can shell out and open sockets; the answer rarely changes
+server_ip_cache = SnapshotCache(detect_server_ip, ttl=300, name="server_ip")
+
+def build_server_info():
+    """Server information payload"""
+    server_ip = server_ip_cache.get()
+    return {
+        "hostname": socket.gethostname(),
+        "server_ip": server_ip,
+        "port": PORT,
+        "portal_url": f"http://{server_ip}:{PORT}",
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.route('/api/server-info')
+def get_server_info():
+    """Get server information API endpoint"""
+    try:
+        return jsonify(build_server_info())
     except Exception as e:
         logger.error(f"Error getting server info: {e}")
         return jsonify({"error": str(e)}), 500
@@ -662,7 +1091,18 @@ def health_check():
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "container_count": container_stats,
-            "changelog_entries": len(changelog_manager.changelog["entries"]),
+            "changelog_entries": changelog_manager.get_entry_count(),
+            "changelog_writer": changelog_manager.get_writer_stats(),
+            "container_cache": container_monitor.status_cache.get_stats(),
+            "container_stats": container_monitor.stats.get_stats(),
+            "system_sampler": system_sampler.get_health(),
+            "metrics_store": metrics_store.get_stats(),
+            "dashboard_stream": dashboard_stream.get_stats(),
+            "container_jobs": job_manager.get_stats(),
+            "tool_probes": tool_prober.get_stats(),
+            "eve_tailer": eve_tailer.get_stats(),
+            "ids_index": ids_index.get_stats(),
+            "alert_aggregator": alert_aggregator.get_stats(),
             "monitoring_active": container_monitor.monitoring
         })
     except Exception as e:
@@ -673,12 +1113,12 @@ def health_check():
             "error": str(e)
         }), 500
 
-@app.route('/api/tools')
-def get_tools():
-    """Get available tools configuration"""
+def build_tools():
+    """Tools configuration payload"""
     tools = [
         {
             "name": "Velociraptor",
+            "tool": "velociraptor",
             "description": "Digital Forensics and Incident Response platform for live endpoint forensics and threat hunting.",
             "port": 7000,
             "icon": "fas fa-search",
@@ -692,6 +1132,7 @@ def get_tools():
         },
         {
             "name": "Wazuh Dashboard",
+            "tool": "wazuh-dashboard",
             "description": "SIEM dashboard for log analysis, alerting, and security monitoring with Kibana-style interface.",
             "port": 7001,
             "icon": "fas fa-chart-line",
@@ -705,6 +1146,7 @@ def get_tools():
         },
         {
             "name": "Shuffle",
+            "tool": "shuffle",
             "description": "Security automation and orchestration platform for building, testing, and deploying security workflows.",
             "port": 7002,
             "icon": "fas fa-random",
@@ -718,6 +1160,7 @@ def get_tools():
         },
         {
             "name": "MISP",
+            "tool": "misp",
             "description": "Threat Intelligence Platform for sharing, storing, and correlating indicators of compromise.",
             "port": 7003,
             "icon": "fas fa-brain",
@@ -731,6 +1174,7 @@ def get_tools():
         },
         {
             "name": "CyberChef",
+            "tool": "cyberchef",
             "description": "Cyber Swiss Army Knife for data analysis, encoding, decoding, and forensics operations.",
             "port": 7004,
             "icon": "fas fa-utensils",
@@ -743,6 +1187,7 @@ def get_tools():
         },
         {
             "name": "TheHive",
+            "tool": "thehive",
             "description": "Incident Response and Case Management platform for security operations teams.",
             "port": 7005,
             "icon": "fas fa-bug",
@@ -756,6 +1201,7 @@ def get_tools():
         },
         {
             "name": "Cortex",
+            "tool": "cortex",
             "description": "Automated threat analysis platform with analyzers for TheHive integration.",
             "port": 7006,
             "icon": "fas fa-robot",
@@ -769,6 +1215,7 @@ def get_tools():
         },
         {
             "name": "FleetDM",
+            "tool": "fleetdm",
             "description": "Osquery-based endpoint visibility and fleet management platform.",
             "port": 7007,
             "icon": "fas fa-desktop",
@@ -782,6 +1229,7 @@ def get_tools():
         },
         {
             "name": "Arkime",
+            "tool": "arkime",
             "description": "Full packet capture and session search engine for network analysis.",
             "port": 7008,
             "icon": "fas fa-network-wired",
@@ -795,6 +1243,7 @@ def get_tools():
         },
         {
             "name": "Caldera",
+            "tool": "caldera",
             "description": "Automated adversary emulation platform for security testing and red team operations.",
             "port": 7009,
             "icon": "fas fa-chess-king",
@@ -808,6 +1257,7 @@ def get_tools():
         },
         {
             "name": "Evebox",
+            "tool": "evebox",
             "description": "Web-based viewer for Suricata EVE JSON logs and alert management.",
             "port": 7010,
             "icon": "fas fa-eye",
@@ -820,6 +1270,7 @@ def get_tools():
         },
         {
             "name": "Wireshark",
+            "tool": "wireshark",
             "description": "Network protocol analyzer for deep packet inspection and network troubleshooting.",
             "port": 7099,
             "icon": "fas fa-filter",
@@ -833,6 +1284,7 @@ def get_tools():
         },
         {
             "name": "MITRE Navigator",
+            "tool": "mitre-navigator",
             "description": "Interactive ATT&CK matrix for threat modeling and attack path visualization.",
             "port": 7013,
             "icon": "fas fa-sitemap",
@@ -845,6 +1297,7 @@ def get_tools():
         },
         {
             "name": "Portainer",
+            "tool": "portainer",
             "description": "Web-based container management interface for Docker and Kubernetes.",
             "port": 9443,
             "icon": "fas fa-ship",
@@ -857,97 +1310,165 @@ def get_tools():
             }
         }
     ]
-    return jsonify({"tools": tools})
+    return {"tools": tools}
 
-@app.route('/api/dashboard/metrics')
-def get_dashboard_metrics():
-    """Get comprehensive dashboard metrics for enhanced visualization"""
+@app.route('/api/tools')
+def get_tools():
+    """Get available tools configuration"""
+    return jsonify(build_tools())
+
+def tool_probe_targets():
+    """Probe target for every tool in the catalog.
+
+    With TOOL_PROBE_HOST set, the published port on that host. Otherwise the
+    running tool container by name, on the container port behind the published
+    one; that name only resolves when the container shares a network with the
+    portal. Tools with nothing to probe get None.
+    """
+    tools = build_tools()["tools"]
+    if TOOL_PROBE_HOST:
+        return {
+            tool["tool"]: {"host": TOOL_PROBE_HOST, "port": tool["port"], "scheme": tool["protocols"][0]}
+            for tool in tools
+        }
+    containers = container_monitor.get_tool_container_status()
+    targets = {}
+    for tool in tools:
+        container = containers.get(tool["tool"])
+        port = private_port(container["ports"], tool["port"]) if container and container["status"] == "running" else None
+        targets[tool["tool"]] = {"host": container["name"], "port": port, "scheme": tool["protocols"][0]} if port else None
+    return targets
+
+tool_prober = ToolProbeEngine(tool_probe_targets, interval=TOOL_PROBE_INTERVAL, timeout=TOOL_PROBE_TIMEOUT,
+                              jitter=TOOL_PROBE_JITTER, concurrency=TOOL_PROBE_CONCURRENCY,
+                              slow_ms=TOOL_PROBE_SLOW_MS)
+
+@app.route('/api/tools/health')
+def get_tools_health():
+    """Responsiveness of each tool port: status, p50/p95 latency and histogram"""
     try:
-        import psutil
-        import time
-        from datetime import datetime, timedelta
-        
-        # System metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Container metrics
+        return jsonify({"tools": tool_prober.results(), "stats": tool_prober.get_stats()})
+    except Exception as e:
+        logger.error(f"Error getting tool health: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def latest_system_sample():
+    """Latest system sample, starting the sampler on first use; None if unavailable"""
+    sample = system_sampler.latest()
+    if sample is None and not shutdown_flag:
+        system_sampler.start()
+        sample = system_sampler.latest()
+    return sample
+
+def build_dashboard_metrics(sample, all_containers=None):
+    """Dashboard metrics payload for a system sample"""
+    # Container metrics
+    if all_containers is None:
         all_containers = container_monitor.get_all_container_status()
-        tool_containers = container_monitor.get_tool_container_status()
-        
-        running_containers = len([c for c in all_containers.values() if c["status"] == "running"])
-        stopped_containers = len([c for c in all_containers.values() if c["status"] == "stopped"])
-        total_containers = len(all_containers)
-        
-        # Tool-specific health
-        tool_health = {}
-        for tool_name, container_info in tool_containers.items():
-            tool_health[tool_name] = {
-                "status": container_info["status"],
-                "health": "healthy" if container_info["status"] == "running" else "unhealthy",
-                "uptime": container_info.get("status_text", "unknown")
-            }
-        
-        # Security categories health
-        categories = {
-            "dfir": ["velociraptor"],
-            "siem": ["wazuh", "wazuh-dashboard"],
-            "soar": ["shuffle", "thehive", "cortex", "caldera"],
-            "cti": ["misp", "mitre-navigator"],
-            "ids": ["arkime", "evebox"],
-            "utility": ["cyberchef", "wireshark"],
-            "management": ["fleetdm", "portainer"]
-        }
-        
-        category_health = {}
-        for category, tools in categories.items():
-            healthy_tools = 0
-            total_tools = len(tools)
-            for tool in tools:
-                if tool in tool_containers and tool_containers[tool]["status"] == "running":
-                    healthy_tools += 1
-            
-            health_percentage = (healthy_tools / total_tools * 100) if total_tools > 0 else 0
-            category_health[category] = {
-                "health_percentage": round(health_percentage, 1),
-                "healthy_tools": healthy_tools,
-                "total_tools": total_tools,
-                "status": "healthy" if health_percentage >= 80 else "degraded" if health_percentage >= 50 else "critical"
-            }
-        
-        # Recent activity from changelog
-        recent_entries = changelog_manager.get_entries(limit=10)
-        activity_summary = {
-            "container_starts": len([e for e in recent_entries if "started" in e.get("action", "")]),
-            "container_stops": len([e for e in recent_entries if "stopped" in e.get("action", "")]),
-            "api_calls": len([e for e in recent_entries if "api_call" in e.get("action", "")]),
-            "errors": len([e for e in recent_entries if e.get("level") == "error"])
+    tool_containers = container_monitor.get_tool_container_status(all_containers)
+    
+    running_containers = len([c for c in all_containers.values() if c["status"] == "running"])
+    stopped_containers = len([c for c in all_containers.values() if c["status"] == "stopped"])
+    total_containers = len(all_containers)
+    
+    # Tool-specific health: a running container is only healthy if its port answers
+    probes = tool_prober.results()
+    tool_health = {}
+    for tool_name, container_info in tool_containers.items():
+        probe = probes.get(tool_name)
+        if container_info["status"] != "running":
+            health = "unhealthy"
+        elif probe and probe["status"] not in ("unknown", "unreachable"):
+            health = probe["status"]
+        else:
+            # Not probed (yet) or not reachable from the portal: fall back to the container state
+            health = "healthy"
+        tool_health[tool_name] = {
+            "status": container_info["status"],
+            "health": health,
+            "uptime": container_info.get("status_text", "unknown"),
+            "latency_p50_ms": probe["latency_p50_ms"] if probe else None,
+            "latency_p95_ms": probe["latency_p95_ms"] if probe else None
         }
+    
+    # Security categories health
+    categories = {
+        "dfir": ["velociraptor"],
+        "siem": ["wazuh", "wazuh-dashboard"],
+        "soar": ["shuffle", "thehive", "cortex", "caldera"],
+        "cti": ["misp", "mitre-navigator"],
+        "ids": ["arkime", "evebox"],
+        "utility": ["cyberchef", "wireshark"],
+        "management": ["fleetdm", "portainer"]
+    }
+    
+    category_health = {}
+    for category, tools in categories.items():
+        healthy_tools = 0
+        degraded_tools = 0
+        total_tools = len(tools)
+        for tool in tools:
+            health = tool_health.get(tool, {}).get("health")
+            if health == "healthy":
+                healthy_tools += 1
+            elif health == "degraded":
+                degraded_tools += 1
         
-        metrics = {
-            "timestamp": datetime.now().isoformat(),
-            "system": {
-                "cpu_percent": round(cpu_percent, 1),
-                "memory_percent": round(memory.percent, 1),
-                "memory_used_gb": round(memory.used / (1024**3), 2),
-                "memory_total_gb": round(memory.total / (1024**3), 2),
-                "disk_percent": round(disk.percent, 1),
-                "disk_used_gb": round(disk.used / (1024**3), 2),
-                "disk_total_gb": round(disk.total / (1024**3), 2)
-            },
-            "containers": {
-                "total": total_containers,
-                "running": running_containers,
-                "stopped": stopped_containers,
-                "health_percentage": round((running_containers / total_containers * 100) if total_containers > 0 else 0, 1)
-            },
-            "tools": tool_health,
-            "categories": category_health,
-            "activity": activity_summary,
-            "uptime": datetime.now().isoformat()
+        health_percentage = (healthy_tools / total_tools * 100) if total_tools > 0 else 0
+        category_health[category] = {
+            "health_percentage": round(health_percentage, 1),
+            "healthy_tools": healthy_tools,
+            "degraded_tools": degraded_tools,
+            "total_tools": total_tools,
+            "status": "healthy" if health_percentage >= 80 else "degraded" if health_percentage >= 50 else "critical"
         }
+    
+    # Recent activity from changelog
+    recent_entries = changelog_manager.get_entries(limit=10)
+    activity_summary = {
+        "container_starts": len([e for e in recent_entries if "started" in e.get("action", "")]),
+        "container_stops": len([e for e in recent_entries if "stopped" in e.get("action", "")]),
+        "api_calls": len([e for e in recent_entries if "api_call" in e.get("action", "")]),
+        "errors": len([e for e in recent_entries if e.get("level") == "error"])
+    }
+    
+    metrics = {
+        "timestamp": datetime.now().isoformat(),
+        "system": {
+            "cpu_percent": sample["cpu_percent"],
+            "memory_percent": sample["memory_percent"],
+            "memory_used_gb": sample["memory_used_gb"],
+            "memory_total_gb": sample["memory_total_gb"],
+            "disk_percent": sample["disk_percent"],
+            "disk_used_gb": sample["disk_used_gb"],
+            "disk_total_gb": sample["disk_total_gb"],
+            "sampled_at": sample["timestamp"],
+            "sample_age": system_sampler.age()
+        },
+        "sampler": system_sampler.get_health(),
+        "containers": {
+            "total": total_containers,
+            "running": running_containers,
+            "stopped": stopped_containers,
+            "health_percentage": round((running_containers / total_containers * 100) if total_containers > 0 else 0, 1)
+        },
+        "tools": tool_health,
+        "categories": category_health,
+        "activity": activity_summary,
+        "uptime": datetime.now().isoformat()
+    }
+    return metrics
+
+@app.route('/api/dashboard/metrics')
+def get_dashboard_metrics():
+    """Get comprehensive dashboard metrics for enhanced visualization"""
+    try:
+        # System metrics come from the background sampler
+        sample = latest_system_sample()
+        if sample is None:
+            return jsonify({"error": "System metrics unavailable", "sampler": system_sampler.get_health()}), 503
         
+        metrics = build_dashboard_metrics(sample)
         changelog_manager.add_entry("api_call", "Dashboard metrics requested")
         return jsonify(metrics)
         
@@ -955,42 +1476,48 @@ def get_dashboard_metrics():
         logger.error(f"Error getting dashboard metrics: {e}")
         return jsonify({"error": str(e)}), 500
 
+def build_dashboard_trends(timeframe="24h", points=180):
+    """Trends payload for one of TREND_WINDOWS"""
+    tool_series = metrics_store.series_names("tool:")
+    resolution, starts, series = metrics_store.query(
+        ["cpu_percent", "memory_percent", "containers_running"] + tool_series,
+        TREND_WINDOWS[timeframe], max_points=points
+    )
+    label_format = "%m-%d %H:%M" if timeframe == "7d" else "%H:%M"
+    
+    trends = {
+        "timestamp": datetime.now().isoformat(),
+        "timeframe": timeframe,
+        "resolution": resolution,
+        "data": {
+            "labels": [datetime.fromtimestamp(start).strftime(label_format) for start in starts],
+            "timestamps": starts,
+            "cpu_usage": series["cpu_percent"]["avg"],
+            "memory_usage": series["memory_percent"]["avg"],
+            "container_count": series["containers_running"]["avg"],
+            "series": {
+                "cpu_percent": series["cpu_percent"],
+                "memory_percent": series["memory_percent"],
+                "containers_running": series["containers_running"]
+            },
+            # Fraction of each bucket the tool's container was running
+            "tools": {name.split(':', 1)[1]: series[name] for name in tool_series}
+        }
+    }
+    return trends
+
 @app.route('/api/dashboard/trends')
 def get_dashboard_trends():
     """Get trending data for charts and graphs"""
     try:
-        # For now, we'll generate sample trending data
-        # In a real implementation, this would come from a time-series database
-        from datetime import datetime, timedelta
-        import random
-        
-        now = datetime.now()
-        hours = []
-        cpu_data = []
-        memory_data = []
-        container_data = []
-        
-        # Generate 24 hours of sample data
-        for i in range(24):
-            timestamp = now - timedelta(hours=23-i)
-            hours.append(timestamp.strftime("%H:%M"))
-            
-            # Simulate realistic trending data
-            cpu_data.append(round(random.uniform(10, 80), 1))
-            memory_data.append(round(random.uniform(30, 90), 1))
-            container_data.append(random.randint(25, 28))
-        
-        trends = {
-            "timestamp": now.isoformat(),
-            "timeframe": "24h",
-            "data": {
-                "labels": hours,
-                "cpu_usage": cpu_data,
-                "memory_usage": memory_data,
-                "container_count": container_data
-            }
-        }
+        timeframe = request.args.get('timeframe', '24h')
+        if timeframe not in TREND_WINDOWS:
+            return jsonify({"error": f"Unknown timeframe '{timeframe}', use one of {', '.join(TREND_WINDOWS)}"}), 400
+        points = min(max(request.args.get('points', 180, type=int), 10), 2000)
+        if not shutdown_flag:
+            system_sampler.start()
         
+        trends = build_dashboard_trends(timeframe, points)
         changelog_manager.add_entry("api_call", "Dashboard trends requested")
         return jsonify(trends)
         
@@ -998,168 +1525,489 @@ def get_dashboard_trends():
         logger.error(f"Error getting dashboard trends: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/dashboard/security-events')
-def get_security_events():
-    """Get recent security-related events and alerts"""
-    try:
-        # Get recent changelog entries related to security
-        recent_entries = changelog_manager.get_entries(limit=50)
+# Follows Suricata's eve.json; the security events panel shows its alerts
+eve_tailer = EveTailer(EVE_JSON_PATH, window=EVE_ALERT_WINDOW, interval=EVE_POLL_INTERVAL,
+                       backfill_bytes=EVE_BACKFILL_BYTES)
+
+# Historical alert search; live alerts from the tailer, archives via `python3 ids_index.py build`
+ids_index = IdsIndex(IDS_INDEX_DIR, partition_seconds=IDS_INDEX_PARTITION_SECONDS,
+                     rows_per_segment=IDS_INDEX_SEGMENT_ROWS, retention_days=IDS_INDEX_RETENTION_DAYS)
+
+def index_eve_alerts(alerts):
+    # The tailer re-reads the end of eve.json on startup; skip what the index already holds
+    ids_index.add(alerts, newer_than=ids_index.loaded_until)
+
+eve_tailer.add_listener(index_eve_alerts)
+
+# The dashboard and forwarders get one rollup per signature/source/destination/window, not every alert
+alert_aggregator = AlertAggregator(window=ALERT_AGG_WINDOW, windows=ALERT_AGG_WINDOWS,
+                                   max_groups=ALERT_AGG_MAX_GROUPS, lag=ALERT_AGG_LAG)
+eve_tailer.add_listener(alert_aggregator.add)
+# Closes the last windows when eve.json goes quiet
+eve_tailer.add_poll_listener(alert_aggregator.expire)
+if ALERT_ROLLUP_FILE:
+    alert_aggregator.add_listener(RollupFileSink(ALERT_ROLLUP_FILE))
+
+EVE_SEVERITY_STYLES = {
+    "high": ("fas fa-exclamation-triangle", "danger"),
+    "medium": ("fas fa-exclamation-circle", "warning"),
+    "low": ("fas fa-info-circle", "info")
+}
+
+def build_security_events():
+    """Security events payload: Suricata alerts when eve.json is present, else changelog entries"""
+    if not eve_tailer.available():
+        return build_changelog_security_events()
+    
+    # Reads in-memory rollups and precomputed counters; the file itself is never touched here
+    events = []
+    for rollup in alert_aggregator.recent(20):
+        severity = severity_name(rollup["severity"])
+        icon, color = EVE_SEVERITY_STYLES[severity]
+        title = rollup["signature"] or f"SID {rollup['signature_id']}"
+        ports = ",".join(str(port) for port in rollup["dest_ports"])
+        events.append({
+            "id": f"{rollup['signature_id']}-{rollup['src_ip']}-{rollup['dest_ip']}-{rollup['window_start']}",
+            "timestamp": rollup["last_seen"],
+            "title": f"{title} (x{rollup['count']})" if rollup["count"] > 1 else title,
+            "description": (f"{rollup['src_ip']} -> {rollup['dest_ip']}:{ports} {rollup['proto']}, "
+                            f"{rollup['count']} alerts since {rollup['first_seen']}"),
+            "severity": severity,
+            "icon": icon,
+            "color": color,
+            "user": "suricata",
+            "rollup": rollup
+        })
+    summary = eve_tailer.summary()
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "source": "suricata",
+        "events": events,
+        "statistics": {key: summary[key] for key in ("total", "high", "medium", "low")},
+        "top_signatures": summary["top_signatures"],
+        "aggregation": alert_aggregator.get_stats()
+    }
+
+def build_changelog_security_events():
+    """Security events payload from recent changelog entries"""
+    # Get recent changelog entries related to security
+    recent_entries = changelog_manager.get_entries(limit=50)
+    
+    security_events = []
+    for entry in recent_entries:
+        # Classify events as security-related
+        action = entry.get("action", "")
+        details = entry.get("details", "")
+        level = entry.get("level", "info")
         
-        security_events = []
-        for entry in recent_entries:
-            # Classify events as security-related
-            action = entry.get("action", "")
-            details = entry.get("details", "")
-            level = entry.get("level", "info")
+        if any(keyword in action.lower() or keyword in details.lower() 
+               for keyword in ["container_stopped", "container_started", "error", "failed", "warning"]):
             
-            if any(keyword in action.lower() or keyword in details.lower() 
-                   for keyword in ["container_stopped", "container_started", "error", "failed", "warning"]):
-                
-                # Determine event severity
-                if level == "error" or "failed" in details.lower():
-                    severity = "high"
-                    icon = "fas fa-exclamation-triangle"
-                    color = "danger"
-                elif level == "warning" or "stopped" in action:
-                    severity = "medium"
-                    icon = "fas fa-exclamation-circle"
-                    color = "warning"
-                else:
-                    severity = "low"
-                    icon = "fas fa-info-circle"
-                    color = "info"
-                
-                security_events.append({
-                    "id": entry.get("id"),
-                    "timestamp": entry.get("timestamp"),
-                    "title": action.replace("_", " ").title(),
-                    "description": details,
-                    "severity": severity,
-                    "icon": icon,
-                    "color": color,
-                    "user": entry.get("user", "system")
-                })
-        
-        # Limit to 20 most recent events
-        security_events = security_events[:20]
-        
-        # Event statistics
-        event_stats = {
-            "total": len(security_events),
-            "high": len([e for e in security_events if e["severity"] == "high"]),
-            "medium": len([e for e in security_events if e["severity"] == "medium"]),
-            "low": len([e for e in security_events if e["severity"] == "low"])
-        }
+            # Determine event severity
+            if level == "error" or "failed" in details.lower():
+                severity = "high"
+                icon = "fas fa-exclamation-triangle"
+                color = "danger"
+            elif level == "warning" or "stopped" in action:
+                severity = "medium"
+                icon = "fas fa-exclamation-circle"
+                color = "warning"
+            else:
+                severity = "low"
+                icon = "fas fa-info-circle"
+                color = "info"
+            
+            security_events.append({
+                "id": entry.get("id"),
+                "timestamp": entry.get("timestamp"),
+                "title": action.replace("_", " ").title(),
+                "description": details,
+                "severity": severity,
+                "icon": icon,
+                "color": color,
+                "user": entry.get("user", "system")
+            })
+    
+    # Limit to 20 most recent events
+    security_events = security_events[:20]
+    
+    # Event statistics
+    event_stats = {
+        "total": len(security_events),
+        "high": len([e for e in security_events if e["severity"] == "high"]),
+        "medium": len([e for e in security_events if e["severity"] == "medium"]),
+        "low": len([e for e in security_events if e["severity"] == "low"])
+    }
+    
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "source": "changelog",
+        "events": security_events,
+        "statistics": event_stats
+    }
+    return result
+
+@app.route('/api/ids/search')
+def search_ids_alerts():
+    """Search historical Suricata alerts API endpoint"""
+    try:
+        args = request.args
+        group_by = args.get('group_by')
+        if group_by and group_by not in GROUP_BY_COLUMNS:
+            return jsonify({"error": f"Unknown group_by '{group_by}', use one of {', '.join(GROUP_BY_COLUMNS)}"}), 400
+        try:
+            since = parse_timestamp(args.get('since'))
+            until = parse_timestamp(args.get('until'))
+        except ValueError:
+            return jsonify({"error": "since/until must be ISO-8601 timestamps"}), 400
+        numbers = {}
+        for name in ('signature_id', 'dest_port', 'severity'):
+            value = args.get(name)
+            try:
+                numbers[name] = int(value) if value else None
+            except ValueError:
+                return jsonify({"error": f"{name} must be an integer"}), 400
         
-        result = {
-            "timestamp": datetime.now().isoformat(),
-            "events": security_events,
-            "statistics": event_stats
-        }
+        result = ids_index.search(
+            since=since,
+            until=until,
+            signature_id=numbers['signature_id'],
+            src_ip=args.get('src_ip'),
+            dest_ip=args.get('dest_ip'),
+            ip=args.get('ip'),
+            dest_port=numbers['dest_port'],
+            proto=args.get('proto'),
+            severity=numbers['severity'],
+            limit=min(max(args.get('limit', 100, type=int), 0), 1000),
+            group_by=group_by or None
+        )
+        changelog_manager.add_entry("api_call", f"IDS search: {result['total']} alerts in {result['took_ms']}ms")
+        return jsonify(result)
         
-        changelog_manager.add_entry("api_call", f"Security events requested: {len(security_events)} events")
+    except Exception as e:
+        logger.error(f"Error searching IDS alerts: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/ids/rollups')
+def get_alert_rollups():
+    """Recent aggregated alerts API endpoint"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        return jsonify({
+            "rollups": alert_aggregator.recent(limit),
+            "stats": alert_aggregator.get_stats()
+        })
+    except Exception as e:
+        logger.error(f"Error getting alert rollups: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/dashboard/security-events')
+def get_security_events():
+    """Get recent security-related events and alerts"""
+    try:
+        result = build_security_events()
+        changelog_manager.add_entry("api_call", f"Security events requested: {len(result['events'])} events")
         return jsonify(result)
         
     except Exception as e:
         logger.error(f"Error getting security events: {e}")
         return jsonify({"error": str(e)}), 500
 
+def build_network_stats(sample, all_containers=None):
+    """Network stats payload for a system sample"""
+    # Docker network information
+    try:
+        networks = [{
+            "name": network.get("Name", ""),
+            "driver": network.get("Driver", ""),
+            "scope": network.get("Scope", "")
+        } for network in network_cache.get()]
+    except Exception:
+        networks = []
+    
+    # Container port mappings
+    if all_containers is None:
+        all_containers = container_monitor.get_all_container_status()
+    active_ports = []
+    for container in all_containers.values():
+        if container["status"] == "running" and container["ports"]:
+            ports = container["ports"]
+            if ports and ports != "":
+                active_ports.append({
+                    "container": container["name"],
+                    "ports": ports
+                })
+    
+    stats = {
+        "timestamp": datetime.now().isoformat(),
+        "system_network": dict(sample["network"], **sample["network_rate"]),
+        "docker_networks": networks,
+        "active_ports": active_ports,
+        "network_health": "healthy" if len(networks) > 0 else "warning"
+    }
+    return stats
+
 @app.route('/api/dashboard/network-stats')
 def get_network_stats():
     """Get network statistics for containers and system"""
     try:
-        import psutil
+        # Network interface statistics from the background sampler
+        sample = latest_system_sample()
+        if sample is None:
+            return jsonify({"error": "System metrics unavailable", "sampler": system_sampler.get_health()}), 503
         
-        # Get network interface statistics
-        network_stats = psutil.net_io_counters()
+        stats = build_network_stats(sample)
+        changelog_manager.add_entry("api_call", "Network stats requested")
+        return jsonify(stats)
         
-        # Docker network information
-        try:
-            result = subprocess.run(
-                ['docker', 'network', 'ls', '--format', '{{.Name}}\t{{.Driver}}\t{{.Scope}}'],
-                capture_output=True, text=True, timeout=10
-            )
-            
-            networks = []
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
-                        parts = line.split('\t')
-                        if len(parts) >= 3:
-                            networks.append({
-                                "name": parts[0],
-                                "driver": parts[1],
-                                "scope": parts[2]
-                            })
-        except Exception:
-            networks = []
+    except Exception as e:
+        logger.error(f"Error getting network stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/dashboard/snapshot')
+def get_dashboard_snapshot():
+    """Get every dashboard section in one response, with ETag revalidation"""
+    try:
+        requested = request.args.get('sections')
+        sections = [name.strip() for name in requested.split(',') if name.strip()] if requested else list(SNAPSHOT_SECTIONS)
+        unknown = [name for name in sections if name not in SNAPSHOT_SECTIONS]
+        if unknown:
+            return jsonify({"error": f"Unknown sections {', '.join(unknown)}, use any of {', '.join(SNAPSHOT_SECTIONS)}"}), 400
+        timeframe = request.args.get('timeframe', '24h')
+        if timeframe not in TREND_WINDOWS:
+            return jsonify({"error": f"Unknown timeframe '{timeframe}', use one of {', '.join(TREND_WINDOWS)}"}), 400
         
-        # Container port mappings
+        # Every section is built from the same container listing and system sample
         all_containers = container_monitor.get_all_container_status()
-        active_ports = []
-        for container in all_containers.values():
-            if container["status"] == "running" and container["ports"]:
-                ports = container["ports"]
-                if ports and ports != "":
-                    active_ports.append({
-                        "container": container["name"],
-                        "ports": ports
-                    })
+        sample = latest_system_sample()
+        if sample is None and ("metrics" in sections or "network" in sections):
+            return jsonify({"error": "System metrics unavailable", "sampler": system_sampler.get_health()}), 503
         
-        stats = {
-            "timestamp": datetime.now().isoformat(),
-            "system_network": {
-                "bytes_sent": network_stats.bytes_sent,
-                "bytes_recv": network_stats.bytes_recv,
-                "packets_sent": network_stats.packets_sent,
-                "packets_recv": network_stats.packets_recv,
-                "errors_in": network_stats.errin,
-                "errors_out": network_stats.errout
-            },
-            "docker_networks": networks,
-            "active_ports": active_ports,
-            "network_health": "healthy" if len(networks) > 0 else "warning"
+        builders = {
+            "server_info": build_server_info,
+            "metrics": lambda: build_dashboard_metrics(sample, all_containers),
+            "tools": build_tools,
+            "trends": lambda: build_dashboard_trends(timeframe),
+            "security_events": build_security_events,
+            "network": lambda: build_network_stats(sample, all_containers)
         }
+        payload = {name: builders[name]() for name in sections}
         
-        changelog_manager.add_entry("api_call", "Network stats requested")
-        return jsonify(stats)
+        etag = hashlib.sha1(fingerprint(payload).encode('utf-8')).hexdigest()[:32]
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            changelog_manager.add_entry("api_call", f"Dashboard snapshot requested: {', '.join(sections)}")
+            response = jsonify({
+                "timestamp": datetime.now().isoformat(),
+                "sections": payload
+            })
+        response.set_etag(etag)
+        # Cache, but revalidate every time
+        response.headers["Cache-Control"] = "no-cache"
+        return response
         
     except Exception as e:
-        logger.error(f"Error getting network stats: {e}")
+        logger.error(f"Error getting dashboard snapshot: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _stream_metrics():
+    sample = latest_system_sample()
+    return build_dashboard_metrics(sample) if sample else None
+
+def _stream_network():
+    sample = latest_system_sample()
+    return build_network_stats(sample) if sample else None
+
+# One producer shared by every connected dashboard
+dashboard_stream = DashboardStream({
+    "metrics": (_stream_metrics, SYSTEM_SAMPLE_INTERVAL),
+    "network": (_stream_network, SYSTEM_SAMPLE_INTERVAL),
+    "security_events": (build_security_events, 10),
+    "trends": (build_dashboard_trends, STREAM_TRENDS_INTERVAL),
+    "jobs": (lambda: {"jobs": job_manager.list(10)}, 5)
+}, heartbeat=STREAM_HEARTBEAT, max_clients=STREAM_MAX_CLIENTS)
+container_monitor.add_listener(dashboard_stream.wake)
+job_manager.add_listener(dashboard_stream.wake)
+eve_tailer.add_listener(dashboard_stream.wake)
+
+@app.route('/api/stream')
+def stream_dashboard():
+    """Server-Sent Events stream of dashboard section updates"""
+    try:
+        subscriber = dashboard_stream.subscribe()
+    except StreamFull as e:
+        # EventSource gives up on a non-200 answer and the dashboard falls back to polling
+        return jsonify({"error": str(e)}), 503
+    changelog_manager.add_entry("api_call", "Dashboard stream opened", user="web_user")
+    
+    def generate():
+        try:
+            for message in dashboard_stream.messages(subscriber):
+                yield message
+        finally:
+            dashboard_stream.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+def collect_portal_metrics():
+    """Scrape-time view of the counters the components already keep"""
+    lines = []
+    caches = [container_monitor.status_cache, network_cache, server_ip_cache]
+    for field, documentation in (("hits", "Snapshot cache reads served without loading"),
+                                 ("misses", "Snapshot cache reads that had to load or wait for a load"),
+                                 ("loads", "Snapshot cache loads"),
+                                 ("load_errors", "Snapshot cache loads that failed")):
+        stats = [cache.get_stats() for cache in caches]
+        lines.extend(family(f"portal_cache_{field}_total", "counter", documentation,
+                            [((st["name"],), st[field]) for st in stats], ("cache",)))
+    
+    writer = changelog_manager.get_writer_stats()
+    if writer.get("mode") == "async":
+        lines.extend(family("portal_changelog_queue_depth", "gauge", "Changelog entries waiting for the writer",
+                            [((), writer["queue_depth"])]))
+        lines.extend(family("portal_changelog_dropped_total", "counter", "Changelog entries dropped on a full queue",
+                            [((), writer["dropped"])]))
+    
+    lines.extend(family("portal_monitor_stream_connected", "gauge", "1 while the Docker events stream is connected",
+                        [((), 1 if container_monitor.stream_connected else 0)]))
+    sampler = system_sampler.get_health()
+    if sampler["last_duration_ms"] is not None:
+        lines.extend(family("portal_system_sample_duration_seconds", "gauge", "Duration of the latest system sample",
+                            [((), sampler["last_duration_ms"] / 1000)]))
+    lines.extend(family("portal_stream_clients", "gauge", "Open dashboard event streams",
+                        [((), dashboard_stream.get_stats()["clients"])]))
+    lines.extend(family("portal_container_jobs_pending", "gauge", "Container jobs queued or running",
+                        [((), job_manager.get_stats()["pending"])]))
+    
+    # Tool probe latency, converted from the probe engine's millisecond buckets
+    probes = tool_prober.results()
+    lines.append("# HELP portal_tool_probe_latency_seconds Latency of successful tool port probes")
+    lines.append("# TYPE portal_tool_probe_latency_seconds histogram")
+    for tool, probe in probes.items():
+        latency = probe["latency"]
+        counts = [b - a for a, b in zip([0] + latency["cumulative_counts"][:-1], latency["cumulative_counts"])]
+        lines.extend(histogram_lines("portal_tool_probe_latency_seconds", ("tool",), (tool,),
+                                     [b / 1000 for b in latency["buckets_ms"]], counts, latency["sum_ms"] / 1000))
+    lines.extend(family("portal_tool_up", "gauge", "1 if the tool's last probe succeeded",
+                        [((tool,), 1 if probe["checks"] and probe["last_error"] is None else 0)
+                         for tool, probe in probes.items()], ("tool",)))
+    
+    eve = eve_tailer.get_stats()
+    lines.extend(family("portal_eve_lines_read_total", "counter", "eve.json lines read by the tailer",
+                        [((), eve["lines_read"])]))
+    lines.extend(family("portal_eve_alerts_total", "counter", "Suricata alerts read from eve.json",
+                        [((), eve["alerts_seen"])]))
+    lines.extend(family("portal_eve_offset_bytes", "gauge", "Read offset of the tailer in the current eve.json",
+                        [((), eve["offset"])]))
+    aggregation = alert_aggregator.get_stats()
+    lines.extend(family("portal_alert_groups_open", "gauge", "Alert rollup groups still open",
+                        [((), aggregation["open_groups"])]))
+    lines.extend(family("portal_alert_rollups_total", "counter", "Alert rollups emitted",
+                        [((), aggregation["rollups_out"])]))
+    lines.extend(family("portal_alert_groups_evicted_total", "counter", "Alert groups emitted early to stay within ALERT_AGG_MAX_GROUPS",
+                        [((), aggregation["evicted"])]))
+    index = ids_index.get_stats()
+    lines.extend(family("portal_ids_index_alerts", "gauge", "Alerts held in sealed IDS index segments",
+                        [((), index["alerts"])]))
+    lines.extend(family("portal_ids_index_bytes", "gauge", "Size of the IDS index on disk",
+                        [((), index["bytes"])]))
+    return lines
+
+REGISTRY.add_collector(collect_portal_metrics)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text-format metrics (not written to the changelog: scraped every few seconds)"""
+    return Response(REGISTRY.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+_services_lock = threading.Lock()
+_services_started = False
+
+def start_background_services():
+    """Start the container monitor and system sampler.
+
+    Called once per process: from __main__ for the development server and
+    from gunicorn's post_worker_init hook in production, never at import.
+    """
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+    
+    changelog_manager.start()
+    job_manager.start()
+    changelog_manager.add_entry(
+        "system_startup",
+        "CyberBlueBox Portal started successfully with container monitoring",
+        level="info"
+    )
+    
+    # Start container monitoring in a separate thread to avoid blocking
+    def start_monitoring_async():
+        try:
+            container_monitor.start_monitoring()
+        except Exception as e:
+            logger.error(f"Error starting container monitoring: {e}")
+        system_sampler.start()
+        tool_prober.start()
+        # Load sealed segments before the tailer feeds new alerts in
+        ids_index.load()
+        eve_tailer.start()
+
+    monitoring_thread = threading.Thread(target=start_monitoring_async, daemon=True)
+    monitoring_thread.start()
+
+def shutdown_background_services():
+    """Stop background threads and flush state to disk (idempotent)"""
+    global shutdown_flag
+    with _services_lock:
+        if shutdown_flag:
+            return
+        shutdown_flag = True
+    
+    logger.info("Shutting down CyberBlueBox Portal...")
+    # End open dashboard streams first so their connections can close
+    dashboard_stream.stop()
+    job_manager.shutdown()
+    if _services_started:
+        container_monitor.stop_monitoring()
+    system_sampler.stop()
+    tool_prober.stop()
+    eve_tailer.stop()
+    alert_aggregator.flush()
+    ids_index.flush()
+    save_trends()
+    changelog_manager.add_entry("system_shutdown", "CyberBlueBox Portal shut down gracefully")
+    # Persist any changelog entries still waiting in the writer queue
+    changelog_manager.close()
+    docker_client.close()
+
 if __name__ == '__main__':
     logger.info(f"🚀 Starting CyberBlueBox Portal on port {PORT}")
     logger.info(f"📱 Access the portal at: http://localhost:{PORT}")
     logger.info(f"🔧 API endpoints available at: http://localhost:{PORT}/api/")
     
+    # Register signal handlers
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
     try:
-        # Log initial startup
-        changelog_manager.add_entry(
-            "system_startup",
-            "CyberBlueBox Portal started successfully with container monitoring",
-            level="info"
-        )
-        
-        # Start container monitoring in a separate thread to avoid blocking
-        def start_monitoring_async():
-            try:
-                container_monitor.start_monitoring()
-            except Exception as e:
-                logger.error(f"Error starting container monitoring: {e}")
-
-        monitoring_thread = threading.Thread(target=start_monitoring_async, daemon=True)
-        monitoring_thread.start()
+        start_background_services()
         
-        # Start the Flask app
+        # Development server; production runs under gunicorn (see gunicorn.conf.py)
         app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)
         
     except KeyboardInterrupt:
-        logger.info("Shutting down CyberBlueBox Portal...")
-        changelog_manager.add_entry("system_shutdown", "CyberBlueBox Portal shut down gracefully")
+        shutdown_background_services()
     except Exception as e:
         logger.error(f"Error starting server: {e}")
         changelog_manager.add_entry("system_error", f"Server startup error: {e}", level="error")
+        changelog_manager.close()
         # Don't exit immediately, try to log the error
         time.sleep(5)
         sys.exit(1) 
\ No newline at end of file
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Eve Parser Benchmark
+Replays a synthetic eve.json through the chunked parser and a line-by-line baseline
+
+Usage:
+    python3 bench_eve_parser.py [--size-mb 2048] [--alert-ratio 0.02] [--file /tmp/eve-bench.json]
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+
+from eve_parser import EveParser, iter_records, DEFAULT_CHUNK_SIZE
+
+# Rough record mix of a busy sensor
+EVENT_MIX = (("flow", 0.40), ("dns", 0.25), ("http", 0.12), ("tls", 0.12), ("fileinfo", 0.05),
+             ("anomaly", 0.02), ("stats", 0.001))
+
+SIGNATURES = [
+    (2019401, "ET POLICY Vulnerable Java Version 1.8.x Detected", 2),
+    (2210044, "SURICATA STREAM Packet with invalid timestamp", 3),
+    (2402000, "ET DROP Dshield Block Listed Source group 1", 2),
+    (2033078, "ET MALWARE Cobalt Strike Beacon Observed", 1),
+    (2027865, "ET INFO Observed DNS Query to .cloud TLD", 3),
+]
+
+
+def synthetic_record(event_type, i, rng):
+    record = {
+        "timestamp": f"2026-10-17T10:{i // 60000 % 60:02d}:{i // 1000 % 60:02d}.{i % 1000:03d}000+0000",
+        "flow_id": rng.randrange(1 << 50),
+        "in_iface": "eth0",
+        "event_type": event_type,
+        "src_ip": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+        "src_port": rng.randrange(1024, 65535),
+        "dest_ip": f"192.168.{rng.randrange(4)}.{rng.randrange(256)}",
+        "dest_port": rng.choice((53, 80, 443, 8080, 22)),
+        "proto": rng.choice(("TCP", "UDP"))
+    }
+    if event_type == "alert":
+        sid, signature, severity = rng.choice(SIGNATURES)
+        record["alert"] = {"action": "allowed", "gid": 1, "signature_id": sid, "rev": 3,
+                           "signature": signature, "category": "Potentially Bad Traffic", "severity": severity}
+        record["payload_printable"] = 'GET / HTTP/1.1\r\nHost: example.com\r\n"event_type":"alert"'
+    elif event_type == "flow":
+        record["flow"] = {"pkts_toserver": rng.randrange(100), "pkts_toclient": rng.randrange(100),
+                          "bytes_toserver": rng.randrange(1 << 20), "bytes_toclient": rng.randrange(1 << 20),
+                          "start": record["timestamp"], "end": record["timestamp"], "age": rng.randrange(60),
+                          "state": "closed", "reason": "timeout", "alerted": False}
+    elif event_type == "dns":
+        record["dns"] = {"type": "query", "id": rng.randrange(65535), "rrname": f"host{rng.randrange(1000)}.example.com",
+                         "rrtype": "A", "tx_id": 0}
+    elif event_type == "http":
+        record["http"] = {"hostname": "example.com", "url": f"/path/{rng.randrange(10000)}",
+                          "http_user_agent": "Mozilla/5.0 (X11; Linux x86_64)", "http_content_type": "text/html",
+                          "http_method": "GET", "protocol": "HTTP/1.1", "status": 200, "length": rng.randrange(50000)}
+    elif event_type == "tls":
+        record["tls"] = {"subject": "CN=example.com", "issuerdn": "CN=R3, O=Let's Encrypt", "version": "TLS 1.3",
+                         "sni": "example.com", "ja3": {"hash": "%032x" % rng.randrange(1 << 128)}}
+    return json.dumps(record, separators=(',', ':'))
+
+
+def generate(path, size_mb, alert_ratio, seed=7):
+    """Write `size_mb` of eve.json by repeating a block of unique records"""
+    rng = random.Random(seed)
+    mix = [(name, weight) for name, weight in EVENT_MIX] + [("alert", alert_ratio)]
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    lines = [synthetic_record(name, i, rng) for i, name in enumerate(rng.choices(names, weights, k=20000))]
+    block = ("\n".join(lines) + "\n").encode('utf-8')
+    target = size_mb * 1024 * 1024
+    with open(path, 'wb') as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+    return written
+
+
+def run_baseline(path):
+    """What a straightforward reader does: decode every line, then check event_type"""
+    alerts = lines = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            lines += 1
+            if json.loads(line).get("event_type") == "alert":
+                alerts += 1
+    return lines, alerts
+
+
+def run_parser(path, chunk_size, batch_size):
+    parser = EveParser(("alert",), batch_size)
+    alerts = sum(len(records) for records in iter_records(path, chunk_size=chunk_size, parser=parser))
+    return parser.lines, alerts
+
+
+def report(name, elapsed, size, lines, alerts):
+    print(f"{name:<22} {elapsed:7.2f} s  {size / elapsed / 1024 / 1024:7.1f} MB/s  "
+          f"{lines / elapsed:10,.0f} events/s  ({alerts:,} alerts of {lines:,} lines)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eve.json ingestion")
+    parser.add_argument("--file", default="/tmp/eve-bench.json", help="synthetic eve.json to write and replay")
+    parser.add_argument("--size-mb", type=int, default=2048, help="size of the synthetic file")
+    parser.add_argument("--alert-ratio", type=float, default=0.02, help="weight of alert records in the mix")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="parser read size in bytes")
+    parser.add_argument("--batch-size", type=int, default=1000, help="lines per JSON decode batch")
+    parser.add_argument("--reuse", action="store_true", help="replay an existing --file instead of generating it")
+    parser.add_argument("--skip-baseline", action="store_true", help="only run the chunked parser")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic file afterwards")
+    args = parser.parse_args()
+
+    if not (args.reuse and os.path.exists(args.file)):
+        started = time.perf_counter()
+        generate(args.file, args.size_mb, args.alert_ratio)
+        print(f"generated {args.file} in {time.perf_counter() - started:.1f} s")
+    size = os.path.getsize(args.file)
+    print(f"replaying {size / 1024 / 1024:,.0f} MB")
+    try:
+        started = time.perf_counter()
+        lines, alerts = run_parser(args.file, args.chunk_size, args.batch_size)
+        report("chunked + pre-filter", time.perf_counter() - started, size, lines, alerts)
+        if not args.skip_baseline:
+            started = time.perf_counter()
+            lines, alerts = run_baseline(args.file)
+            report("line-by-line decode", time.perf_counter() - started, size, lines, alerts)
+    finally:
+        if not args.keep:
+            os.remove(args.file)
+
+
+if __name__ == '__main__':
+    main()
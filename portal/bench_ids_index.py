@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - IDS Index Benchmark
+Builds an index of synthetic alerts spread over a week and times typical searches
+
+Usage:
+    python3 bench_ids_index.py [--events 100000000] [--index-dir /tmp/ids-bench]
+"""
+
+import os
+import time
+import shutil
+import random
+import argparse
+from datetime import datetime, timezone
+
+from ids_index import IdsIndex
+
+WEEK = 7 * 24 * 3600
+
+
+def synthetic_batches(events, start, batch=65536, seed=11):
+    """Alerts in time order; signatures and source hosts follow a long-tailed distribution"""
+    rng = random.Random(seed)
+    step = WEEK / events
+    sources = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(20000)]
+    targets = [f"192.168.{i // 256}.{i % 256}" for i in range(500)]
+    ports = (80, 443, 22, 53, 3389, 445, 8080)
+    produced = 0
+    while produced < events:
+        alerts = []
+        count = min(batch, events - produced)
+        ts = start + produced * step
+        for i in range(count):
+            ts += step
+            sid_rank = min(int(rng.paretovariate(1.1)), 3000)
+            alerts.append({
+                "timestamp": ts,  # epoch seconds are accepted as well as eve's text form
+                "flow_id": rng.getrandbits(50),
+                "src_ip": sources[min(int(rng.paretovariate(0.8)) - 1, len(sources) - 1)],
+                "src_port": rng.randrange(1024, 65535),
+                "dest_ip": targets[rng.randrange(len(targets))],
+                "dest_port": ports[rng.randrange(len(ports))],
+                "proto": "TCP",
+                "signature_id": 2000000 + sid_rank,
+                "signature": f"ET SYNTHETIC signature {sid_rank}",
+                "severity": 1 + sid_rank % 3,
+                "action": "allowed",
+                "category": ""
+            })
+        produced += count
+        yield alerts
+
+
+def timed(index, label, **query):
+    index.search(limit=20, **query)  # first run reads bitmaps from disk into the page cache
+    started = time.perf_counter()
+    result = index.search(limit=20, **query)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{label:<44} {elapsed:8.1f} ms  {result['total']:>12,} matches  "
+          f"{result['segments_scanned']:>5}/{result['segments_total']} segments")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IDS index build and search")
+    parser.add_argument("--events", type=int, default=100_000_000)
+    parser.add_argument("--index-dir", default="/tmp/ids-bench")
+    parser.add_argument("--reuse", action="store_true", help="search an index built by an earlier run")
+    parser.add_argument("--keep", action="store_true", help="keep the index afterwards")
+    args = parser.parse_args()
+
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp()
+    index = IdsIndex(args.index_dir, retention_days=0)
+    if args.reuse and os.path.isdir(args.index_dir):
+        index.load()
+    else:
+        shutil.rmtree(args.index_dir, ignore_errors=True)
+        started = time.perf_counter()
+        for alerts in synthetic_batches(args.events, start):
+            index.add(alerts)
+        index.flush()
+        elapsed = time.perf_counter() - started
+        print(f"indexed {args.events:,} alerts in {elapsed:.0f} s ({args.events / elapsed:,.0f}/s)")
+    stats = index.get_stats()
+    print(f"{stats['segments']} segments, {stats['partitions']} partitions, "
+          f"{stats['bytes'] / 1024 / 1024:,.0f} MB ({stats['bytes'] / max(stats['alerts'], 1):.1f} bytes/alert)")
+
+    day = 24 * 3600
+    try:
+        timed(index, "common signature, whole week", signature_id=2000001)
+        timed(index, "rare signature, whole week", signature_id=2000400)
+        timed(index, "signature, one day", signature_id=2000005, since=start + 3 * day, until=start + 4 * day)
+        timed(index, "source host, whole week", src_ip="10.0.0.40")
+        timed(index, "host on either side + signature", ip="10.0.0.7", signature_id=2000002)
+        timed(index, "severity 1 to port 3389, one day", severity=1, dest_port=3389, since=start + day,
+              until=start + 2 * day)
+        timed(index, "hosts hitting a signature, one day (group)", signature_id=2000010, since=start + 5 * day,
+              until=start + 6 * day, group_by="src_ip")
+    finally:
+        if not args.keep:
+            shutil.rmtree(args.index_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
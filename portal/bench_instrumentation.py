@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Instrumentation Benchmark
+Measures what the /metrics instrumentation costs on the hot paths
+
+Usage:
+    python3 bench_instrumentation.py [--requests 5000]
+"""
+
+import time
+import argparse
+import threading
+
+from flask import Flask, jsonify
+
+from instrumentation import Registry, instrument_flask
+
+
+def per_call_ns(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def bench_primitives(calls):
+    registry = Registry()
+    counter = registry.counter("bench_total", "bench", ("method", "endpoint", "status"))
+    histogram = registry.histogram("bench_seconds", "bench", ("method", "endpoint"))
+    print(f"counter.inc (3 labels)        {per_call_ns(lambda: counter.inc('GET', '/api/containers', '200'), calls):8.0f} ns")
+    print(f"histogram.observe (2 labels)  {per_call_ns(lambda: histogram.observe(0.0042, 'GET', '/api/containers'), calls):8.0f} ns")
+
+    def timed():
+        with histogram.time('GET', '/api/containers'):
+            pass
+    print(f"histogram.time() block        {per_call_ns(timed, calls):8.0f} ns")
+
+    # Contended: 8 threads observing into the same series
+    threads = [threading.Thread(target=lambda: [histogram.observe(0.001, 'GET', '/x') for _ in range(calls // 8)])
+               for _ in range(8)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"histogram.observe, 8 threads  {(time.perf_counter() - started) / (calls // 8 * 8) * 1e9:8.0f} ns")
+
+    for i in range(40):
+        for status in ("200", "404", "500"):
+            counter.inc("GET", f"/api/route{i}", status)
+        histogram.observe(0.01, "GET", f"/api/route{i}")
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"render ({text.count(chr(10))} lines)              {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+
+def make_app(instrumented):
+    app = Flask(__name__)
+
+    @app.route('/api/containers')
+    def containers():
+        return jsonify({"count": 12})
+
+    if instrumented:
+        instrument_flask(app, (Registry().counter("r", "r", ("method", "endpoint", "status")),
+                               Registry().histogram("s", "s", ("method", "endpoint"))))
+    return app
+
+
+def bench_requests(requests, rounds=5):
+    # Alternate the two apps and keep each one's best round to damp scheduler noise
+    results = {}
+    for instrumented in (False, True) * rounds:
+        client = make_app(instrumented).test_client()
+        for _ in range(200):
+            client.get('/api/containers')
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get('/api/containers')
+        elapsed = (time.perf_counter() - started) / requests * 1e6
+        results[instrumented] = min(results.get(instrumented, elapsed), elapsed)
+    overhead = results[True] - results[False]
+    print(f"request, plain Flask          {results[False]:8.1f} us")
+    print(f"request, instrumented         {results[True]:8.1f} us")
+    print(f"overhead per request          {overhead:8.1f} us ({overhead / results[False] * 100:.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the portal's metrics instrumentation")
+    parser.add_argument("--calls", type=int, default=200000, help="calls per primitive")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per Flask run")
+    args = parser.parse_args()
+    bench_primitives(args.calls)
+    bench_requests(args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,957 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Changelog Storage Engine
+Append-only, segmented JSON-lines storage for changelog entries
+"""
+
+import os
+import json
+import bisect
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from instrumentation import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WRITE_SECONDS = REGISTRY.histogram(
+    "portal_changelog_write_duration_seconds", "Time to write and flush one batch of changelog entries to disk")
+ENTRIES_WRITTEN = REGISTRY.counter(
+    "portal_changelog_entries_written_total", "Changelog entries written to disk")
+
+SEGMENT_PREFIX = 'segment-'
+INDEXED_FIELDS = ('level', 'action', 'user')
+SEGMENT_COUNTERS = {"level": "by_level", "action": "by_action", "user": "by_user"}
+SEGMENT_SUFFIX = '.jsonl'
+INDEX_FILE = 'index.json'
+
+# Entries that retention policies may never roll up or drop
+PROTECTED_LEVELS = ('error', 'warning')
+PROTECTED_ACTIONS = ('container_started', 'container_stopped', 'container_restarted',
+                     'container_status_changed', 'container_action', 'system_startup',
+                     'system_shutdown', 'system_error')
+
+
+def _new_segment_meta(seq, first_seq=0):
+    """Build empty metadata for a segment
+
+    `first_seq`/`span` reserve the segment's range of history positions.
+    Compaction shrinks `count` but never `span`, so positions (and cursors)
+    of later entries stay stable. `events` weighs rollups by the number of
+    entries they replaced, as do the level/action/user counters.
+    """
+    return {
+        "name": f"{SEGMENT_PREFIX}{seq:06d}{SEGMENT_SUFFIX}",
+        "seq": seq,
+        "created": datetime.now().isoformat(),
+        "first_seq": first_seq,
+        "span": 0,
+        "count": 0,
+        "events": 0,
+        "bytes": 0,
+        "first_id": None,
+        "last_id": None,
+        "first_ts": None,
+        "last_ts": None,
+        "by_level": {},
+        "by_action": {},
+        "by_user": {}
+    }
+
+
+def entry_weight(entry):
+    """Number of original entries an entry stands for (rollups stand for many)"""
+    rollup = entry.get("rollup")
+    return rollup.get("count", 1) if rollup else 1
+
+
+def _account_entry(meta, entry, size):
+    """Fold a single entry into segment metadata"""
+    weight = entry_weight(entry)
+    meta["count"] += 1
+    meta["span"] = max(meta.get("span", 0), meta["count"])
+    meta["events"] = meta.get("events", 0) + weight
+    meta["bytes"] += size
+    if meta["first_id"] is None:
+        meta["first_id"] = entry.get("id")
+        meta["first_ts"] = entry.get("timestamp")
+    meta["last_id"] = entry.get("id")
+    meta["last_ts"] = entry.get("timestamp")
+    level = entry.get("level", "info")
+    meta["by_level"][level] = meta["by_level"].get(level, 0) + weight
+    action = entry.get("action", "unknown")
+    meta["by_action"][action] = meta["by_action"].get(action, 0) + weight
+    user = entry.get("user", "system")
+    by_user = meta.setdefault("by_user", {})
+    by_user[user] = by_user.get(user, 0) + weight
+
+
+def entry_epoch(entry):
+    """Get an entry's timestamp as epoch seconds"""
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class TailView:
+    """Indexed snapshot of the newest entries
+
+    `base` is the sequence number (position in the full history) of
+    entries[0]. Secondary indexes map each level/action/user value to the
+    ascending sequence numbers carrying it, and `times` holds each entry's
+    epoch time, clamped to be non-decreasing so it can be bisected. All of
+    these are append-only while the view is current.
+    """
+
+    __slots__ = ('entries', 'base', 'times', 'indexes')
+
+    def __init__(self, entries, base, times=None):
+        self.entries = []
+        self.base = base
+        self.times = []
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        for position, entry in enumerate(entries):
+            self.add(entry, times[position] if times else None)
+
+    def add(self, entry, when=None):
+        """Append an entry and index it"""
+        seq = self.base + len(self.entries)
+        if when is None:
+            when = entry_epoch(entry)
+        if self.times and when < self.times[-1]:
+            when = self.times[-1]
+        # The time goes in before the entry, so a reader bounded by
+        # len(entries) can always bisect times up to that bound. Index
+        # positions go in after it, so every position a reader finds
+        # points at an entry that exists; one that misses the newest
+        # position answers as if it had read just before this append
+        self.times.append(when)
+        self.entries.append(entry)
+        for field, index in self.indexes.items():
+            positions = index.get(entry.get(field))
+            if positions is None:
+                index[entry.get(field)] = [seq]
+            else:
+                positions.append(seq)
+
+    def trimmed(self, keep):
+        """Build a new view holding only the newest `keep` entries"""
+        return TailView(self.entries[-keep:], self.base + len(self.entries) - keep,
+                        self.times[-keep:])
+
+
+class SegmentedChangelogStore:
+    """Stores changelog entries as JSON lines split into size/age-bounded segments"""
+
+    def __init__(self, directory, max_segment_bytes=4 * 1024 * 1024,
+                 max_segment_age=24 * 3600, tail_size=5000):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.tail_size = max(1, tail_size)
+        self.view = TailView([], 0)
+        self.sequence = 0
+        self.persisted = 0
+        self.segments = []
+        self.metadata = {}
+        self._active_file = None
+        self._io_lock = threading.RLock()
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Loading and index maintenance
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load the segment index and warm the in-memory tail"""
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as f:
+                    index = json.load(f)
+                self.segments = index.get("segments", [])
+                self.metadata = index.get("metadata", {})
+        except Exception as e:
+            logger.error(f"Error loading changelog index, rebuilding from segments: {e}")
+            self.segments = []
+
+        on_disk = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        known = {meta["name"] for meta in self.segments}
+        if any(name not in known for name in on_disk) or len(known) != len(on_disk):
+            # Index is missing or stale: rebuild metadata for every segment
+            self.segments = [self._scan_segment(name) for name in on_disk]
+        elif self.segments:
+            # The active segment is appended to without rewriting the index,
+            # so its metadata may lag behind the file after a crash
+            active = self._scan_segment(self.segments[-1]["name"])
+            active["first_seq"] = self.segments[-1].get("first_seq", 0)
+            self.segments[-1] = active
+
+        # Lay out history positions for segments that have none recorded yet
+        position = 0
+        for meta in self.segments:
+            if meta.get("first_seq", -1) < position:
+                meta["first_seq"] = position
+            meta["span"] = max(meta.get("span", 0), meta["count"])
+            position = meta["first_seq"] + meta["span"]
+
+        if not self.metadata:
+            self.metadata = {
+                "created": datetime.now().isoformat(),
+                "version": "2.0.0"
+            }
+
+        self._load_tail()
+        self.save_index()
+
+    def _segment_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _scan_segment(self, name):
+        """Rebuild metadata for a segment by reading it"""
+        seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        meta = _new_segment_meta(seq)
+        path = self._segment_path(name)
+        try:
+            meta["created"] = datetime.fromtimestamp(os.path.getctime(path)).isoformat()
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping corrupt line in changelog segment {name}")
+                        continue
+                    _account_entry(meta, entry, len(line))
+        except Exception as e:
+            logger.error(f"Error scanning changelog segment {name}: {e}")
+        return meta
+
+    def _load_tail(self):
+        """Fill the in-memory tail from the newest segments
+
+        Only the newest run of uncompacted segments is loaded, so that tail
+        positions map one-to-one onto history positions.
+        """
+        needed = self.tail_size
+        selected = []
+        for meta in reversed(self.segments):
+            if needed <= 0 or meta["count"] != meta["span"]:
+                break
+            selected.append(meta)
+            needed -= meta["count"]
+        entries = []
+        for meta in reversed(selected):
+            entries.extend(self.read_segment(meta))
+        entries = entries[-self.tail_size:]
+        last = self.segments[-1] if self.segments else None
+        self.sequence = self.persisted = last["first_seq"] + last["span"] if last else 0
+        self.view = TailView(entries, self.sequence - len(entries))
+
+    def save_index(self):
+        """Persist the segment index atomically"""
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = index_path + '.tmp'
+        with self._io_lock:
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump({"metadata": self.metadata, "segments": self.segments}, f)
+                os.replace(tmp_path, index_path)
+            except Exception as e:
+                logger.error(f"Error saving changelog index: {e}")
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _should_roll(self):
+        if not self.segments:
+            return True
+        active = self.segments[-1]
+        if active["bytes"] >= self.max_segment_bytes:
+            return True
+        try:
+            created = datetime.fromisoformat(active["created"])
+            return (datetime.now() - created).total_seconds() >= self.max_segment_age
+        except (TypeError, ValueError):
+            return False
+
+    def _roll_segment(self):
+        """Seal the active segment and open a new one"""
+        if self._active_file:
+            self._active_file.close()
+            self._active_file = None
+        last = self.segments[-1] if self.segments else None
+        if last:
+            meta = _new_segment_meta(last["seq"] + 1, last["first_seq"] + last["span"])
+        else:
+            meta = _new_segment_meta(1)
+        self.segments.append(meta)
+        self._active_file = open(self._segment_path(meta["name"]), 'ab')
+        self.save_index()
+
+    def _open_active(self):
+        if self._active_file is None:
+            self._active_file = open(self._segment_path(self.segments[-1]["name"]), 'ab')
+        return self._active_file
+
+    def append(self, entry):
+        """Append a single entry"""
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """Make a batch of entries visible in memory and write it to disk"""
+        for entry in entries:
+            self.stage(entry)
+        self.write_many(entries)
+
+    def stage(self, entry):
+        """Make an entry visible in the in-memory tail ahead of its disk write
+
+        Callers must serialize stage() calls; readers never lock. The current
+        view's list is only ever appended to, and once it holds twice the
+        tail size a trimmed copy is published as a new view, so any slice a
+        reader takes of a view it already holds stays consistent. Entries
+        still waiting for their disk write are never trimmed away.
+        """
+        view = self.view
+        view.add(entry)
+        self.sequence += 1
+        keep = max(self.tail_size, self.sequence - self.persisted)
+        if len(view.entries) >= 2 * keep:
+            self.view = view.trimmed(keep)
+
+    def write_many(self, entries):
+        """Write a batch of staged entries to disk with a single flush"""
+        if not entries:
+            return
+        started = time.perf_counter()
+        with self._io_lock:
+            for entry in entries:
+                if self._should_roll():
+                    self._roll_segment()
+                line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+                self._open_active().write(line)
+                _account_entry(self.segments[-1], entry, len(line))
+            self._active_file.flush()
+            self.persisted += len(entries)
+        WRITE_SECONDS.observe(time.perf_counter() - started)
+        ENTRIES_WRITTEN.inc(amount=len(entries))
+
+    def flush(self):
+        """Flush buffered writes and persist the index"""
+        with self._io_lock:
+            if self._active_file:
+                self._active_file.flush()
+            self.save_index()
+
+    def close(self):
+        """Flush and release the active segment"""
+        with self._io_lock:
+            self.flush()
+            if self._active_file:
+                self._active_file.close()
+                self._active_file = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @property
+    def total_entries(self):
+        return self.sequence
+
+    def tail_entries(self, limit=None):
+        """Get a consistent copy of the newest in-memory entries"""
+        entries = self.view.entries
+        if limit is None:
+            return entries[:]
+        return entries[-limit:] if limit > 0 else []
+
+    @property
+    def last_id(self):
+        for meta in reversed(self.segments):
+            if meta["last_id"] is not None:
+                return meta["last_id"]
+        return 0
+
+    def read_segment(self, meta):
+        """Read all entries of a segment"""
+        entries = []
+        try:
+            with open(self._segment_path(meta["name"]), 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def query(self, filters=None, since=None, until=None, limit=None, before=None):
+        """Find the newest entries matching all filters, newest-first
+
+        `filters` maps indexed fields (level/action/user) to required values,
+        `since`/`until` are epoch bounds and `before` is an exclusive sequence
+        number to resume from. Returns (seq, entry) pairs. The in-memory view
+        is walked through its most selective index, so the number of entries
+        touched is close to the number returned; older history is read from
+        segments whose index counters and time ranges can still match.
+        """
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        view = self.view
+        count = len(view.entries)
+        upper = view.base + count if before is None else min(before, view.base + count)
+        lower = view.base
+        if since is not None:
+            lower = max(lower, view.base + bisect.bisect_left(view.times, since, 0, count))
+
+        def matches(entry):
+            if any(entry.get(field) != value for field, value in filters.items()):
+                return False
+            if since is not None or until is not None:
+                when = entry_epoch(entry)
+                if (since is not None and when < since) or (until is not None and when > until):
+                    return False
+            return True
+
+        # Drive the scan from the shortest candidate list
+        candidates = None
+        for field, value in filters.items():
+            positions = view.indexes[field].get(value, [])
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+        if candidates is None:
+            candidates = range(view.base, view.base + count)
+
+        results = []
+        index = bisect.bisect_left(candidates, upper) - 1
+        while index >= 0 and (limit is None or len(results) < limit):
+            seq = candidates[index]
+            if seq < lower:
+                break
+            entry = view.entries[seq - view.base]
+            if matches(entry):
+                results.append((seq, entry))
+            index -= 1
+
+        # Only fall back to disk when the time bound did not already stop inside the view
+        if (limit is None or len(results) < limit) and view.base > 0 and lower == view.base:
+            results.extend(self._query_segments(filters, matches, since, until,
+                                                limit and limit - len(results),
+                                                min(upper, view.base)))
+        return results
+
+    def _query_segments(self, filters, matches, since, until, limit, upper):
+        """Scan persisted history below sequence `upper`, newest-first"""
+        segments = [(meta, meta["count"]) for meta in list(self.segments)]
+        results = []
+        for meta, count in reversed(segments):
+            seg_start = meta["first_seq"]
+            if seg_start >= upper or not count:
+                continue
+            if since is not None and meta["last_ts"] and \
+                    entry_epoch({"timestamp": meta["last_ts"]}) < since:
+                break
+            if until is not None and meta["first_ts"] and \
+                    entry_epoch({"timestamp": meta["first_ts"]}) > until:
+                continue
+            if any(field in SEGMENT_COUNTERS and SEGMENT_COUNTERS[field] in meta and
+                   not meta[SEGMENT_COUNTERS[field]].get(value)
+                   for field, value in filters.items()):
+                continue
+            entries = self.read_segment(meta)[:count]
+            for offset in range(min(len(entries), upper - seg_start) - 1, -1, -1):
+                if limit is not None and len(results) >= limit:
+                    return results
+                if matches(entries[offset]):
+                    results.append((seg_start + offset, entries[offset]))
+        return results
+
+    def update_segment_meta(self, name, **fields):
+        """Update bookkeeping fields of a segment's index entry"""
+        with self._io_lock:
+            for meta in self.segments:
+                if meta["name"] == name:
+                    meta.update(fields)
+                    self.save_index()
+                    return meta
+        return None
+
+    def rewrite_segment(self, name, entries, **extra_meta):
+        """Atomically replace a sealed segment's contents, keeping its position range"""
+        with self._io_lock:
+            position = next((i for i, meta in enumerate(self.segments) if meta["name"] == name), None)
+            if position is None or position == len(self.segments) - 1:
+                raise ValueError(f"{name} is not a sealed segment")
+            old = self.segments[position]
+            meta = _new_segment_meta(old["seq"], old["first_seq"])
+            meta["created"] = old["created"]
+            path = self._segment_path(name)
+            tmp_path = path + '.compact'
+            with open(tmp_path, 'wb') as f:
+                for entry in entries:
+                    line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+                    f.write(line)
+                    _account_entry(meta, entry, len(line))
+            meta["span"] = old["span"]
+            meta.update(extra_meta)
+            os.replace(tmp_path, path)
+            # Publish a new list so lock-free readers keep a consistent one
+            segments = list(self.segments)
+            segments[position] = meta
+            self.segments = segments
+            self.save_index()
+            return meta
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    def migrate_legacy(self, legacy_file):
+        """One-shot import of a legacy {"entries": [...], "metadata": {...}} changelog"""
+        with open(legacy_file, 'r') as f:
+            legacy = json.load(f)
+        entries = legacy.get("entries", [])
+        self.metadata.update({
+            "created": legacy.get("metadata", {}).get("created", self.metadata.get("created")),
+            "migrated_from": os.path.basename(legacy_file),
+            "migrated_at": datetime.now().isoformat()
+        })
+        self.append_many(entries)
+        self.flush()
+        os.replace(legacy_file, legacy_file + '.migrated')
+        logger.info(f"Migrated {len(entries)} changelog entries from {legacy_file} to {self.directory}")
+        return len(entries)
+
+
+class ChangelogStats:
+    """Changelog aggregates maintained as entries are appended
+
+    Level and action counters are replaced copy-on-write so readers can use
+    them without locking. Recent activity is a ring of fixed-width time
+    buckets; a bucket whose epoch has fallen out of the window is treated
+    as empty and reset when its slot is reused.
+    """
+
+    def __init__(self, window_seconds=24 * 3600, bucket_seconds=300):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = max(1, window_seconds // bucket_seconds)
+        self.reset()
+
+    def reset(self):
+        """Clear every counter"""
+        self.total = 0
+        self.by_level = {}
+        self.by_action = {}
+        self._bucket_epochs = [-1] * self.num_buckets
+        self._bucket_counts = [0] * self.num_buckets
+
+    def add(self, entry, when=None):
+        """Fold one entry into the aggregates; `when` is its epoch time"""
+        if when is None:
+            when = time.time()
+        level = entry.get("level", "info")
+        by_level = dict(self.by_level)
+        by_level[level] = by_level.get(level, 0) + 1
+        action = entry.get("action", "unknown")
+        by_action = dict(self.by_action)
+        by_action[action] = by_action.get(action, 0) + 1
+        self.by_level = by_level
+        self.by_action = by_action
+        self.total += 1
+        self._add_recent(when)
+
+    def _add_recent(self, when, count=1):
+        epoch = int(when // self.bucket_seconds)
+        if epoch <= int(time.time() // self.bucket_seconds) - self.num_buckets:
+            return
+        slot = epoch % self.num_buckets
+        if self._bucket_epochs[slot] != epoch:
+            self._bucket_epochs[slot] = epoch
+            self._bucket_counts[slot] = 0
+        self._bucket_counts[slot] += count
+
+    def recent_count(self, now=None):
+        """Count entries in the trailing window; cost depends only on the bucket count"""
+        current = int((now or time.time()) // self.bucket_seconds)
+        oldest = current - self.num_buckets
+        return sum(
+            count for epoch, count in zip(self._bucket_epochs, self._bucket_counts)
+            if oldest < epoch <= current
+        )
+
+    def rebuild(self, store):
+        """Recompute the aggregates for a freshly loaded store
+
+        Totals come from the per-segment index; only segments that end
+        inside the recent window are read to refill the time buckets.
+        """
+        self.reset()
+        by_level = {}
+        by_action = {}
+        cutoff = datetime.fromtimestamp(time.time() - self.window_seconds).isoformat()
+        for meta in list(store.segments):
+            # Rollups count as the entries they replaced, so compaction
+            # leaves the aggregates unchanged
+            self.total += meta.get("events", meta["count"])
+            for level, count in meta["by_level"].items():
+                by_level[level] = by_level.get(level, 0) + count
+            for action, count in meta["by_action"].items():
+                by_action[action] = by_action.get(action, 0) + count
+            if meta["count"] and meta["last_ts"] and meta["last_ts"] >= cutoff:
+                for entry in store.read_segment(meta):
+                    try:
+                        when = datetime.fromisoformat(entry["timestamp"]).timestamp()
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    self._add_recent(when, entry_weight(entry))
+        self.by_level = by_level
+        self.by_action = by_action
+
+    def snapshot(self):
+        """Get a point-in-time copy of the aggregates"""
+        return {
+            "total_entries": self.total,
+            "by_level": dict(self.by_level),
+            "by_action": dict(self.by_action),
+            "recent_activity": self.recent_count()
+        }
+
+
+class BatchedChangelogWriter:
+    """Group-commits changelog entries to a store from a single background thread"""
+
+    def __init__(self, store, max_queue=10000, flush_interval=0.25, batch_size=500):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_commit = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="changelog-writer", daemon=True)
+            self._thread.start()
+            logger.info("Changelog writer started")
+
+    def submit(self, entry):
+        """Queue an entry for writing; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait(entry)
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Changelog queue full, {self.dropped} entries dropped so far")
+            return False
+
+    def _run(self):
+        """Background loop collecting entries into batches"""
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    break
+                continue
+
+            # Keep collecting until the batch is full or the flush interval elapses
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """Write a batch to the store"""
+        try:
+            self.store.write_many(batch)
+            self.written += len(batch)
+            self.batches += 1
+            self.last_commit = datetime.now().isoformat()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error writing changelog batch of {len(batch)} entries: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self, timeout=5.0):
+        """Block until every queued entry has been written; returns True on success"""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Flush outstanding entries and stop the background thread"""
+        if self._thread is None:
+            # Never started: write whatever was queued on the caller's thread
+            batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+        flushed = self.flush(timeout)
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if not flushed:
+            logger.warning(f"Changelog writer stopped with {self.queue.qsize()} entries unwritten")
+        logger.info("Changelog writer stopped")
+        return flushed
+
+    def get_stats(self):
+        """Get writer queue and throughput counters"""
+        return {
+            "mode": "async",
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "errors": self.errors,
+            "last_commit": self.last_commit,
+            "running": bool(self._thread and self._thread.is_alive())
+        }
+
+
+def normalize_retention_policies(policies):
+    """Validate retention policies and fill in defaults"""
+    normalized = []
+    for policy in policies or []:
+        if not policy.get("action"):
+            raise ValueError(f"Retention policy without an action: {policy}")
+        if policy["action"] in PROTECTED_ACTIONS:
+            logger.warning(f"Ignoring retention policy for protected action '{policy['action']}'")
+            continue
+        normalized.append({
+            "action": policy["action"],
+            "level": policy.get("level"),
+            "raw_ttl": int(policy.get("raw_ttl", 3600)),
+            "rollup": int(policy["rollup"]) if policy.get("rollup") else None,
+            "rollup_ttl": int(policy["rollup_ttl"]) if policy.get("rollup_ttl") else None
+        })
+    return normalized
+
+
+class ChangelogCompactor:
+    """Applies retention policies to sealed changelog segments in the background
+
+    Raw entries matched by a policy are kept for `raw_ttl` seconds and then
+    folded into one rollup entry per `rollup`-second window (or dropped when
+    the policy has no rollup). Rollups are dropped once older than
+    `rollup_ttl`.
+    Entries with a protected level or action are always kept verbatim.
+    """
+
+    def __init__(self, store, policies, interval=600):
+        self.store = store
+        self.policies = normalize_retention_policies(policies)
+        self.interval = interval
+        self.runs = 0
+        self.segments_compacted = 0
+        self.entries_removed = 0
+        self.rollups_written = 0
+        self.last_run = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background compaction thread"""
+        if self.policies and (self._thread is None or not self._thread.is_alive()):
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="changelog-compactor", daemon=True)
+            self._thread.start()
+            logger.info(f"Changelog compactor started with {len(self.policies)} retention policies")
+
+    def stop(self):
+        """Stop the background compaction thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(5)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error compacting changelog: {e}")
+
+    def _policy_for(self, entry):
+        if entry.get("level") in PROTECTED_LEVELS or entry.get("action") in PROTECTED_ACTIONS:
+            return None
+        for policy in self.policies:
+            if policy["action"] == entry.get("action") and \
+                    (policy["level"] is None or policy["level"] == entry.get("level")):
+                return policy
+        return None
+
+    def _due_time(self, entry, policy, when):
+        """When an entry next becomes eligible for compaction, or None"""
+        if policy is None:
+            return None
+        if entry.get("rollup"):
+            return when + policy["rollup_ttl"] if policy["rollup_ttl"] else None
+        return when + policy["raw_ttl"]
+
+    def run_once(self, now=None):
+        """Compact every sealed segment that has entries due; returns the number compacted"""
+        now = now or time.time()
+        actions = {policy["action"] for policy in self.policies}
+        compacted = 0
+        segments = list(self.store.segments)
+        for meta in segments[:-1]:
+            # Never touch positions the in-memory tail still serves
+            if meta["first_seq"] + meta["span"] > self.store.view.base:
+                break
+            due = meta.get("compact_after", 0)
+            if due is None or due > now:
+                continue
+            if not any(meta["by_action"].get(action) for action in actions):
+                self.store.update_segment_meta(meta["name"], compact_after=None)
+                continue
+            if self._compact_segment(meta, now):
+                compacted += 1
+        self.runs += 1
+        self.segments_compacted += compacted
+        self.last_run = datetime.now().isoformat()
+        return compacted
+
+    def _compact_segment(self, meta, now):
+        entries = self.store.read_segment(meta)
+        output = []
+        groups = {}
+        changed = False
+
+        for entry in entries:
+            policy = self._policy_for(entry)
+            when = entry_epoch(entry)
+            due = self._due_time(entry, policy, when)
+            if due is not None and due <= now:
+                changed = True
+                if entry.get("rollup") or not policy["rollup"] or \
+                        (policy["rollup_ttl"] and when + policy["rollup_ttl"] <= now):
+                    # Expired rollup, or a raw entry that no live rollup would keep
+                    continue
+                window_start = int(when // policy["rollup"]) * policy["rollup"]
+                key = (entry.get("action"), entry.get("level"), entry.get("user"), window_start)
+                rollup = groups.get(key)
+                if rollup is None:
+                    rollup = groups[key] = self._new_rollup(entry, policy, window_start)
+                    output.append(rollup)
+                self._merge_into(rollup, entry)
+                continue
+
+            if entry.get("rollup") and policy and policy["rollup"]:
+                # Live rollups from an earlier pass absorb late entries of the same window
+                entry = dict(entry, rollup=dict(entry["rollup"]))
+                window_start = int(entry_epoch({"timestamp": entry["rollup"].get("window_start")}))
+                groups.setdefault((entry.get("action"), entry.get("level"), entry.get("user"), window_start), entry)
+            output.append(entry)
+
+        next_due = None
+        for entry in output:
+            due = self._due_time(entry, self._policy_for(entry), entry_epoch(entry))
+            if due is not None and (next_due is None or due < next_due):
+                next_due = due
+
+        if not changed:
+            self.store.update_segment_meta(meta["name"], compact_after=next_due)
+            return False
+
+        for rollup in groups.values():
+            info = rollup["rollup"]
+            rollup["details"] = f"{info['count']} {rollup['action']} entries rolled up ({info['interval']}s window)"
+        self.store.rewrite_segment(meta["name"], output, compact_after=next_due)
+        self.entries_removed += len(entries) - len(output)
+        self.rollups_written += len(groups)
+        logger.info(f"Compacted changelog segment {meta['name']}: {len(entries)} -> {len(output)} entries")
+        return True
+
+    @staticmethod
+    def _new_rollup(entry, policy, window_start):
+        return {
+            "timestamp": entry.get("timestamp"),
+            "action": entry.get("action"),
+            "details": "",
+            "user": entry.get("user"),
+            "level": entry.get("level"),
+            "id": entry.get("id"),
+            "rollup": {
+                "count": 0,
+                "interval": policy["rollup"],
+                "window_start": datetime.fromtimestamp(window_start).isoformat(),
+                "first_id": entry.get("id"),
+                "last_id": entry.get("id"),
+                "last_ts": entry.get("timestamp")
+            }
+        }
+
+    @staticmethod
+    def _merge_into(rollup, entry):
+        info = rollup["rollup"]
+        source = entry.get("rollup") or {}
+        info["count"] += entry_weight(entry)
+        info["last_id"] = source.get("last_id", entry.get("id"))
+        info["last_ts"] = source.get("last_ts", entry.get("timestamp"))
+
+    def get_stats(self):
+        """Get compaction counters"""
+        return {
+            "policies": len(self.policies),
+            "runs": self.runs,
+            "segments_compacted": self.segments_compacted,
+            "entries_removed": self.entries_removed,
+            "rollups_written": self.rollups_written,
+            "last_run": self.last_run,
+            "running": bool(self._thread and self._thread.is_alive())
+        }
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} <legacy changelog.json> <segment directory>")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    store = SegmentedChangelogStore(sys.argv[2])
+    store.migrate_legacy(sys.argv[1])
+    store.close()
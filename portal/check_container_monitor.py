@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Container Monitor Check
+Drives ContainerMonitor with FakeEventSource events over the Docker stand-in and checks state and changelog
+
+Usage:
+    python3 check_container_monitor.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+
+from container_events import FakeEventSource
+from docker_standin import DockerStandIn
+
+checks = []
+
+
+def check(name, condition, detail=""):
+    checks.append((name, bool(condition)))
+    print(f"{'✅' if condition else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+
+def wait_for(condition, timeout=3):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def event(action, name, **attributes):
+    return {"Type": "container", "Action": action, "time": int(time.time()),
+            "Actor": {"ID": name * 4, "Attributes": dict(attributes, name=name, image=f"{name}:latest")}}
+
+
+def main():
+    directory = tempfile.mkdtemp(prefix="monitor-check-")
+    standin = DockerStandIn(os.path.join(directory, "docker.sock")).start()
+    # The portal reads its configuration at import; every path it uses stays in the temp dir
+    os.environ["DOCKER_HOST"] = f"unix://{standin.socket_path}"
+    os.environ["CHANGELOG_FILE"] = os.path.join(directory, "changelog.json")
+    os.environ["CHANGELOG_DIR"] = os.path.join(directory, "changelog.d")
+    os.environ["LOG_FILE"] = ""
+    import app as portal
+    logging.getLogger().setLevel(logging.WARNING)
+
+    changelog = portal.ChangelogManager(os.path.join(directory, "changelog.json"),
+                                        os.path.join(directory, "changelog"), writer_mode="sync")
+    source = FakeEventSource()
+    monitor = portal.ContainerMonitor(changelog, portal.DockerClient(f"unix://{standin.socket_path}"),
+                                      mode="events", event_source=source, reconcile_interval=3600,
+                                      stats_interval=0)
+    notified = []
+    monitor.add_listener(lambda status: notified.append(status))
+
+    def entries(action):
+        return [entry["details"] for entry in changelog.query_entries(action=action)[0]]
+
+    def status(name):
+        return monitor.get_all_container_status().get(name, {}).get("status")
+
+    try:
+        monitor.start_monitoring()
+        check("the first reconcile lists every recorded container",
+              wait_for(lambda: monitor.last_reconcile is not None) and len(monitor.container_status) == 6)
+        check("each container found gets a container_started entry", len(entries("container_started")) == 6)
+        check("the event stream is connected", wait_for(lambda: monitor.stream_connected))
+
+        processed = monitor.events_processed
+        source.push(event("stop", "cyberchef"))
+        source.push(event("die", "cyberchef", exitCode="0"))
+        wait_for(lambda: monitor.events_processed == processed + 2)
+        check("stop/die marks a running container stopped", status("cyberchef") == "stopped",
+              monitor.container_status["cyberchef"]["status_text"])
+        check("the change is logged once as container_status_changed",
+              entries("container_status_changed") == ["Container 'cyberchef' status changed from 'running' to 'stopped'"])
+
+        source.push(event("start", "evebox"))
+        wait_for(lambda: status("evebox") == "running")
+        check("start marks an exited container running", status("evebox") == "running")
+
+        source.push(event("create", "arkime"))
+        source.push(event("start", "arkime"))
+        wait_for(lambda: status("arkime") == "running")
+        check("a container created after the first listing appears and starts",
+              status("arkime") == "running" and "Container 'arkime' started with status: created" in entries("container_started"))
+
+        source.push(event("destroy", "cyberchef"))
+        wait_for(lambda: "cyberchef" not in monitor.get_all_container_status())
+        check("destroy removes the container and logs container_stopped",
+              "cyberchef" not in monitor.get_all_container_status()
+              and entries("container_stopped") == ["Container 'cyberchef' stopped"])
+
+        source.push({"action": "start", "name": "", "time": None})
+        check("events without a container name are ignored", wait_for(source.drained)
+              and monitor.events_processed == processed + 6)
+        check("listeners are notified of every change", len(notified) >= 6, f"{len(notified)} notifications")
+
+        # A dropped stream resyncs from a full listing, which restores the recorded state
+        reconciled = monitor.last_reconcile
+        source.close()
+        check("a dropped event stream triggers a reconcile", wait_for(lambda: monitor.last_reconcile != reconciled, 5))
+        check("the reconcile restores the daemon's view",
+              status("cyberchef") == "running" and "arkime" not in monitor.container_status)
+    finally:
+        monitor.stop_monitoring()
+        changelog.close()
+        standin.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    failed = [name for name, ok in checks if not ok]
+    print(f"\n{len(checks) - len(failed)}/{len(checks)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
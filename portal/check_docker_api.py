@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Docker API Client Check
+Exercises docker_api.py against the recorded-response stand-in: keep-alive reuse, timeouts, errors, events
+
+Usage:
+    python3 check_docker_api.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+from docker_api import DockerClient, DockerAPIError
+from docker_standin import DockerStandIn
+from container_events import DockerApiEventSource
+
+checks = []
+
+
+def check(name, condition, detail=""):
+    checks.append((name, bool(condition)))
+    print(f"{'✅' if condition else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+
+def raises(func, *args, **kwargs):
+    """The DockerAPIError func raises, or None"""
+    try:
+        func(*args, **kwargs)
+    except DockerAPIError as e:
+        return e
+    return None
+
+
+def check_requests(standin, client):
+    containers = client.list_containers()
+    names = sorted(container["Names"][0].lstrip('/') for container in containers)
+    check("GET /containers/json decodes the recorded listing", len(containers) == 6, ", ".join(names))
+    check("GET /networks decodes the recorded listing", [n["Name"] for n in client.list_networks()][:1] == ["cyber-blue"])
+    check("ping", client.ping())
+
+    opened = standin.connections_opened
+    for _ in range(50):
+        client.list_containers()
+    check("sequential requests reuse one keep-alive connection", standin.connections_opened == opened,
+          f"{standin.connections_opened - opened} new connections for 50 requests")
+
+    # Parallel callers each take a pooled connection; the pool never grows past pool_size
+    threads = [threading.Thread(target=lambda: [client.list_networks() for _ in range(20)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    check("idle connections are capped at pool_size", client._pool.qsize() <= client._pool.maxsize,
+          f"{client._pool.qsize()} pooled, {standin.connections_opened} opened in total")
+
+    # The daemon closing idle keep-alives must not surface as an error
+    standin.drop_connections()
+    time.sleep(0.1)
+    check("a request after the daemon dropped idle connections retries on a fresh one",
+          raises(client.list_containers) is None)
+
+
+def check_actions(client):
+    check("POST start/stop/restart answering 204 succeed",
+          client.restart_container("wazuh-manager") and client.stop_container("cyberchef")
+          and client.start_container("evebox"))
+    check("304 (already started) counts as success", client.start_container("suricata"))
+    error = raises(client.start_container, "no-such-tool")
+    check("404 raises DockerAPIError with the daemon's message",
+          error is not None and error.status == 404 and "No such container" in str(error), error)
+    error = raises(client.restart_container, "suricata")
+    check("500 raises DockerAPIError with status 500", error is not None and error.status == 500)
+    error = raises(client.get_json, "/v1.99/unknown")
+    check("unrecorded path raises 404", error is not None and error.status == 404)
+    check("the connection is reused after error responses", raises(client.list_containers) is None)
+
+
+def check_timeout(standin, client):
+    standin.delays["GET /networks"] = 1.0
+    started = time.perf_counter()
+    error = raises(client.list_networks)
+    elapsed = time.perf_counter() - started
+    check("a slow daemon raises DockerAPIError after the client timeout",
+          error is not None and elapsed < 0.9, f"{elapsed * 1000:.0f} ms, {error}")
+    del standin.delays["GET /networks"]
+    time.sleep(1.0)  # let the delayed answer go out to the abandoned connection
+    check("the timed-out connection is not reused", raises(client.list_networks) is None)
+
+
+def check_events(standin, client):
+    source = DockerApiEventSource(client)
+    received = []
+    done = threading.Event()
+
+    def follow():
+        try:
+            for event in source.events():
+                received.append(event)
+        except DockerAPIError as e:
+            received.append(e)
+        done.set()
+
+    thread = threading.Thread(target=follow, daemon=True)
+    thread.start()
+    deadline = time.time() + 2
+    while len(received) < 4 and time.time() < deadline:
+        time.sleep(0.02)
+    check("GET /events streams the recorded events, normalized",
+          [(e["action"], e["name"]) for e in received[:4] if isinstance(e, dict)] ==
+          [("die", "evebox"), ("start", "evebox"), ("stop", "cyberchef"), ("die", "cyberchef")])
+    check("die events carry the exit code", received and received[0].get("exit_code") == "1")
+    standin.push_event({"Type": "container", "Action": "start", "time": int(time.time()),
+                        "Actor": {"ID": "17e5a3fc" * 8, "Attributes": {"name": "cyberchef"}}})
+    deadline = time.time() + 2
+    while len(received) < 5 and time.time() < deadline:
+        time.sleep(0.02)
+    check("events pushed while connected arrive", len(received) == 5 and received[-1]["name"] == "cyberchef")
+    source.close()
+    check("close() from another thread ends the stream", done.wait(2))
+
+
+def main():
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="docker-standin-"), "docker.sock")
+    standin = DockerStandIn(socket_path).start()
+    client = DockerClient(f"unix://{socket_path}", timeout=0.5, pool_size=4)
+    try:
+        check_requests(standin, client)
+        check_actions(client)
+        check_timeout(standin, client)
+        check_events(standin, client)
+    finally:
+        client.close()
+        standin.stop()
+        os.rmdir(os.path.dirname(socket_path))
+
+    failed = [name for name, ok in checks if not ok]
+    print(f"\n{len(checks) - len(failed)}/{len(checks)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
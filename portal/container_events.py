@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Container Event Sources
+Streams Docker container lifecycle events for the container monitor
+"""
+
+import queue
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lifecycle actions the monitor cares about
+LIFECYCLE_ACTIONS = ('create', 'start', 'restart', 'die', 'stop', 'destroy', 'pause', 'unpause')
+
+
+def normalize_event(raw):
+    """Reduce a Docker event message to {action, name, id, image, time}"""
+    actor = raw.get("Actor") or {}
+    attributes = actor.get("Attributes") or {}
+    return {
+        "action": raw.get("Action") or raw.get("status", ""),
+        "name": attributes.get("name", ""),
+        "id": actor.get("ID") or raw.get("id", ""),
+        "image": attributes.get("image") or raw.get("from", ""),
+        "exit_code": attributes.get("exitCode"),
+        "time": raw.get("time")
+    }
+
+
+class DockerApiEventSource:
+    """Follows GET /events on the Docker Engine API for container lifecycle events"""
+
+    def __init__(self, client):
+        self.client = client
+        self.stream = None
+
+    def events(self):
+        """Connect, then return an iterator of normalized events that ends when
+        the stream drops or close() is called"""
+        self.stream = self.client.events(filters={
+            "type": ["container"],
+            "event": list(LIFECYCLE_ACTIONS)
+        })
+        return (normalize_event(raw) for raw in self.stream)
+
+    def close(self):
+        """Stop following the event stream"""
+        stream, self.stream = self.stream, None
+        if stream:
+            stream.close()
+
+
+class FakeEventSource:
+    """In-memory event source for exercising the monitor without a Docker daemon"""
+
+    _CLOSED = object()
+
+    def __init__(self, events=None):
+        self._queue = queue.Queue()
+        for event in events or []:
+            self.push(event)
+
+    def push(self, event):
+        """Queue a raw Docker event message or an already normalized event"""
+        self._queue.put(event)
+
+    def drained(self):
+        """True once the consumer has taken every pushed event"""
+        return self._queue.empty()
+
+    def events(self):
+        """Yield queued events until close() is called"""
+        while True:
+            event = self._queue.get()
+            if event is self._CLOSED:
+                return
+            yield normalize_event(event) if "Actor" in event else event
+
+    def close(self):
+        """End the current events() iteration"""
+        self._queue.put(self._CLOSED)
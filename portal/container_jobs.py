@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Container Jobs
+Container start/stop/restart as background jobs, for one container or a whole category
+"""
+
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_ACTIONS = ("start", "stop", "restart")
+FINISHED_STATES = frozenset(("succeeded", "failed", "cancelled"))
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting to run"""
+
+
+def dependency_stages(graph, action="start"):
+    """Group {container: [dependencies]} into stages whose members can run in parallel.
+
+    Dependencies come before their dependents, except for stop where the order
+    is reversed. Dependencies outside the graph are ignored.
+    """
+    remaining = {name: {d for d in deps if d in graph and d != name} for name, deps in graph.items()}
+    stages = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between {', '.join(sorted(remaining))}")
+        stages.append(ready)
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    if action == "stop":
+        stages.reverse()
+    return stages
+
+
+class JobManager:
+    """Runs container actions on a bounded thread pool and keeps their progress.
+
+    `runner(action, container)` performs one action and returns the usual
+    {"success", "message"} result. A bulk job runs its stages in order, at most
+    `parallelism` containers at a time within a stage; when a container fails
+    to start or restart, the stages that depend on it are skipped.
+    """
+
+    def __init__(self, runner, workers=4, max_pending=32, history=200, parallelism=2):
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+        self.parallelism = parallelism
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._queued = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.pending = 0
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def start(self):
+        """Create the worker pool; jobs cannot be submitted before this"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="container-job")
+
+    def add_listener(self, callback):
+        """Call `callback(job_id)` whenever a job changes state"""
+        self._listeners.append(callback)
+
+    def _notify(self, job_id):
+        for listener in self._listeners:
+            try:
+                listener(job_id)
+            except Exception as e:
+                logger.error(f"Error in job listener: {e}")
+
+    def submit(self, action, container):
+        """Queue one container action; returns the job"""
+        return self._submit("container", action, container, [[container]], 1)
+
+    def submit_bulk(self, action, category, graph, parallelism=None):
+        """Queue an action over every container of a category in dependency order"""
+        stages = dependency_stages(graph, action)
+        return self._submit("bulk", action, category, stages, parallelism or self.parallelism)
+
+    def _submit(self, kind, action, target, stages, parallelism):
+        if action not in JOB_ACTIONS:
+            raise ValueError(f"Unknown action '{action}'")
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "action": action,
+            "target": target,
+            "status": "queued",
+            "parallelism": parallelism,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "message": None,
+            "steps": [
+                {"container": name, "stage": index, "status": "pending", "message": None}
+                for index, stage in enumerate(stages) for name in stage
+            ]
+        }
+        with self._lock:
+            if self._executor is None:
+                raise RuntimeError("Container job manager is not running")
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull(f"{self.pending} container jobs already waiting")
+            self._jobs[job["id"]] = job
+            self.pending += 1
+            self.submitted += 1
+            self._trim()
+            snapshot = self._copy(job)
+            # Futures of jobs not yet picked up by a worker, for shutdown to cancel
+            self._queued[job["id"]] = self._executor.submit(self._run, job, stages, parallelism)
+        self._notify(job["id"])
+        return snapshot
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond `history`"""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [j for j, job in self._jobs.items() if job["status"] in FINISHED_STATES][:excess]:
+            del self._jobs[job_id]
+
+    def _update(self, job, step=None, **fields):
+        with self._lock:
+            (step if step is not None else job).update(fields)
+        self._notify(job["id"])
+
+    def _run(self, job, stages, parallelism):
+        with self._lock:
+            self._queued.pop(job["id"], None)
+        self._update(job, status="running", started=time.time())
+        steps = {step["container"]: step for step in job["steps"]}
+        pool = None
+        if parallelism > 1 and any(len(stage) > 1 for stage in stages):
+            pool = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="container-job-step")
+        blocked = None
+        try:
+            for stage in stages:
+                if blocked:
+                    for name in stage:
+                        self._update(job, steps[name], status="skipped", message=f"Not attempted: {blocked} failed")
+                    continue
+                if pool and len(stage) > 1:
+                    results = list(pool.map(lambda name: self._step(job, steps[name]), stage))
+                else:
+                    results = [self._step(job, steps[name]) for name in stage]
+                failed = [name for name, ok in zip(stage, results) if not ok]
+                # Stopping carries on regardless; starting a dependent of a failed container would not work
+                if failed and job["action"] != "stop":
+                    blocked = ", ".join(failed)
+        except Exception as e:
+            logger.error(f"Error running container job {job['id']}: {e}")
+            blocked = str(e)
+        finally:
+            if pool:
+                pool.shutdown(wait=True)
+
+        failures = [step["container"] for step in job["steps"] if step["status"] != "succeeded"]
+        if failures:
+            message = f"{job['action'].capitalize()} failed for {', '.join(failures)}"
+        else:
+            message = f"{job['action'].capitalize()} of {job['target']} completed"
+        with self._lock:
+            self.pending -= 1
+            if failures:
+                self.failed += 1
+            else:
+                self.succeeded += 1
+        self._update(job, status="failed" if failures else "succeeded", finished=time.time(), message=message)
+
+    def _step(self, job, step):
+        self._update(job, step, status="running", started=time.time())
+        try:
+            result = self.runner(job["action"], step["container"])
+        except Exception as e:
+            result = {"success": False, "message": str(e)}
+        ok = bool(result.get("success"))
+        self._update(job, step, status="succeeded" if ok else "failed",
+                     message=result.get("message"), finished=time.time())
+        return ok
+
+    @staticmethod
+    def _copy(job):
+        return dict(job, steps=[dict(step) for step in job["steps"]])
+
+    def get(self, job_id):
+        """A copy of one job, or None if unknown or forgotten"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copy(job) if job else None
+
+    def list(self, limit=20):
+        """Newest jobs first"""
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:] if limit else []
+            return [self._copy(job) for job in reversed(jobs)]
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "tracked": len(self._jobs)
+            }
+
+    def shutdown(self):
+        """Stop taking jobs; queued jobs are cancelled, running actions finish in the background"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        cancelled = []
+        with self._lock:
+            for job_id, future in list(self._queued.items()):
+                if not future.cancelled():
+                    continue  # a worker took it before the cancel
+                del self._queued[job_id]
+                job = self._jobs.get(job_id)
+                self.pending -= 1
+                self.cancelled += 1
+                if job is not None:
+                    job.update(status="cancelled", finished=time.time(), message="Cancelled: the portal shut down")
+                    for step in job["steps"]:
+                        step["status"] = "skipped"
+                    cancelled.append(job_id)
+        for job_id in cancelled:
+            self._notify(job_id)
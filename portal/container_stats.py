@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Container Stats
+Per-container CPU, memory, network and block I/O from the Docker stats API
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from timeseries_store import TimeSeriesStore
+
+logger = logging.getLogger(__name__)
+
+# 1 hour of 30s buckets and 24 hours of 5m buckets, in memory only
+STATS_TIERS = ((30, 120), (300, 288))
+
+STATS_METRICS = ("cpu_percent", "memory_usage", "memory_percent",
+                 "net_rx_rate", "net_tx_rate", "block_read_rate", "block_write_rate")
+
+# Top-N orderings -> field of the latest sample
+TOP_ORDERINGS = {
+    "cpu": "cpu_percent",
+    "memory": "memory_usage",
+    "net": "net_rate",
+    "block": "block_rate"
+}
+
+MB = 1024 ** 2
+
+
+def _block_io(blkio_stats):
+    """(read bytes, write bytes) from blkio_stats; cgroup v1 and v2 spell ops differently"""
+    read = write = 0
+    for entry in (blkio_stats or {}).get("io_service_bytes_recursive") or []:
+        op = (entry.get("op") or "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return read, write
+
+
+def _memory_usage(memory_stats):
+    """Working-set memory the way `docker stats` reports it (page cache excluded)"""
+    usage = memory_stats.get("usage", 0)
+    stats = memory_stats.get("stats") or {}
+    # cgroup v1 reports total_inactive_file/cache, cgroup v2 inactive_file
+    for key in ("total_inactive_file", "inactive_file"):
+        if key in stats and stats[key] < usage:
+            return usage - stats[key]
+    return max(usage - stats.get("cache", 0), 0)
+
+
+class ContainerStatsCollector:
+    """Collects one stats sample per running container per pass.
+
+    Each pass issues one-shot GET /containers/<id>/stats requests over the
+    client's keep-alive pool from a small thread pool. Rates and CPU% come from
+    the delta against the previous pass. Samples go into a bounded in-memory
+    TimeSeriesStore.
+    """
+
+    def __init__(self, docker_client, workers=4, tiers=STATS_TIERS):
+        self.docker = docker_client
+        self.workers = workers
+        self.store = TimeSeriesStore(tiers=tiers)
+        self._executor = None
+        self._previous = {}
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.passes = 0
+        self.errors = 0
+        self.last_pass = None
+        self.last_pass_ms = None
+
+    def collect(self, container_names):
+        """Run one pass over `container_names` (the running containers)"""
+        started = time.perf_counter()
+        names = sorted(container_names)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="container-stats")
+        results = list(self._executor.map(self._fetch, names))
+
+        now = time.time()
+        latest = {}
+        previous = {}
+        errors = 0
+        for name, raw in zip(names, results):
+            if raw is None:
+                errors += 1
+                continue
+            sample = self._to_sample(name, raw, now)
+            latest[name] = sample
+            previous[name] = (now, raw)
+            self.store.record({f"{name}:{metric}": sample[metric] for metric in STATS_METRICS}, now)
+
+        with self._lock:
+            self._previous = previous
+            self._latest = latest
+            self.errors += errors
+            self.passes += 1
+            self.last_pass = now
+            self.last_pass_ms = round((time.perf_counter() - started) * 1000, 1)
+        return latest
+
+    def _fetch(self, name):
+        try:
+            return self.docker.container_stats(name)
+        except Exception as e:
+            logger.debug(f"Error getting stats for container {name}: {e}")
+            return None
+
+    def _to_sample(self, name, raw, now):
+        cpu_stats = raw.get("cpu_stats") or {}
+        memory_stats = raw.get("memory_stats") or {}
+        cpu_total = (cpu_stats.get("cpu_usage") or {}).get("total_usage", 0)
+        system_total = cpu_stats.get("system_cpu_usage", 0)
+        online_cpus = cpu_stats.get("online_cpus") or len((cpu_stats.get("cpu_usage") or {}).get("percpu_usage") or []) or 1
+
+        net_rx = net_tx = 0
+        for interface in (raw.get("networks") or {}).values():
+            net_rx += interface.get("rx_bytes", 0)
+            net_tx += interface.get("tx_bytes", 0)
+        block_read, block_write = _block_io(raw.get("blkio_stats"))
+
+        # Deltas against our previous pass; a one-shot response has no precpu_stats
+        cpu_percent = 0.0
+        rates = {"net_rx_rate": 0.0, "net_tx_rate": 0.0, "block_read_rate": 0.0, "block_write_rate": 0.0}
+        previous = self._previous.get(name)
+        if previous:
+            previous_time, previous_raw = previous
+            previous_cpu = previous_raw.get("cpu_stats") or {}
+            cpu_delta = cpu_total - (previous_cpu.get("cpu_usage") or {}).get("total_usage", 0)
+            system_delta = system_total - previous_cpu.get("system_cpu_usage", 0)
+            if cpu_delta > 0 and system_delta > 0:
+                cpu_percent = cpu_delta / system_delta * online_cpus * 100
+            elapsed = now - previous_time
+            if elapsed > 0:
+                previous_rx = sum(i.get("rx_bytes", 0) for i in (previous_raw.get("networks") or {}).values())
+                previous_tx = sum(i.get("tx_bytes", 0) for i in (previous_raw.get("networks") or {}).values())
+                previous_read, previous_write = _block_io(previous_raw.get("blkio_stats"))
+                rates = {
+                    "net_rx_rate": max(net_rx - previous_rx, 0) / elapsed,
+                    "net_tx_rate": max(net_tx - previous_tx, 0) / elapsed,
+                    "block_read_rate": max(block_read - previous_read, 0) / elapsed,
+                    "block_write_rate": max(block_write - previous_write, 0) / elapsed
+                }
+        else:
+            precpu = raw.get("precpu_stats") or {}
+            cpu_delta = cpu_total - (precpu.get("cpu_usage") or {}).get("total_usage", 0)
+            system_delta = system_total - precpu.get("system_cpu_usage", 0)
+            if precpu.get("system_cpu_usage") and cpu_delta > 0 and system_delta > 0:
+                cpu_percent = cpu_delta / system_delta * online_cpus * 100
+
+        memory_usage = _memory_usage(memory_stats)
+        memory_limit = memory_stats.get("limit", 0)
+        return {
+            "name": name,
+            "timestamp": now,
+            "cpu_percent": round(cpu_percent, 2),
+            "memory_usage": memory_usage,
+            "memory_usage_mb": round(memory_usage / MB, 1),
+            "memory_limit": memory_limit,
+            "memory_percent": round(memory_usage / memory_limit * 100, 2) if memory_limit else 0.0,
+            "net_rx_bytes": net_rx,
+            "net_tx_bytes": net_tx,
+            "net_rx_rate": round(rates["net_rx_rate"], 1),
+            "net_tx_rate": round(rates["net_tx_rate"], 1),
+            "net_rate": round(rates["net_rx_rate"] + rates["net_tx_rate"], 1),
+            "block_read_bytes": block_read,
+            "block_write_bytes": block_write,
+            "block_read_rate": round(rates["block_read_rate"], 1),
+            "block_write_rate": round(rates["block_write_rate"], 1),
+            "block_rate": round(rates["block_read_rate"] + rates["block_write_rate"], 1),
+            "pids": (raw.get("pids_stats") or {}).get("current", 0)
+        }
+
+    def latest(self, name=None):
+        """Latest sample for one container, or {name: sample} for all"""
+        latest = self._latest
+        return latest.get(name) if name is not None else latest
+
+    def history(self, name, window):
+        """min/avg/max buckets of every metric for one container"""
+        resolution, starts, series = self.store.query([f"{name}:{metric}" for metric in STATS_METRICS], window)
+        return resolution, starts, {metric: series[f"{name}:{metric}"] for metric in STATS_METRICS}
+
+    def top(self, by="cpu", limit=5):
+        """Heaviest containers by the latest sample"""
+        field = TOP_ORDERINGS[by]
+        return sorted(self._latest.values(), key=lambda sample: sample[field], reverse=True)[:limit]
+
+    def forget(self, keep_names):
+        """Drop history of containers that no longer exist"""
+        self.store.remove([name for name in self.store.series_names()
+                           if name.rsplit(':', 1)[0] not in keep_names])
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "containers": len(self._latest),
+                "passes": self.passes,
+                "errors": self.errors,
+                "last_pass": self.last_pass,
+                "last_pass_ms": self.last_pass_ms,
+                "workers": self.workers,
+                "store": self.store.get_stats()
+            }
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Dashboard Stream
+One shared producer pushing dashboard section deltas to Server-Sent Events clients
+"""
+
+import json
+import time
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keys that change on every build without the section changing
+VOLATILE_KEYS = frozenset(("timestamp", "uptime", "sample_age"))
+
+# How long an EventSource waits before reconnecting
+RECONNECT_MS = 5000
+
+
+class StreamFull(Exception):
+    """Raised when the maximum number of dashboard streams is already open"""
+
+
+def _strip_volatile(payload):
+    if isinstance(payload, dict):
+        return {k: _strip_volatile(v) for k, v in payload.items() if k not in VOLATILE_KEYS}
+    if isinstance(payload, list):
+        return [_strip_volatile(v) for v in payload]
+    return payload
+
+
+def fingerprint(payload):
+    """Stable serialization of a payload ignoring VOLATILE_KEYS, for change detection"""
+    return json.dumps(_strip_volatile(payload), sort_keys=True, default=str)
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in json.dumps(data, default=str).splitlines())
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscriber:
+    """A connected client: a bounded queue of encoded messages"""
+
+    def __init__(self, max_pending):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.dropped = False
+
+    def close(self):
+        """Wake the client's generator so it ends instead of waiting for a heartbeat"""
+        self.dropped = True
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class DashboardStream:
+    """Rebuilds each section on its own interval (or when woken) and pushes only the
+    sections whose content changed. Every client shares the same builds, so the
+    cost no longer grows with the number of open dashboards.
+
+    `sections` maps a name to (builder, min_interval); a builder returns the
+    section payload or None when it has nothing to report.
+    """
+
+    def __init__(self, sections, tick=1.0, heartbeat=15.0, max_pending=32, max_clients=None):
+        self.sections = sections
+        self.tick = tick
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        self.max_clients = max_clients
+        self._state = {}
+        self._fingerprints = {}
+        self._built_at = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._dirty = False
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.seq = 0
+        self.deltas_sent = 0
+        self.builds = 0
+        self.build_errors = 0
+        self.slow_clients_dropped = 0
+        self.clients_rejected = 0
+
+    def subscribe(self):
+        """Register a client; it is sent the current state before any delta.
+
+        Raises StreamFull past `max_clients`: every open stream holds a server
+        thread for as long as it stays connected.
+        """
+        subscriber = Subscriber(self.max_pending)
+        with self._lock:
+            if self.max_clients is not None and len(self._subscribers) >= self.max_clients:
+                self.clients_rejected += 1
+                raise StreamFull(f"{len(self._subscribers)} dashboard streams already open")
+            self._subscribers.add(subscriber)
+            first = self._thread is None
+            if first:
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True, name="dashboard-stream")
+        if first:
+            self._thread.start()
+        self._wake.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def snapshot_message(self):
+        """Full state as a `snapshot` message (built now if nothing has been built yet)"""
+        if not self._state:
+            self._refresh(force=True)
+        with self._lock:
+            return format_sse("snapshot", {"seq": self.seq, "sections": dict(self._state)}, self.seq)
+
+    def wake(self, *args):
+        """Rebuild the sections now (e.g. a container changed state)"""
+        self._dirty = True
+        self._wake.set()
+
+    def stop(self):
+        """Stop the producer and end every open stream"""
+        self._stop_event.set()
+        self._wake.set()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(5)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                idle = not self._subscribers
+            if idle:
+                # Nobody is listening: build nothing until the next subscribe()
+                self._wake.wait(self.heartbeat)
+                self._wake.clear()
+                continue
+            self._refresh()
+            self._wake.wait(self.tick)
+            self._wake.clear()
+
+    def _refresh(self, force=False):
+        """Rebuild due sections and publish those whose content changed"""
+        with self._refresh_lock:
+            force = force or self._dirty
+            self._dirty = False
+            self._refresh_sections(force)
+
+    def _refresh_sections(self, force):
+        now = time.monotonic()
+        changed = {}
+        for name, (builder, interval) in self.sections.items():
+            if not force and now - self._built_at.get(name, float('-inf')) < interval:
+                continue
+            self._built_at[name] = now
+            try:
+                payload = builder()
+            except Exception as e:
+                self.build_errors += 1
+                logger.error(f"Error building dashboard section {name}: {e}")
+                continue
+            self.builds += 1
+            if payload is None:
+                continue
+            digest = fingerprint(payload)
+            if digest != self._fingerprints.get(name):
+                self._fingerprints[name] = digest
+                changed[name] = payload
+        if changed:
+            self._publish(changed)
+
+    def _publish(self, changed):
+        with self._lock:
+            self._state.update(changed)
+            self.seq += 1
+            message = format_sse("delta", {"seq": self.seq, "sections": changed}, self.seq)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                # A client this far behind reconnects and starts from a snapshot
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+                self.slow_clients_dropped += 1
+        self.deltas_sent += 1
+
+    def messages(self, subscriber):
+        """Encoded messages for one client: snapshot, then deltas and heartbeats"""
+        yield f"retry: {RECONNECT_MS}\n\n"
+        yield self.snapshot_message()
+        while not subscriber.dropped and not self._stop_event.is_set():
+            try:
+                message = subscriber.queue.get(timeout=self.heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "max_clients": self.max_clients,
+                "clients_rejected": self.clients_rejected,
+                "seq": self.seq,
+                "deltas_sent": self.deltas_sent,
+                "builds": self.builds,
+                "build_errors": self.build_errors,
+                "slow_clients_dropped": self.slow_clients_dropped
+            }
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Docker Engine API Client
+Small HTTP client for the Docker Engine API over the unix socket (or TCP)
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import socket
+import logging
+import http.client
+from urllib.parse import urlencode, urlparse, quote
+
+from instrumentation import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOCKER_HOST = 'unix:///var/run/docker.sock'
+
+DOCKER_REQUESTS = REGISTRY.counter(
+    "portal_docker_requests_total", "Docker Engine API calls by operation and status", ("method", "operation", "status"))
+DOCKER_REQUEST_SECONDS = REGISTRY.histogram(
+    "portal_docker_request_duration_seconds", "Docker Engine API call latency", ("method", "operation"))
+
+# /containers/<name or id>/... -> /containers/{id}/... so each container is not its own series
+_CONTAINER_PATH = re.compile(r'^/containers/(?!json$)[^/]+')
+
+
+def _operation(path):
+    return _CONTAINER_PATH.sub('/containers/{id}', path)
+
+
+class DockerAPIError(Exception):
+    """Error response or transport failure talking to the Docker daemon"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a unix domain socket"""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def format_ports(ports):
+    """Render API port bindings the way `docker ps` prints them"""
+    rendered = []
+    for port in sorted(ports or [], key=lambda p: (p.get("PrivatePort", 0), p.get("IP", ""))):
+        target = f"{port.get('PrivatePort')}/{port.get('Type', 'tcp')}"
+        if port.get("PublicPort"):
+            ip = port.get("IP", "")
+            host = f"[{ip}]:" if ':' in ip and ip != '::' else f"{ip}:"
+            rendered.append(f"{host}{port['PublicPort']}->{target}")
+        else:
+            rendered.append(target)
+    # docker ps lists each unique binding once
+    return ", ".join(dict.fromkeys(rendered))
+
+
+def private_port(ports, public_port):
+    """Container port behind a published TCP port in a format_ports string, or None"""
+    match = re.search(rf":{public_port}->(\d+)/tcp", ports or "")
+    return int(match.group(1)) if match else None
+
+
+class DockerEventStream:
+    """Iterator over a streaming GET /events response on its own connection"""
+
+    def __init__(self, conn, response):
+        self.conn = conn
+        self.response = response
+        self.closed = False
+        self._reading = False
+
+    def __iter__(self):
+        self._reading = True
+        try:
+            while not self.closed:
+                line = self.response.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Ignoring malformed docker event: {line[:200]!r}")
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            if not self.closed:
+                raise DockerAPIError(f"Docker event stream failed: {e}")
+        finally:
+            self._reading = False
+            self.conn.close()
+
+    def close(self):
+        """Stop following the stream; unblocks a reader in another thread"""
+        self.closed = True
+        sock = self.conn.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        # A blocked reader releases the connection itself once readline returns
+        if not self._reading:
+            self.conn.close()
+
+
+class DockerClient:
+    """Docker Engine API client with a pool of keep-alive connections"""
+
+    def __init__(self, base_url=None, timeout=10, pool_size=4):
+        self.base_url = base_url or os.environ.get('DOCKER_HOST') or DEFAULT_DOCKER_HOST
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        parsed = urlparse(self.base_url)
+        self._scheme = parsed.scheme
+        if parsed.scheme == 'unix':
+            self._socket_path = parsed.path
+        elif parsed.scheme in ('tcp', 'http'):
+            self._host, self._port = parsed.hostname, parsed.port or 2375
+        else:
+            raise ValueError(f"Unsupported DOCKER_HOST: {self.base_url}")
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+
+    def _new_connection(self, timeout=None):
+        if self._scheme == 'unix':
+            return UnixHTTPConnection(self._socket_path, timeout=timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=timeout)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection(self.timeout)
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method, path, params=None, body=None, timeout=None):
+        """Send a request and return (status, body bytes); raises DockerAPIError on failure"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            status, data = self._send(method, path, params, body, timeout)
+            outcome = str(status)
+            return status, data
+        except DockerAPIError as e:
+            if e.status:
+                outcome = str(e.status)
+            raise
+        finally:
+            operation = _operation(path)
+            DOCKER_REQUEST_SECONDS.observe(time.perf_counter() - started, method, operation)
+            DOCKER_REQUESTS.inc(method, operation, outcome)
+
+    def _send(self, method, path, params, body, timeout):
+        url = path + ('?' + urlencode(params) if params else '')
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers["Content-Type"] = "application/json"
+
+        for attempt in range(2):
+            # The retry skips the pool: its other idle connections are likely stale too
+            conn = self._acquire() if attempt == 0 else self._new_connection(self.timeout)
+            reused = conn.sock is not None
+            conn.timeout = timeout or self.timeout
+            if conn.sock:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if reused and attempt == 0:
+                    # The daemon closed an idle keep-alive connection; retry on a fresh one
+                    continue
+                raise DockerAPIError(f"{method} {path} failed: {e}")
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise DockerAPIError(f"{method} {path} failed: {e}")
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if response.status >= 400:
+                raise DockerAPIError(self._error_message(data, response.reason), response.status)
+            return response.status, data
+
+    @staticmethod
+    def _error_message(data, default):
+        try:
+            return json.loads(data).get("message", default)
+        except (ValueError, AttributeError):
+            return data.decode('utf-8', 'replace').strip() or default
+
+    def get_json(self, path, params=None, timeout=None):
+        """GET a path and decode the JSON body"""
+        _, data = self.request('GET', path, params=params, timeout=timeout)
+        return json.loads(data) if data else None
+
+    def close(self):
+        """Close every pooled connection"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # ------------------------------------------------------------------
+    # Engine API
+    # ------------------------------------------------------------------
+
+    def ping(self):
+        """Check that the daemon answers"""
+        try:
+            status, _ = self.request('GET', '/_ping', timeout=2)
+            return status == 200
+        except DockerAPIError:
+            return False
+
+    def list_containers(self, all=True):
+        """List containers (GET /containers/json)"""
+        return self.get_json('/containers/json', params={"all": "1" if all else "0"}) or []
+
+    def _container_action(self, name, action, params=None, timeout=None):
+        """POST a lifecycle action; 304 (already in that state) counts as success"""
+        status, _ = self.request('POST', f"/containers/{quote(name, safe='')}/{action}",
+                                 params=params, timeout=timeout)
+        return status in (204, 304)
+
+    def start_container(self, name, timeout=30):
+        return self._container_action(name, 'start', timeout=timeout)
+
+    def stop_container(self, name, timeout=30, grace=10):
+        return self._container_action(name, 'stop', params={"t": grace}, timeout=timeout)
+
+    def restart_container(self, name, timeout=30, grace=10):
+        return self._container_action(name, 'restart', params={"t": grace}, timeout=timeout)
+
+    def container_stats(self, name, timeout=None):
+        """One stats snapshot (GET /containers/<id>/stats?stream=false&one-shot=true).
+
+        one-shot skips the daemon's second sample, so precpu_stats is empty and
+        CPU% has to come from the caller's own previous snapshot.
+        """
+        return self.get_json(f"/containers/{quote(name, safe='')}/stats",
+                             params={"stream": "false", "one-shot": "true"}, timeout=timeout)
+
+    def list_networks(self):
+        """List networks (GET /networks)"""
+        return self.get_json('/networks') or []
+
+    def events(self, filters=None):
+        """Open GET /events on a dedicated connection with no read timeout"""
+        params = {"filters": json.dumps(filters)} if filters else None
+        conn = self._new_connection(timeout=self.timeout)
+        try:
+            conn.request('GET', '/events' + ('?' + urlencode(params) if params else ''))
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise DockerAPIError(f"GET /events failed: {e}")
+        if response.status >= 400:
+            message = self._error_message(response.read(), response.reason)
+            conn.close()
+            raise DockerAPIError(message, response.status)
+        conn.sock.settimeout(None)
+        return DockerEventStream(conn, response)
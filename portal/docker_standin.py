@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Docker Engine Stand-in
+Unix socket server replaying recorded Docker Engine API responses, so the portal runs without a daemon
+
+Usage:
+    python3 docker_standin.py [--socket /tmp/docker-standin.sock] [--recordings fixtures/docker_engine.json]
+    DOCKER_HOST=unix:///tmp/docker-standin.sock python3 app.py
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "docker_engine.json")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """One client connection; keep-alive, so it serves requests until the client closes"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "Docker/stand-in"
+
+    def setup(self):
+        super().setup()
+        self.server.standin._opened(self.request)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.standin._closed(self.request)
+
+    def do_GET(self):
+        self.server.standin.respond(self)
+
+    do_POST = do_GET
+    do_DELETE = do_GET
+
+    def address_string(self):
+        return "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # A client that timed out or hung up is expected; anything else is a stand-in bug
+        if not isinstance(sys.exc_info()[1], OSError):
+            super().handle_error(request, client_address)
+
+
+class DockerStandIn:
+    """Serves recorded responses keyed by "METHOD /path" (query strings are ignored).
+
+    A recording is {"status", "body"}, or {"status", "stream"} for GET /events:
+    the recorded events are sent as one chunked JSON line each, followed by any
+    pushed with push_event(), until the client or stop() ends the stream.
+    Unrecorded paths get Docker's 404. `delays` maps a key to seconds to wait
+    before answering, for exercising client timeouts.
+    """
+
+    def __init__(self, socket_path, recordings=None, delays=None):
+        self.socket_path = socket_path
+        if recordings is None or isinstance(recordings, str):
+            with open(recordings or DEFAULT_RECORDINGS, 'r') as f:
+                recordings = json.load(f)
+        self.recordings = recordings
+        self.delays = dict(delays or {})
+        self.requests = []
+        self.connections_opened = 0
+        self._open = set()
+        self._streams = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._stopped.clear()
+        self._server = _Server(self.socket_path, _Handler)
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="docker-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.drop_connections()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _opened(self, sock):
+        with self._lock:
+            self.connections_opened += 1
+            self._open.add(sock)
+
+    def _closed(self, sock):
+        with self._lock:
+            self._open.discard(sock)
+
+    def open_connections(self):
+        with self._lock:
+            return len(self._open)
+
+    def drop_connections(self):
+        """Close every client connection, as the daemon does with idle keep-alives"""
+        with self._lock:
+            sockets = list(self._open)
+            streams = list(self._streams)
+        for stream in streams:
+            stream.put(None)
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def push_event(self, event):
+        """Send a raw Docker event message to every open GET /events stream"""
+        with self._lock:
+            streams = list(self._streams)
+        for stream in streams:
+            stream.put(event)
+        return len(streams)
+
+    def respond(self, handler):
+        path = urlsplit(handler.path).path
+        key = f"{handler.command} {path}"
+        length = int(handler.headers.get("Content-Length") or 0)
+        if length:
+            handler.rfile.read(length)
+        with self._lock:
+            self.requests.append(key)
+        delay = self.delays.get(key)
+        if delay:
+            time.sleep(delay)
+        recording = self.recordings.get(key)
+        if recording is None:
+            recording = {"status": 404, "body": {"message": "page not found"}}
+        if "stream" in recording:
+            self._stream(handler, recording)
+            return
+        body = recording.get("body")
+        if body is None:
+            data = b""
+        elif isinstance(body, str):
+            data = body.encode('utf-8')
+        else:
+            data = json.dumps(body).encode('utf-8')
+        handler.send_response(recording["status"])
+        if data:
+            handler.send_header("Content-Type", "text/plain" if isinstance(body, str) else "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _stream(self, handler, recording):
+        pending = queue.Queue()
+        for event in recording["stream"]:
+            pending.put(event)
+        with self._lock:
+            self._streams.append(pending)
+        handler.close_connection = True
+        try:
+            handler.send_response(recording.get("status", 200))
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+            handler.wfile.flush()
+            while not self._stopped.is_set():
+                try:
+                    event = pending.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if event is None:
+                    break
+                line = (json.dumps(event) + "\n").encode('utf-8')
+                handler.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                handler.wfile.flush()
+        except OSError:
+            pass  # the client went away
+        finally:
+            with self._lock:
+                self._streams.remove(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded Docker Engine API responses on a unix socket")
+    parser.add_argument("--socket", default="/tmp/docker-standin.sock")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS)
+    args = parser.parse_args()
+    standin = DockerStandIn(args.socket, args.recordings).start()
+    print(f"🐳 Replaying {len(standin.recordings)} recorded responses on unix://{args.socket}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
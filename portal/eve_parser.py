@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Eve Parser
+Chunked eve.json reader that only decodes the event types asked for
+"""
+
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def event_type_pattern(event_types):
+    """Regex matching the `"event_type":"<type>"` member of the wanted records.
+
+    Inside a JSON string a quote is always escaped, so a payload that merely
+    contains the text cannot match.
+    """
+    names = b"|".join(re.escape(name.encode('ascii')) for name in event_types)
+    return re.compile(rb'"event_type"\s*:\s*"(?:' + names + rb')"')
+
+
+class EveParser:
+    """Turns raw eve.json bytes into decoded records of the wanted event types.
+
+    `feed()` takes chunks of any size. Instead of splitting every chunk into
+    lines, it searches the chunk for the event_type marker and slices out just
+    the lines around each hit; flow, dns, http, tls and stats lines are never
+    copied or decoded. The selected lines are decoded `batch_size` at a time as
+    one JSON array, which costs less than one `json.loads` per line. A batch
+    holding a corrupt line is decoded again line by line so only that line is
+    lost. Bytes after the last newline are kept until the next chunk completes
+    them.
+    """
+
+    def __init__(self, event_types=("alert",), batch_size=1000):
+        self.event_types = tuple(event_types)
+        self.batch_size = batch_size
+        self._pattern = event_type_pattern(self.event_types)
+        self._carry = b""
+        self.bytes_read = 0
+        self.lines = 0
+        self.matched = 0
+        self.decode_errors = 0
+
+    def reset(self):
+        """Drop a pending partial line (the file was rotated or truncated)"""
+        self._carry = b""
+
+    def feed(self, data):
+        """Decoded records from `data` plus the partial line held from the previous call"""
+        self.bytes_read += len(data)
+        first = data.find(b"\n")
+        if first < 0:
+            self._carry += data
+            return []
+        selected = []
+        # The line completed by this chunk's first newline
+        head = self._carry + data[:first]
+        if head:
+            self.lines += 1
+            if self._pattern.search(head):
+                selected.append(head)
+        last = data.rfind(b"\n")
+        self.lines += data.count(b"\n", first + 1, last + 1)
+        # Scan the complete lines in place; only the matching ones are sliced out
+        line_end = first
+        for match in self._pattern.finditer(data, first + 1, last + 1):
+            if match.start() < line_end:
+                continue  # second marker on a line already taken
+            line_start = data.rfind(b"\n", 0, match.start()) + 1
+            line_end = data.find(b"\n", match.end(), last + 1)
+            selected.append(data[line_start:line_end])
+        self._carry = data[last + 1:]
+        self.matched += len(selected)
+        return self._decode(selected)
+
+    def finish(self):
+        """Records from a last line that ended without a newline (end of a finished file)"""
+        line, self._carry = self._carry, b""
+        if not line.strip():
+            return []
+        self.lines += 1
+        if not self._pattern.search(line):
+            return []
+        self.matched += 1
+        return self._decode([line])
+
+    def _decode(self, lines):
+        records = []
+        for i in range(0, len(lines), self.batch_size):
+            batch = lines[i:i + self.batch_size]
+            try:
+                records.extend(json.loads(b"[" + b",".join(batch) + b"]"))
+            except ValueError:
+                for line in batch:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        self.decode_errors += 1
+        return records
+
+    def get_stats(self):
+        return {
+            "event_types": list(self.event_types),
+            "bytes_read": self.bytes_read,
+            "lines": self.lines,
+            "matched": self.matched,
+            "decode_errors": self.decode_errors
+        }
+
+
+def iter_records(path, event_types=("alert",), chunk_size=DEFAULT_CHUNK_SIZE, batch_size=1000, parser=None):
+    """Yield lists of decoded records from a whole eve.json file, one list per chunk"""
+    parser = parser or EveParser(event_types, batch_size)
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            records = parser.feed(data)
+            if records:
+                yield records
+    tail = parser.finish()
+    if tail:
+        yield tail
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Eve Tailer
+Follows Suricata's eve.json incrementally and keeps a window of recent alerts
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import deque, Counter
+
+from eve_parser import EveParser, DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Suricata alert.severity -> dashboard severity (1 is the most severe)
+SEVERITY_NAMES = {1: "high", 2: "medium", 3: "low"}
+
+
+def severity_name(severity):
+    return SEVERITY_NAMES.get(severity, "low")
+
+
+def normalize_alert(record):
+    """The fields of an eve alert record the portal uses"""
+    alert = record.get("alert") or {}
+    return {
+        "timestamp": record.get("timestamp"),
+        "flow_id": record.get("flow_id"),
+        "src_ip": record.get("src_ip"),
+        "src_port": record.get("src_port"),
+        "dest_ip": record.get("dest_ip"),
+        "dest_port": record.get("dest_port"),
+        "proto": record.get("proto"),
+        "signature_id": alert.get("signature_id"),
+        "signature": alert.get("signature", ""),
+        "category": alert.get("category", ""),
+        "severity": alert.get("severity", 3),
+        "action": alert.get("action", "allowed")
+    }
+
+
+class EveTailer:
+    """Follows eve.json by inode and offset from a background thread.
+
+    Each poll reads only the bytes appended since the last one. When the file
+    is rotated (a new inode at the path) the old file is read to its end before
+    switching; when it is truncated in place the offset starts over. On start
+    the last `backfill_bytes` of the file seed the window, so a restart does not
+    leave the dashboard empty, but history is never re-read in full.
+
+    The window and counters are updated on the tailer thread and a summary is
+    rebuilt once per poll, so readers pay the same small cost however large
+    the file grows.
+    """
+
+    def __init__(self, path, window=1000, interval=1.0, backfill_bytes=4 * 1024 * 1024,
+                 max_read=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.interval = interval
+        self.backfill_bytes = backfill_bytes
+        self.max_read = max_read
+        self._window = deque(maxlen=window)
+        self._severities = Counter()
+        self._signatures = Counter()
+        self._signature_names = {}
+        self._summary = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._poll_listeners = []
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._parser = EveParser(("alert",))
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.alerts_seen = 0
+        self.rotations = 0
+        self.truncations = 0
+        self.last_poll = None
+
+    def add_listener(self, callback):
+        """Call `callback(alerts)` on the tailer thread with each batch of new alerts"""
+        self._listeners.append(callback)
+
+    def add_poll_listener(self, callback):
+        """Call `callback(now)` on the tailer thread after every poll, new alerts or not"""
+        self._poll_listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="eve-tailer")
+        self._thread.start()
+        logger.info(f"Following {self.path}")
+
+    def stop(self):
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(5)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error reading {self.path}: {e}")
+            for callback in self._poll_listeners:
+                try:
+                    callback(self.last_poll)
+                except Exception as e:
+                    logger.error(f"Error in eve poll listener: {e}")
+            self._stop_event.wait(self.interval)
+
+    def poll(self):
+        """Read whatever was appended since the last poll; returns the number of new alerts"""
+        self.last_poll = time.time()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+        alerts = []
+        if self._file is None:
+            self._open(stat, backfill=True)
+        elif stat.st_ino != self._inode:
+            # Rotated: finish the old file, then follow the new one from its start
+            alerts.extend(self._read_available())
+            self._file.close()
+            self.rotations += 1
+            self._open(stat, backfill=False)
+        elif stat.st_size < self._offset:
+            # Truncated in place (copytruncate)
+            self.truncations += 1
+            self._offset = 0
+            self._parser.reset()
+        alerts.extend(self._read_available())
+        if alerts:
+            self._ingest(alerts)
+        return len(alerts)
+
+    def _open(self, stat, backfill):
+        self._file = open(self.path, 'rb')
+        self._inode = stat.st_ino
+        self._parser.reset()
+        self._offset = 0
+        if backfill and stat.st_size > self.backfill_bytes:
+            # Start at the first full line inside the backfill window
+            self._file.seek(stat.st_size - self.backfill_bytes)
+            self._file.readline()
+            self._offset = self._file.tell()
+
+    def _read_available(self):
+        alerts = []
+        while True:
+            self._file.seek(self._offset)
+            data = self._file.read(self.max_read)
+            if not data:
+                return alerts
+            self._offset += len(data)
+            # Only alert lines are decoded; an incomplete last line waits for the next read
+            alerts.extend(normalize_alert(record) for record in self._parser.feed(data))
+            if len(data) < self.max_read:
+                return alerts
+
+    def _ingest(self, alerts):
+        with self._lock:
+            self._window.extend(alerts)
+            for alert in alerts:
+                self._severities[severity_name(alert["severity"])] += 1
+                self._signatures[alert["signature_id"]] += 1
+                self._signature_names[alert["signature_id"]] = alert["signature"]
+            self.alerts_seen += len(alerts)
+            self._summary = None
+        for listener in self._listeners:
+            try:
+                listener(alerts)
+            except Exception as e:
+                logger.error(f"Error in eve alert listener: {e}")
+
+    def recent(self, limit=20):
+        """Newest alerts first"""
+        with self._lock:
+            count = min(limit, len(self._window))
+            return [self._window[-i] for i in range(1, count + 1)]
+
+    def summary(self, top=10):
+        """Severity totals and the most frequent signatures since the tailer started"""
+        with self._lock:
+            if self._summary is None:
+                self._summary = {
+                    "total": self.alerts_seen,
+                    "high": self._severities["high"],
+                    "medium": self._severities["medium"],
+                    "low": self._severities["low"],
+                    "top_signatures": [
+                        {"signature_id": sid, "signature": self._signature_names.get(sid, ""), "count": count}
+                        for sid, count in self._signatures.most_common(top)
+                    ]
+                }
+            return self._summary
+
+    def available(self):
+        """True once the file has been found"""
+        return self._file is not None
+
+    def get_stats(self):
+        return {
+            "path": self.path,
+            "following": self._file is not None,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "offset": self._offset,
+            "lines_read": self._parser.lines,
+            "alerts_seen": self.alerts_seen,
+            "window": len(self._window),
+            "decode_errors": self._parser.decode_errors,
+            "rotations": self.rotations,
+            "truncations": self.truncations,
+            "last_poll": self.last_poll
+        }
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Gunicorn Configuration
+Production serving: one threaded worker owning the background services
+"""
+
+import os
+import signal
+
+# One worker process: the changelog segments, status caches, trends store and
+# dashboard stream are in-process state with a single writer, so the monitor
+# lives in exactly one place. Concurrency comes from the worker's thread pool.
+bind = f"0.0.0.0:{int(os.environ.get('PORT', 5500))}"
+worker_class = "gthread"
+workers = 1
+# Every open /api/stream dashboard holds one of these threads until it
+# disconnects; STREAM_MAX_CLIENTS (default 16) caps them below this so API
+# requests always have threads left. Raise both together.
+threads = int(os.environ.get('WEB_THREADS', 32))
+# Keep-alive connections are parked in the worker's poller, not on a thread
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+worker_connections = int(os.environ.get('WEB_MAX_CONNECTIONS', 1000))
+backlog = int(os.environ.get('WEB_BACKLOG', 2048))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+# How long SIGTERM waits for in-flight requests before the worker is killed
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+# Import the app in the worker, never in the master, so no background thread
+# is started in a process that does not serve requests
+preload_app = False
+
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = "-"
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    """Start the monitor and sampler, and end dashboard streams on SIGTERM"""
+    import app as portal
+
+    portal.start_background_services()
+
+    drain = worker.handle_exit
+
+    def handle_exit(signum, frame):
+        # The worker stops accepting and waits for in-flight requests; SSE
+        # streams never finish on their own, so end them now
+        worker.log.info("Draining in-flight requests")
+        portal.dashboard_stream.stop()
+        drain(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_exit)
+
+
+def worker_exit(server, worker):
+    """Flush the changelog and trends once the worker has drained"""
+    import app as portal
+
+    portal.shutdown_background_services()
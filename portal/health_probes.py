@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Health Probes
+Concurrent HTTP/TCP readiness checks of every tool port with latency histograms
+"""
+
+import ssl
+import time
+import errno
+import socket
+import random
+import bisect
+import asyncio
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+USER_AGENT = "CyberBlueBox-Portal-Probe"
+
+# Connect errors meaning there is no route to the host from here; a refused or
+# silent port is the tool's problem and counts as a failure
+UNREACHABLE_ERRNOS = frozenset((errno.EHOSTUNREACH, errno.ENETUNREACH))
+
+
+class ProbeError(Exception):
+    """Raised when a tool answers, but not in a healthy way"""
+
+
+class HostUnreachable(Exception):
+    """Raised when the probe cannot reach the tool's host at all: no DNS name or no route to it"""
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts for export, plus a window of recent samples for p50/p95"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS, window=120):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, fraction):
+        """Percentile of the recent window, or None before any sample"""
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return round(values[min(int(len(values) * fraction), len(values) - 1)], 1)
+
+    def snapshot(self):
+        cumulative = []
+        total = 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return {
+            "buckets_ms": list(self.buckets),
+            "cumulative_counts": cumulative,
+            "count": self.count,
+            "sum_ms": round(self.sum, 1),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95)
+        }
+
+
+class ToolProbeEngine:
+    """Probes every tool on one asyncio event loop running in a background thread.
+
+    `targets` returns {tool: {"host", "port", "scheme"}} where scheme is "http",
+    "https" or "tcp", or None for a tool with nothing to probe; it is called
+    again every `interval` so targets follow containers as they come and go.
+    Each tool gets its own schedule: a random first delay, then `interval` +/-
+    `jitter`, so probes never fire in lockstep. At most `concurrency` probes are
+    in flight; connecting and answering are each bounded by `timeout`. An HTTP
+    answer below 500 counts as responsive (login redirects and 401s included).
+
+    A tool whose host name does not resolve or has no route is "unreachable"
+    rather than unhealthy: the probe says nothing about the tool, so callers
+    should fall back to another signal. A refused connection, or a connect or
+    TLS handshake that times out, still counts as a failure.
+    """
+
+    def __init__(self, targets, interval=30.0, timeout=5.0, jitter=0.2, concurrency=16,
+                 slow_ms=2000, failure_threshold=2):
+        self.targets = targets
+        self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.slow_ms = slow_ms
+        self.failure_threshold = failure_threshold
+        self._results = {}
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._stop = None
+        self._ssl = ssl.create_default_context()
+        # Tools ship self-signed certificates; reachability is what is checked here
+        self._ssl.check_hostname = False
+        self._ssl.verify_mode = ssl.CERT_NONE
+        self.checks = 0
+        self.failures = 0
+        self.unreachable = 0
+
+    def start(self):
+        """Start the probe loop (idempotent)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="tool-probes")
+        self._thread.start()
+
+    def stop(self):
+        loop, stop = self._loop, self._stop
+        if loop and stop:
+            try:
+                loop.call_soon_threadsafe(stop.set)
+            except RuntimeError:
+                pass  # loop already closed
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(self.timeout + 1)
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            logger.error(f"Tool probe loop stopped: {e}")
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        targets = await self._refresh_targets()
+        with self._lock:
+            for tool, target in targets.items():
+                self._results[tool] = {
+                    "target": self._describe(target),
+                    "status": "unknown",
+                    "checks": 0,
+                    "failures": 0,
+                    "consecutive_failures": 0,
+                    "last_checked": None,
+                    "last_ok": None,
+                    "last_latency_ms": None,
+                    "last_error": None,
+                    "unreachable": False,
+                    "histogram": LatencyHistogram()
+                }
+        logger.info(f"Probing {len(targets)} tools every {self.interval}s")
+        tasks = [asyncio.ensure_future(self._schedule(tool, semaphore)) for tool in targets]
+        tasks.append(asyncio.ensure_future(self._follow_targets()))
+        await self._stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _describe(target):
+        return f"{target['scheme']}://{target['host']}:{target['port']}" if target else None
+
+    async def _refresh_targets(self):
+        """Re-read the targets off the loop thread (they may come from Docker)"""
+        try:
+            targets = await asyncio.get_running_loop().run_in_executor(None, self.targets)
+        except Exception as e:
+            logger.error(f"Error resolving tool probe targets: {e}")
+            return self._targets
+        self._targets = targets
+        with self._lock:
+            for tool, result in self._results.items():
+                result["target"] = self._describe(targets.get(tool))
+        return targets
+
+    async def _follow_targets(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            await self._refresh_targets()
+
+    async def _schedule(self, tool, semaphore):
+        delay = random.uniform(0, min(self.interval, 5.0))
+        while True:
+            try:
+                await asyncio.wait_for(self._stop.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            target = self._targets.get(tool)
+            if target:
+                async with semaphore:
+                    await self._check(tool, target)
+            else:
+                with self._lock:
+                    self._results[tool].update(status="unknown", last_error="no probe target")
+            delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _check(self, tool, target):
+        started = time.perf_counter()
+        error = None
+        unreachable = False
+        try:
+            await self._probe(target)
+        except HostUnreachable as e:
+            error = str(e)
+            unreachable = True
+        except asyncio.TimeoutError:
+            error = f"no answer after {self.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        latency = (time.perf_counter() - started) * 1000
+        with self._lock:
+            result = self._results[tool]
+            result["checks"] += 1
+            result["last_checked"] = time.time()
+            result["unreachable"] = unreachable
+            self.checks += 1
+            if unreachable:
+                # Says nothing about the tool itself, so it does not count as a failure
+                result["last_error"] = error
+                self.unreachable += 1
+            elif error is None:
+                result["histogram"].observe(latency)
+                result["consecutive_failures"] = 0
+                result["last_ok"] = result["last_checked"]
+                result["last_latency_ms"] = round(latency, 1)
+                result["last_error"] = None
+            else:
+                result["failures"] += 1
+                result["consecutive_failures"] += 1
+                result["last_error"] = error
+                self.failures += 1
+            result["status"] = self._status(result)
+
+    async def _probe(self, target):
+        scheme = target["scheme"]
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                target["host"], target["port"], ssl=self._ssl if scheme == "https" else None), self.timeout)
+        except asyncio.TimeoutError:
+            raise ProbeError(f"connect to {target['host']}:{target['port']} timed out after {self.timeout}s")
+        except socket.gaierror as e:
+            raise HostUnreachable(f"cannot resolve {target['host']}: {e}")
+        except OSError as e:
+            if e.errno in UNREACHABLE_ERRNOS:
+                raise HostUnreachable(f"{target['host']}:{target['port']} unreachable: {e}")
+            raise
+        try:
+            if scheme == "tcp":
+                return
+            await asyncio.wait_for(self._request(reader, writer, target), self.timeout)
+        finally:
+            writer.close()
+
+    async def _request(self, reader, writer, target):
+        writer.write((f"HEAD {target.get('path', '/')} HTTP/1.1\r\n"
+                      f"Host: {target['host']}:{target['port']}\r\n"
+                      f"User-Agent: {USER_AGENT}\r\nConnection: close\r\n\r\n").encode('ascii'))
+        await writer.drain()
+        status_line = await reader.readline()
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise ProbeError("not an HTTP response")
+        status = int(parts[1])
+        if status >= 500:
+            raise ProbeError(f"HTTP {status}")
+
+    def _status(self, result):
+        if result.get("unreachable"):
+            return "unreachable"
+        if result["consecutive_failures"] >= self.failure_threshold:
+            return "unhealthy"
+        if result["consecutive_failures"]:
+            return "degraded"
+        p95 = result["histogram"].percentile(0.95)
+        if p95 is not None and p95 > self.slow_ms:
+            return "degraded"
+        return "healthy"
+
+    def results(self):
+        """{tool: probe state} with latency percentiles and histogram"""
+        with self._lock:
+            return {tool: self._export(result) for tool, result in self._results.items()}
+
+    def get(self, tool):
+        with self._lock:
+            result = self._results.get(tool)
+            return self._export(result) if result else None
+
+    @staticmethod
+    def _export(result):
+        exported = {k: v for k, v in result.items() if k != "histogram"}
+        latency = result["histogram"].snapshot()
+        exported["latency_p50_ms"] = latency["p50_ms"]
+        exported["latency_p95_ms"] = latency["p95_ms"]
+        exported["latency"] = latency
+        return exported
+
+    def get_stats(self):
+        with self._lock:
+            statuses = [result["status"] for result in self._results.values()]
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "tools": len(statuses),
+                "healthy": statuses.count("healthy"),
+                "degraded": statuses.count("degraded"),
+                "unhealthy": statuses.count("unhealthy"),
+                "unreachable": statuses.count("unreachable"),
+                "interval": self.interval,
+                "timeout": self.timeout,
+                "checks": self.checks,
+                "failures": self.failures,
+                "unreachable_checks": self.unreachable
+            }
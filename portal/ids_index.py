@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - IDS Index
+Time-partitioned columnar segments of Suricata alerts with bitmap indexes for historical search
+
+Usage:
+    python3 ids_index.py build /var/log/suricata/eve.json.1 eve-2026-10-*.json.gz [--index-dir ids-index]
+    python3 ids_index.py search --signature-id 2033078 --since 2026-10-10T00:00:00 [--group-by src_ip]
+"""
+
+import os
+import sys
+import json
+import zlib
+import gzip
+import time
+import heapq
+import bisect
+import argparse
+import threading
+import logging
+from array import array
+from datetime import datetime, timezone
+from collections import Counter, OrderedDict
+from itertools import compress
+
+from eve_parser import EveParser, DEFAULT_CHUNK_SIZE
+from eve_tailer import normalize_alert
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = "cyberblue-ids-segment"
+FILE_VERSION = 1
+SEGMENT_SUFFIX = ".seg"
+
+# Column name -> array typecode. IPs and protocols are codes into per-segment dictionaries.
+COLUMNS = (
+    ("timestamp", "d"),
+    ("src_ip", "I"),
+    ("dest_ip", "I"),
+    ("src_port", "H"),
+    ("dest_port", "H"),
+    ("proto", "B"),
+    ("signature_id", "I"),
+    ("severity", "B"),
+    ("flow_id", "Q"),
+)
+COLUMN_TYPES = dict(COLUMNS)
+COLUMN_POSITIONS = {name: i for i, (name, _) in enumerate(COLUMNS)}
+DICTIONARY_COLUMNS = {"src_ip": "ips", "dest_ip": "ips", "proto": "protos"}
+# Columns with a bitmap per distinct value
+INDEXED_COLUMNS = ("signature_id", "src_ip", "dest_ip", "dest_port", "proto", "severity")
+MINMAX_COLUMNS = ("timestamp", "signature_id", "severity", "src_port", "dest_port")
+GROUP_BY_COLUMNS = ("signature_id", "src_ip", "dest_ip", "dest_port", "proto", "severity")
+
+# Byte -> its 8 bits as 0/1 bytes, least significant first (row order inside a bitmap)
+_EXPAND = [bytes((b >> i) & 1 for i in range(8)) for b in range(256)]
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(value):
+        return bin(value).count("1")
+
+
+_second_cache = {}
+
+
+def parse_timestamp(value):
+    """Epoch seconds from an eve timestamp ("2026-10-17T10:00:00.123456+0000") or ISO-8601 text"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if len(value) == 31 and value[19] == ".":
+        # Suricata's fixed layout: parse each whole second once, add the fraction
+        key = value[:19] + value[26:]
+        second = _second_cache.get(key)
+        if second is None:
+            if len(_second_cache) > 100000:
+                _second_cache.clear()
+            second = _second_cache[key] = parse_timestamp(key)
+        return second + int(value[20:26]) / 1e6
+    text = value.strip().replace("Z", "+00:00")
+    # fromisoformat before Python 3.11 needs a colon in the UTC offset
+    if len(text) > 5 and text[-5] in "+-" and text[-3] != ":":
+        text = text[:-2] + ":" + text[-2:]
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _bitmap(rows, count):
+    """Bitmap (as an int, bit r = row r) of a list of row numbers"""
+    bits = bytearray((count + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _flags(mask, count):
+    """One 0/1 byte per row, for itertools.compress over a column"""
+    return b"".join(map(_EXPAND.__getitem__, mask.to_bytes((count + 7) // 8, "little")))[:count]
+
+
+def _highest_rows(mask, limit):
+    """Up to `limit` set rows of a bitmap, highest (newest) first"""
+    rows = []
+    while mask and len(rows) < limit:
+        row = mask.bit_length() - 1
+        rows.append(row)
+        mask ^= 1 << row
+    return rows
+
+
+def _minmax(column):
+    return [min(column), max(column)] if column else [0, 0]
+
+
+def write_segment(path, partition, rows):
+    """Write one sealed segment from a list of normalized alerts, sorted by time"""
+    rows = sorted(rows, key=lambda r: r[0])
+    count = len(rows)
+    # Transpose once; the per-column work below then runs in comprehensions
+    values = dict(zip([name for name, _ in COLUMNS] + ["signature"], zip(*rows)))
+    ips, protos = {}, {}
+    dictionaries = {"ips": ips, "protos": protos}
+    columns = {}
+    for name, code in COLUMNS:
+        if name in DICTIONARY_COLUMNS:
+            codes = dictionaries[DICTIONARY_COLUMNS[name]]
+            columns[name] = array(code, [codes.setdefault(v, len(codes)) for v in values[name]])
+        else:
+            columns[name] = array(code, values[name])
+    signatures = dict(zip(values["signature_id"], values["signature"]))
+
+    blobs = []
+    offset = 0
+
+    def add_blob(data):
+        nonlocal offset
+        blob = zlib.compress(data, 1)
+        blobs.append(blob)
+        entry = [offset, len(blob)]
+        offset += len(blob)
+        return entry
+
+    column_entries = {name: add_blob(columns[name].tobytes()) for name, _ in COLUMNS}
+    indexes = {}
+    for name in INDEXED_COLUMNS:
+        postings = {}
+        for row, value in enumerate(columns[name]):
+            rows_of_value = postings.get(value)
+            if rows_of_value is None:
+                rows_of_value = postings[value] = []
+            rows_of_value.append(row)
+        names = list(dictionaries[DICTIONARY_COLUMNS[name]]) if name in DICTIONARY_COLUMNS else None
+        # Keyed by the value as text (IPs and protocols by name, not by code)
+        indexes[name] = {
+            str(names[value] if names else value): add_blob(_bitmap(row_list, count).to_bytes((count + 7) // 8, "little"))
+            for value, row_list in postings.items()
+        }
+
+    header = {
+        "magic": FILE_MAGIC,
+        "version": FILE_VERSION,
+        "byteorder": sys.byteorder,
+        "partition": partition,
+        "rows": count,
+        "minmax": {name: _minmax(columns[name]) for name in MINMAX_COLUMNS},
+        "columns": column_entries,
+        "ips": list(ips),
+        "protos": list(protos),
+        "signatures": {str(sid): text for sid, text in signatures.items()},
+        "indexes": indexes
+    }
+    header_line = json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n"
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header_line)
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return Segment(path, header, len(header_line))
+
+
+class BitmapDirectory:
+    """Value -> (offset, length) of its bitmap, as sorted keys and parallel arrays.
+
+    Thousands of IPs per segment across thousands of segments make per-entry
+    dicts and lists the largest part of the index's memory; this layout holds
+    an entry in about 20 bytes, and key strings are shared between segments.
+    """
+
+    __slots__ = ("keys", "offsets", "lengths")
+
+    def __init__(self, entries):
+        self.keys = sorted(sys.intern(key) for key in entries)
+        self.offsets = array("Q", (entries[key][0] for key in self.keys))
+        self.lengths = array("I", (entries[key][1] for key in self.keys))
+
+    def get(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.offsets[i], self.lengths[i]
+        return None
+
+    def __contains__(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+
+class Segment:
+    """A sealed segment: the header stays in memory, columns and bitmaps are read on demand"""
+
+    def __init__(self, path, header, body_offset):
+        self.path = path
+        self.partition = header["partition"]
+        self.rows = header["rows"]
+        self.minmax = header["minmax"]
+        self.ts_min, self.ts_max = self.minmax["timestamp"]
+        self.columns = header["columns"]
+        self.indexes = {column: BitmapDirectory(entries) for column, entries in header["indexes"].items()}
+        self.ips = [sys.intern(ip) for ip in header["ips"]]
+        self.protos = header["protos"]
+        self.signatures = {sid: sys.intern(text) for sid, text in header["signatures"].items()}
+        self.swap = header.get("byteorder") != sys.byteorder
+        self.body_offset = body_offset
+        self.size = os.path.getsize(path)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            line = f.readline()
+        header = json.loads(line)
+        if header.get("magic") != FILE_MAGIC or header.get("version") != FILE_VERSION:
+            raise ValueError("not an IDS index segment")
+        return cls(path, header, len(line))
+
+    def read(self, entry):
+        offset, length = entry
+        with open(self.path, "rb") as f:
+            f.seek(self.body_offset + offset)
+            return zlib.decompress(f.read(length))
+
+    def bitmap(self, column, value):
+        """Rows holding `value` in an indexed column (0 if none)"""
+        entry = self.indexes[column].get(str(value))
+        return int.from_bytes(self.read(entry), "little") if entry else 0
+
+    def has(self, column, value):
+        return str(value) in self.indexes[column]
+
+    def load_column(self, name):
+        column = array(COLUMN_TYPES[name], self.read(self.columns[name]))
+        if self.swap:
+            column.byteswap()
+        return column
+
+
+class SegmentColumns(dict):
+    """A segment's decoded columns, each read the first time it is used"""
+
+    def __init__(self, segment):
+        super().__init__()
+        self.segment = segment
+
+    def __missing__(self, name):
+        column = self[name] = self.segment.load_column(name)
+        return column
+
+
+class IdsIndex:
+    """Historical alert search over time-partitioned columnar segments.
+
+    Alerts are buffered per partition (`partition_seconds` of time, an hour by
+    default) and sealed into a segment file once `rows_per_segment` are
+    buffered, the partition has been idle for a partition length, or the index
+    is flushed. A segment stores each column as a compressed typed array, per-
+    column min/max, and a compressed bitmap of rows per distinct signature,
+    source IP, destination IP, destination port, protocol and severity.
+
+    A search first drops segments by time range and by whether their bitmap
+    directories hold the requested values at all, without touching disk.
+    Matching rows in the remaining segments come from ANDing bitmaps, and the
+    row count is a popcount. Columns are only decoded to return the newest
+    `limit` events or to group results, and decoded segments are kept in a
+    small LRU.
+    """
+
+    def __init__(self, directory, partition_seconds=3600, rows_per_segment=65536, retention_days=30,
+                 column_cache=32):
+        self.directory = directory
+        self.partition_seconds = partition_seconds
+        self.rows_per_segment = rows_per_segment
+        self.retention_days = retention_days
+        self.column_cache = column_cache
+        self._segments = []
+        self._buffers = {}
+        self._columns = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.loaded_until = None
+        self.rows_indexed = 0
+        self.searches = 0
+
+    def load(self):
+        """Open every sealed segment in the index directory"""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            try:
+                segments.append(Segment.open(os.path.join(self.directory, name)))
+            except Exception as e:
+                logger.error(f"Skipping IDS index segment {name}: {e}")
+        with self._lock:
+            self._segments = segments
+            self._sequence = len(segments)
+            self.loaded_until = max((s.ts_max for s in segments), default=None)
+        logger.info(f"Loaded {len(segments)} IDS index segments ({sum(s.rows for s in segments)} alerts)")
+        return len(segments)
+
+    def add(self, alerts, newer_than=None):
+        """Buffer normalized alerts (see eve_tailer.normalize_alert); seals full partitions.
+
+        Alerts at or before `newer_than` are skipped, so alerts replayed after a
+        restart are not indexed twice.
+        """
+        sealed = []
+        with self._lock:
+            newest = None
+            for alert in alerts:
+                try:
+                    ts = parse_timestamp(alert["timestamp"])
+                except (TypeError, ValueError):
+                    continue
+                if newer_than is not None and ts <= newer_than:
+                    continue
+                partition = int(ts // self.partition_seconds) * self.partition_seconds
+                buffer = self._buffers.setdefault(partition, [])
+                buffer.append((ts, alert["src_ip"] or "", alert["dest_ip"] or "",
+                               alert["src_port"] or 0, alert["dest_port"] or 0, alert["proto"] or "",
+                               alert["signature_id"] or 0, alert["severity"] or 3, alert["flow_id"] or 0,
+                               alert["signature"] or ""))
+                if len(buffer) >= self.rows_per_segment:
+                    sealed.append((partition, self._buffers.pop(partition)))
+                newest = ts if newest is None or ts > newest else newest
+            self.rows_indexed += len(alerts)
+            if newest is not None:
+                # Partitions nothing has been added to for a partition length are complete
+                idle = [p for p in self._buffers if p + 2 * self.partition_seconds <= newest]
+                sealed.extend((p, self._buffers.pop(p)) for p in idle)
+        for partition, rows in sealed:
+            self._seal(partition, rows)
+
+    def flush(self):
+        """Seal every buffered partition (on shutdown, or at the end of an offline build)"""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+        for partition, rows in buffers.items():
+            self._seal(partition, rows)
+
+    def _seal(self, partition, rows):
+        if not rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        path = os.path.join(self.directory, f"{partition}-{int(time.time())}-{sequence:06d}{SEGMENT_SUFFIX}")
+        try:
+            segment = write_segment(path, partition, rows)
+        except Exception as e:
+            logger.error(f"Error writing IDS index segment {path}: {e}")
+            return
+        with self._lock:
+            self._segments.append(segment)
+        self.apply_retention()
+
+    def apply_retention(self, now=None):
+        """Delete partitions older than `retention_days`"""
+        if not self.retention_days:
+            return 0
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        with self._lock:
+            expired = [s for s in self._segments if s.partition + self.partition_seconds <= cutoff]
+            if not expired:
+                return 0
+            self._segments = [s for s in self._segments if s.partition + self.partition_seconds > cutoff]
+            for segment in expired:
+                self._columns.pop(segment.path, None)
+        for segment in expired:
+            try:
+                os.remove(segment.path)
+            except OSError as e:
+                logger.error(f"Error removing expired IDS index segment {segment.path}: {e}")
+        return len(expired)
+
+    def _segment_columns(self, segment):
+        with self._lock:
+            columns = self._columns.get(segment.path)
+            if columns is not None:
+                self._columns.move_to_end(segment.path)
+                return columns
+        columns = SegmentColumns(segment)
+        with self._lock:
+            self._columns[segment.path] = columns
+            while len(self._columns) > self.column_cache:
+                self._columns.popitem(last=False)
+        return columns
+
+    def search(self, since=None, until=None, signature_id=None, src_ip=None, dest_ip=None, ip=None,
+               dest_port=None, proto=None, severity=None, limit=100, group_by=None, group_limit=20):
+        """Matching alerts, newest first, with the total count and optional top values of a column.
+
+        `severity` keeps alerts at least that severe (Suricata 1 is the most
+        severe); `ip` matches either side; times are epoch seconds.
+        """
+        if group_by is not None and group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f"Cannot group by '{group_by}', use one of {', '.join(GROUP_BY_COLUMNS)}")
+        started = time.perf_counter()
+        equals = [(column, value) for column, value in (("signature_id", signature_id), ("src_ip", src_ip),
+                                                        ("dest_ip", dest_ip), ("dest_port", dest_port),
+                                                        ("proto", proto.upper() if proto else None))
+                  if value is not None]
+        with self._lock:
+            segments = list(self._segments)
+            buffered = [row for rows in self._buffers.values() for row in rows]
+        self.searches += 1
+
+        total = 0
+        scanned = 0
+        groups = Counter()
+        newest = []  # min-heap of (timestamp, tiebreak, event) holding the newest `limit`
+        tiebreak = 0
+        # Newest segments first, so older ones can be skipped once `limit` newer events are found
+        for segment in sorted(segments, key=lambda s: s.ts_max, reverse=True):
+            if (since is not None and segment.ts_max < since) or (until is not None and segment.ts_min > until):
+                continue
+            if signature_id is not None and not (segment.minmax["signature_id"][0] <= signature_id
+                                                 <= segment.minmax["signature_id"][1]):
+                continue
+            if any(not segment.has(column, value) for column, value in equals):
+                continue
+            if ip is not None and not (segment.has("src_ip", ip) or segment.has("dest_ip", ip)):
+                continue
+            if severity is not None and segment.minmax["severity"][0] > severity:
+                continue
+            scanned += 1
+
+            mask = (1 << segment.rows) - 1
+            for column, value in equals:
+                mask &= segment.bitmap(column, value)
+            if ip is not None and mask:
+                mask &= segment.bitmap("src_ip", ip) | segment.bitmap("dest_ip", ip)
+            if severity is not None and mask and segment.minmax["severity"][1] > severity:
+                mask &= self._severity_mask(segment, severity)
+            columns = None
+            partial = ((since is not None and segment.ts_min < since) or
+                       (until is not None and segment.ts_max > until))
+            if partial and mask:
+                # Rows are sorted by time, so the range is one contiguous run of bits
+                columns = self._segment_columns(segment)
+                first = bisect.bisect_left(columns["timestamp"], since) if since is not None else 0
+                last = bisect.bisect_right(columns["timestamp"], until) if until is not None else segment.rows
+                mask &= ((1 << last) - 1) ^ ((1 << first) - 1)
+            if not mask:
+                continue
+            matches = _popcount(mask)
+            total += matches
+
+            if group_by is not None:
+                columns = columns or self._segment_columns(segment)
+                column = columns[group_by]
+                if matches * 32 < segment.rows:
+                    # Sparse: walking the set bits beats expanding every row
+                    values = [column[row] for row in _highest_rows(mask, matches)]
+                else:
+                    values = compress(column, _flags(mask, segment.rows))
+                names = self._value_names(segment, group_by)
+                if names is None:
+                    groups.update(values)
+                else:
+                    groups.update(names[code] for code in values)
+
+            if limit and (len(newest) < limit or segment.ts_max > newest[0][0]):
+                columns = columns or self._segment_columns(segment)
+                for row in _highest_rows(mask, limit):
+                    ts = columns["timestamp"][row]
+                    if len(newest) >= limit and ts <= newest[0][0]:
+                        break
+                    tiebreak += 1
+                    event = self._event(segment, columns, row)
+                    if len(newest) < limit:
+                        heapq.heappush(newest, (ts, tiebreak, event))
+                    else:
+                        heapq.heapreplace(newest, (ts, tiebreak, event))
+
+        # Alerts not sealed into a segment yet
+        for row in buffered:
+            if not self._buffered_match(row, since, until, equals, ip, severity):
+                continue
+            total += 1
+            if group_by is not None:
+                groups[row[COLUMN_POSITIONS[group_by]]] += 1
+            if limit and (len(newest) < limit or row[0] > newest[0][0]):
+                tiebreak += 1
+                entry = (row[0], tiebreak, self._buffered_event(row))
+                if len(newest) < limit:
+                    heapq.heappush(newest, entry)
+                else:
+                    heapq.heapreplace(newest, entry)
+
+        result = {
+            "total": total,
+            "events": [event for _, _, event in sorted(newest, key=lambda e: (e[0], e[1]), reverse=True)],
+            "segments_scanned": scanned,
+            "segments_total": len(segments),
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        if group_by is not None:
+            result["groups"] = [{"value": value, "count": count} for value, count in groups.most_common(group_limit)]
+        return result
+
+    @staticmethod
+    def _severity_mask(segment, severity):
+        mask = 0
+        for value in range(segment.minmax["severity"][0], severity + 1):
+            mask |= segment.bitmap("severity", value)
+        return mask
+
+    @staticmethod
+    def _value_names(segment, column):
+        if column in ("src_ip", "dest_ip"):
+            return segment.ips
+        if column == "proto":
+            return segment.protos
+        return None
+
+    @staticmethod
+    def _event(segment, columns, row):
+        sid = columns["signature_id"][row]
+        return {
+            "timestamp": datetime.fromtimestamp(columns["timestamp"][row], timezone.utc).isoformat(),
+            "src_ip": segment.ips[columns["src_ip"][row]],
+            "src_port": columns["src_port"][row],
+            "dest_ip": segment.ips[columns["dest_ip"][row]],
+            "dest_port": columns["dest_port"][row],
+            "proto": segment.protos[columns["proto"][row]],
+            "signature_id": sid,
+            "signature": segment.signatures.get(str(sid), ""),
+            "severity": columns["severity"][row],
+            "flow_id": columns["flow_id"][row]
+        }
+
+    @staticmethod
+    def _buffered_match(row, since, until, equals, ip, severity):
+        ts, src_ip, dest_ip, src_port, dest_port, proto, sid, row_severity = row[:8]
+        if (since is not None and ts < since) or (until is not None and ts > until):
+            return False
+        values = {"signature_id": sid, "src_ip": src_ip, "dest_ip": dest_ip, "dest_port": dest_port, "proto": proto}
+        if any(values[column] != value for column, value in equals):
+            return False
+        if ip is not None and ip not in (src_ip, dest_ip):
+            return False
+        return severity is None or row_severity <= severity
+
+    @staticmethod
+    def _buffered_event(row):
+        ts, src_ip, dest_ip, src_port, dest_port, proto, sid, severity, flow_id, signature = row
+        return {
+            "timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+            "src_ip": src_ip,
+            "src_port": src_port,
+            "dest_ip": dest_ip,
+            "dest_port": dest_port,
+            "proto": proto,
+            "signature_id": sid,
+            "signature": signature,
+            "severity": severity,
+            "flow_id": flow_id
+        }
+
+    def index_file(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Index every alert of an eve.json archive (plain or .gz); returns the alert count"""
+        parser = EveParser(("alert",))
+        opener = gzip.open if path.endswith(".gz") else open
+        count = 0
+        with opener(path, "rb") as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                alerts = [normalize_alert(record) for record in parser.feed(data)]
+                self.add(alerts)
+                count += len(alerts)
+        alerts = [normalize_alert(record) for record in parser.finish()]
+        self.add(alerts)
+        return count + len(alerts)
+
+    def get_stats(self):
+        with self._lock:
+            segments = list(self._segments)
+            buffered = sum(len(rows) for rows in self._buffers.values())
+        return {
+            "directory": self.directory,
+            "segments": len(segments),
+            "partitions": len({s.partition for s in segments}),
+            "alerts": sum(s.rows for s in segments),
+            "buffered": buffered,
+            "bytes": sum(s.size for s in segments),
+            "oldest": min((s.ts_min for s in segments), default=None),
+            "newest": max((s.ts_max for s in segments), default=None),
+            "rows_indexed": self.rows_indexed,
+            "searches": self.searches
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and search the portal's IDS alert index")
+    parser.add_argument("--index-dir", default=os.environ.get("IDS_INDEX_DIR", "ids-index"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index eve.json archives (plain or .gz)")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--retention-days", type=int, default=0, help="drop older partitions (0 keeps everything)")
+    search = commands.add_parser("search", help="query the index")
+    search.add_argument("--since")
+    search.add_argument("--until")
+    search.add_argument("--signature-id", type=int)
+    search.add_argument("--src-ip")
+    search.add_argument("--dest-ip")
+    search.add_argument("--ip")
+    search.add_argument("--dest-port", type=int)
+    search.add_argument("--proto")
+    search.add_argument("--severity", type=int)
+    search.add_argument("--group-by", choices=GROUP_BY_COLUMNS)
+    search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "build":
+        index = IdsIndex(args.index_dir, retention_days=args.retention_days)
+        index.load()
+        for path in args.files:
+            started = time.perf_counter()
+            count = index.index_file(path)
+            index.flush()
+            logger.info(f"{path}: {count} alerts in {time.perf_counter() - started:.1f}s")
+        print(json.dumps(index.get_stats(), indent=2))
+    else:
+        index = IdsIndex(args.index_dir, retention_days=0)
+        index.load()
+        result = index.search(since=parse_timestamp(args.since), until=parse_timestamp(args.until),
+                              signature_id=args.signature_id, src_ip=args.src_ip, dest_ip=args.dest_ip,
+                              ip=args.ip, dest_port=args.dest_port, proto=args.proto, severity=args.severity,
+                              limit=args.limit, group_by=args.group_by)
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
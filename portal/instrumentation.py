@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Instrumentation
+In-process counters, gauges and histograms rendered in the Prometheus text format
+"""
+
+import time
+import bisect
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a cached API response (~1ms) up to a slow Docker call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set: `counter.inc("GET", "/api/containers")`"""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        lines = self._header()
+        lines.extend(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                     for labels, value in values)
+        return lines
+
+
+class Gauge(Counter):
+    """A value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set. Each observation is one bisect and
+    three additions under a lock; buckets are only made cumulative at render time."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # bucket counts (+Inf last), then sum
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+
+    def render(self):
+        with self._lock:
+            values = [(labels, list(state)) for labels, state in self._values.items()]
+        lines = self._header()
+        for labels, state in values:
+            lines.extend(histogram_lines(self.name, self.label_names, labels, self.buckets, state[:-1], state[-1]))
+        return lines
+
+
+def histogram_lines(name, label_names, labels, buckets, counts, total):
+    """Sample lines for one histogram series from per-bucket (non-cumulative) counts"""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float('inf'),), counts):
+        cumulative += count
+        le = f'le="{_format_value(float(bound))}"'
+        lines.append(f"{name}_bucket{_format_labels(label_names, labels, le)} {cumulative}")
+    label_text = _format_labels(label_names, labels)
+    lines.append(f"{name}_sum{label_text} {_format_value(round(total, 6))}")
+    lines.append(f"{name}_count{label_text} {cumulative}")
+    return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Registry:
+    """Metrics defined by the modules, plus collectors that read existing stats at scrape time"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector):
+        """`collector()` returns lines of exposition text (header lines included)"""
+        self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.error(f"Error in metrics collector: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def family(name, kind, documentation, samples, label_names=()):
+    """Exposition lines for a collector: `samples` is [(label values, value)]"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}" for labels, value in samples)
+    return lines
+
+
+# The portal's process-wide registry
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "portal_http_requests_total", "HTTP requests by route and status", ("method", "endpoint", "status"))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "portal_http_request_duration_seconds", "Time to produce an HTTP response by route", ("method", "endpoint"))
+
+
+def instrument_flask(app, registry_metrics=(HTTP_REQUESTS, HTTP_REQUEST_SECONDS)):
+    """Time every request of a Flask app by its URL rule (not the raw path, which
+    would create a series per container name).
+
+    Recorded at teardown, which runs even when a view raises; after_request
+    only notes the status, and a request without one is counted as a 500.
+    """
+    from flask import request
+    requests_total, request_seconds = registry_metrics
+
+    @app.before_request
+    def _start_timer():
+        # The WSGI environ is a plain dict; cheaper than going through `g`
+        request.environ["portal.started"] = time.perf_counter()
+
+    @app.after_request
+    def _note_status(response):
+        request.environ["portal.status"] = response.status_code
+        return response
+
+    @app.teardown_request
+    def _observe_request(exc):
+        environ = request.environ
+        started = environ.pop("portal.started", None)
+        if started is not None:
+            rule = request.url_rule
+            endpoint = rule.rule if rule is not None else "unmatched"
+            method = environ.get("REQUEST_METHOD", "GET")
+            request_seconds.observe(time.perf_counter() - started, method, endpoint)
+            requests_total.inc(method, endpoint, str(environ.get("portal.status", 500)))
+
+    return app
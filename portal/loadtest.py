@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Load Test
+Closed-loop HTTP load generator reporting throughput and latency per endpoint
+
+Usage:
+    python3 loadtest.py --url http://localhost:5500 --concurrency 32 --duration 20
+    python3 loadtest.py --path /api/containers --path /api/containers/status --target-rps 1000
+"""
+
+import sys
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["/api/containers", "/api/containers/status", "/api/dashboard/metrics"]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Client(threading.Thread):
+    """One keep-alive connection issuing requests back to back until the deadline"""
+
+    def __init__(self, host, port, paths, offset, deadline, timeout):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.paths = paths
+        self.offset = offset
+        self.deadline = deadline
+        self.timeout = timeout
+        self.latencies = {path: [] for path in paths}
+        self.errors = {path: 0 for path in paths}
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        i = self.offset
+        while time.monotonic() < self.deadline:
+            path = self.paths[i % len(self.paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    self.errors[path] += 1
+                    continue
+                self.latencies[path].append(time.perf_counter() - started)
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                self.errors[path] += 1
+                conn.close()
+        conn.close()
+
+
+def run(url, paths, concurrency, duration, warmup, timeout):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    if warmup > 0:
+        warm = [Client(host, port, paths, i, time.monotonic() + warmup, timeout) for i in range(concurrency)]
+        for client in warm:
+            client.start()
+        for client in warm:
+            client.join()
+
+    deadline = time.monotonic() + duration
+    clients = [Client(host, port, paths, i, deadline, timeout) for i in range(concurrency)]
+    started = time.monotonic()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.monotonic() - started
+
+    results = {}
+    for path in paths:
+        latencies = sorted(l for client in clients for l in client.latencies[path])
+        results[path] = {
+            "requests": len(latencies),
+            "errors": sum(client.errors[path] for client in clients),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000
+        }
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the CyberBlueBox portal API")
+    parser.add_argument("--url", default="http://localhost:5500", help="portal base URL")
+    parser.add_argument("--path", action="append", dest="paths", help="endpoint to request (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to measure")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load first")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout")
+    parser.add_argument("--target-rps", type=float, help="exit non-zero if total RPS is below this")
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    print(f"Load testing {args.url} with {args.concurrency} connections for {args.duration:g}s")
+    elapsed, results = run(args.url, paths, args.concurrency, args.duration, args.warmup, args.timeout)
+
+    print(f"\n{'endpoint':<32} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for path, r in results.items():
+        print(f"{path:<32} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    total_rps = sum(r["rps"] for r in results.values())
+    total_errors = sum(r["errors"] for r in results.values())
+    print(f"\nTotal: {total_rps:.1f} requests/s, {total_errors} errors in {elapsed:.1f}s")
+
+    if args.target_rps is not None:
+        if total_rps < args.target_rps or total_errors:
+            print(f"FAIL: below the {args.target_rps:g} requests/s target or errors returned")
+            sys.exit(1)
+        print(f"PASS: meets the {args.target_rps:g} requests/s target")
+
+
+if __name__ == '__main__':
+    main()
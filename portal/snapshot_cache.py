@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Snapshot Cache
+Process-wide TTL cache for expensive read-only snapshots (e.g. container status)
+"""
+
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A refresh in progress that concurrent readers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SnapshotCache:
+    """Holds one snapshot produced by `loader`, refreshed at most once per TTL.
+
+    Concurrent readers that find the snapshot stale share a single in-flight
+    refresh instead of each calling the loader. Producers that already have a
+    fresh snapshot (e.g. a background monitor) can put() it directly. Cached
+    values are shared between readers and must be treated as read-only.
+    """
+
+    def __init__(self, loader, ttl=5.0, name="snapshot"):
+        self.loader = loader
+        self.ttl = ttl
+        self.name = name
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self._updated = None
+        self._generation = 0
+        self._flight = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.puts = 0
+        self.invalidations = 0
+
+    def get(self):
+        """Return the cached snapshot, refreshing it first if it has expired"""
+        with self._lock:
+            if self._updated is not None and time.monotonic() < self._expires:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+                generation = self._generation
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = self.loader()
+        except Exception as e:
+            with self._lock:
+                self.load_errors += 1
+                if self._flight is flight:
+                    self._flight = None
+            flight.error = e
+            flight.done.set()
+            raise
+
+        with self._lock:
+            self.loads += 1
+            # An invalidate() or put() during the load makes this result stale
+            if self._generation == generation:
+                self._store(value, self.ttl)
+            if self._flight is flight:
+                self._flight = None
+        flight.value = value
+        flight.done.set()
+        return value
+
+    def peek(self):
+        """Return the cached snapshot without refreshing it (may be stale or None)"""
+        return self._value
+
+    def put(self, value, ttl=None):
+        """Publish a snapshot produced elsewhere; `ttl` overrides the default freshness"""
+        with self._lock:
+            self._generation += 1
+            self._flight = None
+            self.puts += 1
+            self._store(value, self.ttl if ttl is None else ttl)
+
+    def invalidate(self):
+        """Force the next get() to reload"""
+        with self._lock:
+            self._generation += 1
+            self._flight = None
+            self._expires = 0.0
+            self.invalidations += 1
+
+    def _store(self, value, ttl):
+        self._value = value
+        self._updated = time.time()
+        self._expires = time.monotonic() + ttl
+
+    def get_stats(self):
+        """Hit/miss counters for the health endpoint"""
+        with self._lock:
+            age = round(time.time() - self._updated, 3) if self._updated is not None else None
+            return {
+                "name": self.name,
+                "ttl": self.ttl,
+                "age": age,
+                "fresh": self._updated is not None and time.monotonic() < self._expires,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "load_errors": self.load_errors,
+                "puts": self.puts,
+                "invalidations": self.invalidations
+            }
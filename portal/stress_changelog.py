@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Changelog Stress Test
+Concurrent add_entry writers and readers; checks for lost, duplicate or reordered entries
+
+Usage:
+    python3 stress_changelog.py [--writers 16] [--entries 2000] [--readers 4] [--mode async]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+
+
+def reader_loop(manager, stop, errors, reads):
+    """Page through the newest entries until told to stop; ids must strictly increase"""
+    while not stop.is_set():
+        try:
+            entries, _ = manager.query_entries(limit=50, action="stress")
+            ids = [entry["id"] for entry in entries]
+            if ids != sorted(set(ids)):
+                errors.append(f"reader saw ids out of order or duplicated: {ids[:10]}...")
+            manager.get_stats()
+            reads[0] += 1
+        except Exception as e:
+            errors.append(f"reader raised {e!r}")
+
+
+def run(portal, directory, mode, writers, entries, readers):
+    manager = portal.ChangelogManager(os.path.join(directory, "changelog.json"), directory, writer_mode=mode)
+    manager.start()
+    stop = threading.Event()
+    errors = []
+    reads = [0]
+    issued = [[] for _ in range(writers)]
+
+    def write(slot):
+        for i in range(entries):
+            entry_id = manager.add_entry("stress", f"writer {slot} entry {i}", user=f"w{slot}")["id"]
+            if entry_id is not None:  # dropped entries get no id; counted below
+                issued[slot].append(entry_id)
+
+    reader_threads = [threading.Thread(target=reader_loop, args=(manager, stop, errors, reads))
+                      for _ in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(slot,)) for slot in range(writers)]
+    started = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    total = writers * entries
+    ids = sorted(i for ids in issued for i in ids)
+    if len(set(ids)) != len(ids):
+        errors.append(f"add_entry handed out {len(ids) - len(set(ids))} duplicate ids")
+    if ids and ids != list(range(ids[0], ids[0] + len(ids))):
+        errors.append("add_entry ids are not contiguous")
+    for slot, own in enumerate(issued):
+        if own != sorted(own):
+            errors.append(f"writer {slot} got decreasing ids")
+    dropped = manager.get_writer_stats().get("dropped", 0)
+    if dropped:
+        errors.append(f"{dropped} entries dropped on a full writer queue")
+    manager.close()
+
+    # Everything handed out must be on disk, once, after a reload
+    reloaded = portal.ChangelogManager(os.path.join(directory, "changelog.json"), directory, writer_mode="sync")
+    on_disk, _ = reloaded.query_entries(action="stress")
+    disk_ids = [entry["id"] for entry in on_disk]
+    if disk_ids != ids:
+        missing = len(set(ids) - set(disk_ids))
+        extra = len(disk_ids) - len(set(disk_ids))
+        errors.append(f"segments hold {len(disk_ids)} entries for {len(ids)} ids "
+                      f"({missing} missing, {extra} duplicated or out of order)")
+    reloaded.close()
+
+    print(f"{mode:<6} {writers} writers x {entries} entries, {readers} readers: "
+          f"{total / elapsed:10,.0f} entries/s, {reads[0]:,} reads, {len(disk_ids):,} on disk")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress ChangelogManager with concurrent writers and readers")
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--entries", type=int, default=2000, help="entries per writer")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--mode", choices=("async", "sync", "both"), default="both", help="changelog writer mode")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="changelog-stress-")
+    # Keep every portal path inside the temp dir so the working directory's changelog is never touched
+    os.environ["CHANGELOG_FILE"] = os.path.join(directory, "changelog.json")
+    os.environ["CHANGELOG_DIR"] = os.path.join(directory, "portal")
+    os.environ["LOG_FILE"] = ""
+    # Size the queue for the whole run so drops (expected under overload) do not mask lost entries
+    os.environ.setdefault("CHANGELOG_QUEUE_SIZE", str(args.writers * args.entries))
+    import app as portal
+    logging.getLogger().setLevel(logging.WARNING)
+
+    failures = []
+    try:
+        for mode in (("async", "sync") if args.mode == "both" else (args.mode,)):
+            for error in run(portal, os.path.join(directory, mode), mode, args.writers, args.entries, args.readers):
+                failures.append(f"{mode}: {error}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ No lost, duplicate or reordered entries")
+
+
+if __name__ == '__main__':
+    main()
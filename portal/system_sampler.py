@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - System Sampler
+Background CPU/memory/disk/network sampling so requests never wait on psutil
+"""
+
+import time
+import threading
+import logging
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # metrics endpoints report the sampler as unavailable
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+
+class SystemSampler:
+    """Samples host metrics every `interval` seconds into a shared, read-only dict.
+
+    Readers get the latest sample with latest(); it is replaced wholesale on
+    each tick, never mutated, so no locking is needed to read it.
+    """
+
+    def __init__(self, interval=5.0, disk_path='/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._latest = None
+        self._previous_net = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._listeners = []
+        self.samples = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_duration_ms = None
+
+    def add_listener(self, callback):
+        """Call `callback(sample)` on the sampler thread after every sample"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Take a first sample and start the background thread (idempotent)"""
+        with self._start_lock:
+            if self._thread is not None or psutil is None:
+                return
+            # cpu_percent(None) measures since the previous call, so prime it
+            # with one short blocking window; every later tick is non-blocking
+            psutil.cpu_percent(interval=0.1)
+            self._tick()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="system-sampler")
+            self._thread.start()
+            logger.info(f"System sampler started ({self.interval}s interval)")
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(5)
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self._tick()
+
+    def _tick(self):
+        started = time.perf_counter()
+        try:
+            sample = self._latest = self.sample()
+            self.samples += 1
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logger.error(f"Error sampling system metrics: {e}")
+        else:
+            for listener in self._listeners:
+                try:
+                    listener(sample)
+                except Exception as e:
+                    logger.error(f"Error in system sample listener: {e}")
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def sample(self):
+        """Collect one sample; CPU is the utilisation since the previous sample"""
+        now = time.time()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        net = psutil.net_io_counters()
+
+        net_rate = {"bytes_sent_per_sec": 0.0, "bytes_recv_per_sec": 0.0}
+        if self._previous_net:
+            previous_time, previous = self._previous_net
+            elapsed = now - previous_time
+            if elapsed > 0:
+                net_rate = {
+                    "bytes_sent_per_sec": round(max(net.bytes_sent - previous.bytes_sent, 0) / elapsed, 1),
+                    "bytes_recv_per_sec": round(max(net.bytes_recv - previous.bytes_recv, 0) / elapsed, 1)
+                }
+        self._previous_net = (now, net)
+
+        return {
+            "time": now,
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "cpu_percent": round(psutil.cpu_percent(interval=None), 1),
+            "memory_percent": round(memory.percent, 1),
+            "memory_used_gb": round(memory.used / GB, 2),
+            "memory_total_gb": round(memory.total / GB, 2),
+            "disk_percent": round(disk.percent, 1),
+            "disk_used_gb": round(disk.used / GB, 2),
+            "disk_total_gb": round(disk.total / GB, 2),
+            "network": {
+                "bytes_sent": net.bytes_sent,
+                "bytes_recv": net.bytes_recv,
+                "packets_sent": net.packets_sent,
+                "packets_recv": net.packets_recv,
+                "errors_in": net.errin,
+                "errors_out": net.errout
+            },
+            "network_rate": net_rate
+        }
+
+    def latest(self):
+        """The most recent sample, or None before the first one"""
+        return self._latest
+
+    def age(self):
+        """Seconds since the latest sample was taken"""
+        latest = self._latest
+        return round(time.time() - latest["time"], 3) if latest else None
+
+    def get_health(self):
+        """Sampler state for API responses and /health"""
+        age = self.age()
+        if psutil is None:
+            status = "unavailable"
+        elif age is None:
+            status = "starting"
+        elif age > 3 * self.interval:
+            status = "stale"
+        else:
+            status = "healthy"
+        return {
+            "status": status,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval": self.interval,
+            "sample_age": age,
+            "samples": self.samples,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_duration_ms": self.last_duration_ms
+        }
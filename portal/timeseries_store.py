@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Time-Series Store
+Fixed-memory ring buffers with 10s/1m/1h rollup tiers for dashboard trends
+"""
+
+import os
+import sys
+import json
+import zlib
+import math
+import time
+import threading
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# (resolution seconds, buckets kept): 1 hour of 10s, 2 days of 1m, 30 days of 1h
+DEFAULT_TIERS = ((10, 360), (60, 2880), (3600, 720))
+
+FILE_MAGIC = "cyberblue-tsdb"
+FILE_VERSION = 1
+
+
+class RingSeries:
+    """One series at one resolution: parallel typed arrays indexed by bucket % capacity"""
+
+    __slots__ = ("resolution", "capacity", "slots", "mins", "maxs", "sums", "counts")
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        # Absolute bucket number held in each slot (-1 = empty)
+        self.slots = array('q', [-1]) * capacity
+        self.mins = array('d', [0.0]) * capacity
+        self.maxs = array('d', [0.0]) * capacity
+        self.sums = array('d', [0.0]) * capacity
+        self.counts = array('q', [0]) * capacity
+
+    def add(self, timestamp, value):
+        bucket = int(timestamp // self.resolution)
+        pos = bucket % self.capacity
+        if self.slots[pos] != bucket:
+            if self.slots[pos] > bucket:
+                return  # older than anything the ring still holds
+            self.slots[pos] = bucket
+            self.mins[pos] = self.maxs[pos] = self.sums[pos] = value
+            self.counts[pos] = 1
+            return
+        if value < self.mins[pos]:
+            self.mins[pos] = value
+        if value > self.maxs[pos]:
+            self.maxs[pos] = value
+        self.sums[pos] += value
+        self.counts[pos] += 1
+
+    def window(self, first_bucket, last_bucket, group=1):
+        """Aggregate buckets first..last in groups of `group` -> (starts, mins, avgs, maxs)"""
+        starts, mins, avgs, maxs = [], [], [], []
+        group_start = (first_bucket // group) * group
+        while group_start <= last_bucket:
+            low = high = None
+            total = 0.0
+            count = 0
+            for bucket in range(max(group_start, first_bucket), min(group_start + group, last_bucket + 1)):
+                pos = bucket % self.capacity
+                if self.slots[pos] != bucket:
+                    continue
+                low = self.mins[pos] if low is None else min(low, self.mins[pos])
+                high = self.maxs[pos] if high is None else max(high, self.maxs[pos])
+                total += self.sums[pos]
+                count += self.counts[pos]
+            starts.append(group_start * self.resolution)
+            mins.append(None if count == 0 else round(low, 2))
+            avgs.append(None if count == 0 else round(total / count, 2))
+            maxs.append(None if count == 0 else round(high, 2))
+            group_start += group
+        return starts, mins, avgs, maxs
+
+    def arrays(self):
+        return (self.slots, self.mins, self.maxs, self.sums, self.counts)
+
+
+class TimeSeriesStore:
+    """Named series, each kept at every tier. Every sample updates all tiers, so
+    queries read pre-aggregated buckets and never scan raw samples."""
+
+    def __init__(self, path=None, tiers=DEFAULT_TIERS):
+        self.path = path
+        self.tiers = tuple(tuple(tier) for tier in tiers)
+        self._series = {}
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.last_saved = None
+
+    def _rings(self, name):
+        rings = self._series.get(name)
+        if rings is None:
+            rings = self._series[name] = [RingSeries(res, cap) for res, cap in self.tiers]
+        return rings
+
+    def record(self, values, timestamp=None):
+        """Record {series name: value} observed at `timestamp`"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                for ring in self._rings(name):
+                    ring.add(timestamp, float(value))
+            self.samples += 1
+
+    def remove(self, names):
+        """Drop series and free their buffers"""
+        with self._lock:
+            for name in names:
+                self._series.pop(name, None)
+
+    def series_names(self, prefix=""):
+        with self._lock:
+            return sorted(name for name in self._series if name.startswith(prefix))
+
+    def pick_tier(self, window):
+        """Finest tier whose ring covers `window` seconds (else the coarsest)"""
+        for index, (resolution, capacity) in enumerate(self.tiers):
+            if resolution * capacity >= window:
+                return index
+        return len(self.tiers) - 1
+
+    def query(self, names, window, now=None, max_points=None):
+        """min/avg/max per bucket for each series over the last `window` seconds.
+
+        Returns (resolution, starts, {name: {"min", "avg", "max"}}); with
+        `max_points`, adjacent buckets are merged so at most that many are returned.
+        """
+        now = time.time() if now is None else now
+        tier = self.pick_tier(window)
+        resolution, capacity = self.tiers[tier]
+        last_bucket = int(now // resolution)
+        count = min(int(math.ceil(window / resolution)), capacity)
+        group = int(math.ceil(count / max_points)) if max_points else 1
+        first_bucket = last_bucket - count + 1
+
+        starts = [bucket * resolution for bucket in range((first_bucket // group) * group, last_bucket + 1, group)]
+        result = {}
+        with self._lock:
+            for name in names:
+                rings = self._series.get(name)
+                if rings is None:
+                    empty = [None] * len(starts)
+                    result[name] = {"min": empty, "avg": empty, "max": empty}
+                    continue
+                _, mins, avgs, maxs = rings[tier].window(first_bucket, last_bucket, group)
+                result[name] = {"min": mins, "avg": avgs, "max": maxs}
+        return resolution * group, starts, result
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """Write every ring as zlib-compressed typed arrays after a one-line JSON header"""
+        if not self.path:
+            return
+        with self._lock:
+            names = sorted(self._series)
+            header = {
+                "magic": FILE_MAGIC,
+                "version": FILE_VERSION,
+                "tiers": self.tiers,
+                "series": names,
+                "byteorder": sys.byteorder
+            }
+            compressor = zlib.compressobj(1)
+            chunks = [json.dumps(header).encode('utf-8') + b'\n']
+            for name in names:
+                for ring in self._series[name]:
+                    chunks.extend(compressor.compress(a.tobytes()) for a in ring.arrays())
+            chunks.append(compressor.flush())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.last_saved = time.time()
+
+    def load(self):
+        """Restore rings saved with the same tier layout; anything else is ignored"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                if (header.get("magic") != FILE_MAGIC or header.get("version") != FILE_VERSION
+                        or [tuple(t) for t in header.get("tiers", [])] != list(self.tiers)):
+                    logger.warning(f"Ignoring metrics history in {self.path}: different layout")
+                    return False
+                swap = header.get("byteorder") != sys.byteorder
+                body = zlib.decompress(f.read())
+                offset = 0
+                series = {}
+                for name in header["series"]:
+                    rings = []
+                    for resolution, capacity in self.tiers:
+                        ring = RingSeries(resolution, capacity)
+                        for a in ring.arrays():
+                            size = a.itemsize * capacity
+                            if offset + size > len(body):
+                                raise ValueError("truncated file")
+                            a[:] = array(a.typecode, body[offset:offset + size])
+                            offset += size
+                            if swap:
+                                a.byteswap()
+                        rings.append(ring)
+                    series[name] = rings
+        except Exception as e:
+            logger.error(f"Error loading metrics history from {self.path}: {e}")
+            return False
+        with self._lock:
+            self._series = series
+        logger.info(f"Loaded metrics history for {len(series)} series from {self.path}")
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            series = len(self._series)
+        per_series = sum(cap * 8 * 5 for _, cap in self.tiers)
+        return {
+            "series": series,
+            "tiers": [f"{res}s x {cap}" for res, cap in self.tiers],
+            "memory_bytes": series * per_series,
+            "samples": self.samples,
+            "last_saved": self.last_saved
+        }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox Portal - Tool Registry
+Resolves portal tool names to the Docker containers that run them
+"""
+
+import re
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Compose project names the stack is started under; containers are named
+# <project>-<service>-<replica>
+DEFAULT_COMPOSE_PROJECTS = ["cyber-blue-test"]
+
+# Tool name -> container names to try, in order of preference. "{project}"
+# stands for each configured compose project.
+DEFAULT_TOOL_CONTAINERS = {
+    "velociraptor": ["velociraptor"],
+    "wazuh": ["wazuh", "wazuh-dashboard", "{project}-wazuh.dashboard-1"],
+    "wazuh-dashboard": ["wazuh", "wazuh-dashboard", "{project}-wazuh.dashboard-1"],
+    "misp": ["misp", "misp-core", "{project}-misp-core-1"],
+    "cyberchef": ["{project}-cyberchef-1", "cyberchef"],
+    "thehive": ["{project}-thehive-1", "thehive"],
+    "cortex": ["{project}-cortex-1", "cortex"],
+    "fleetdm": ["fleet-server", "{project}-fleet-server-1"],
+    "arkime": ["arkime-test", "arkime", "{project}-arkime-1"],
+    "caldera": ["caldera", "{project}-caldera-1"],
+    "evebox": ["evebox", "{project}-evebox-1"],
+    "wireshark": ["wireshark", "{project}-wireshark-1"],
+    "mitre": ["mitre-navigator", "{project}-mitre-navigator-1"],
+    "mitre-navigator": ["mitre-navigator", "{project}-mitre-navigator-1"],
+    "portainer": ["portainer", "{project}-portainer-1"],
+    "shuffle": ["shuffle-frontend", "{project}-shuffle-frontend-1"]
+}
+
+# Category -> {container: [containers it depends on]} for bulk actions, taken
+# from the compose depends_on/links of the stack
+DEFAULT_CATEGORIES = {
+    "siem": {
+        "wazuh-indexer": [],
+        "wazuh-manager": [],
+        "wazuh-dashboard": ["wazuh-indexer", "wazuh-manager"]
+    },
+    "cti": {
+        "misp-redis": [],
+        "misp-db": [],
+        "misp-modules": [],
+        "misp-mail": [],
+        "misp-core": ["misp-redis", "misp-db", "misp-modules"],
+        "mitre-navigator": []
+    },
+    "soar": {
+        "elasticsearch": [],
+        "thehive": [],
+        "cortex": ["elasticsearch"],
+        "shuffle-opensearch": [],
+        "shuffle-backend": [],
+        "shuffle-orborus": [],
+        "shuffle-frontend": ["shuffle-backend"]
+    },
+    "ids": {
+        "suricata": [],
+        "evebox": [],
+        "arkime": []
+    },
+    "dfir": {
+        "velociraptor": []
+    },
+    "utility": {
+        "cyberchef": [],
+        "wireshark": []
+    },
+    "management": {
+        "fleet-mysql": [],
+        "fleet-redis": [],
+        "fleet-server": ["fleet-mysql", "fleet-redis"],
+        "portainer": []
+    }
+}
+
+_SERVICE_TEMPLATE = re.compile(r'^\{project\}-(?P<service>.+)-\d+$')
+
+
+class ToolRegistry:
+    """Tool -> container resolution with a reverse index from container name to tools.
+
+    Candidates are compiled once. Exact names match first, in the listed order.
+    Any container named <project>-<service>-<replica> for a configured project
+    matches a tool that lists that service, either as a "{project}-..." template
+    or as a plain name (at lower priority). Resolution is recomputed only when the
+    set of container names changes.
+    """
+
+    def __init__(self, tools=None, projects=None, categories=None):
+        self.tools = dict(tools or DEFAULT_TOOL_CONTAINERS)
+        self.projects = [self._normalize_project(p) for p in (projects or DEFAULT_COMPOSE_PROJECTS)]
+        self.categories = dict(categories or DEFAULT_CATEGORIES)
+        self._lock = threading.Lock()
+        self._names_key = None
+        self._source = None
+        self._resolved = {}
+        self._by_container = {}
+        self._compile()
+
+    @classmethod
+    def from_file(cls, path=None, projects=None):
+        """Defaults, extended by a JSON file of {"projects": [...], "tools": {tool: [names]},
+        "categories": {category: {container: [dependencies]}}}"""
+        tools = dict(DEFAULT_TOOL_CONTAINERS)
+        categories = dict(DEFAULT_CATEGORIES)
+        projects = list(projects or DEFAULT_COMPOSE_PROJECTS)
+        if path:
+            try:
+                with open(path, 'r') as f:
+                    config = json.load(f)
+                tools.update(config.get("tools", {}))
+                categories.update(config.get("categories", {}))
+                for project in config.get("projects", []):
+                    if project not in projects:
+                        projects.append(project)
+            except Exception as e:
+                logger.error(f"Error loading tool registry from {path}, using defaults: {e}")
+        return cls(tools, projects, categories)
+
+    @staticmethod
+    def _normalize_project(project):
+        # Accept "cyber-blue-test-*" as well as the bare project name
+        return project.strip().rstrip('*').rstrip('-')
+
+    def _compile(self):
+        """Build the exact-name and compose-service indexes"""
+        self._exact = {}
+        self._services = {}
+        for tool, candidates in self.tools.items():
+            fallback = len(candidates)
+            for rank, candidate in enumerate(candidates):
+                match = _SERVICE_TEMPLATE.match(candidate)
+                if match:
+                    for project in self.projects:
+                        self._exact.setdefault(candidate.replace("{project}", project), []).append((tool, rank))
+                    self._services.setdefault(match.group("service"), []).append((tool, fallback + rank))
+                else:
+                    self._exact.setdefault(candidate, []).append((tool, rank))
+                    self._services.setdefault(candidate, []).append((tool, 2 * fallback + rank))
+        if self.projects:
+            alternatives = "|".join(re.escape(p) for p in self.projects)
+            self._compose_name = re.compile(rf'^(?:{alternatives})-(?P<service>.+)-\d+$')
+        else:
+            self._compose_name = None
+
+    def default_container_name(self, tool):
+        """Name reported for a tool whose container is not present"""
+        candidates = self.tools.get(tool)
+        if not candidates:
+            return tool
+        project = self.projects[0] if self.projects else ""
+        return candidates[0].replace("{project}", project)
+
+    def _matches(self, name):
+        matches = list(self._exact.get(name, ()))
+        if self._compose_name:
+            compose = self._compose_name.match(name)
+            if compose:
+                matches.extend(self._services.get(compose.group("service"), ()))
+        return matches
+
+    def _state(self, container_names):
+        """(tool -> container, container -> tools) for a set of names, cached"""
+        with self._lock:
+            # A shared status snapshot is immutable, so the same object means the same names
+            if container_names is self._source:
+                return self._resolved, self._by_container
+            key = frozenset(container_names)
+            if key != self._names_key:
+                best = {}
+                by_container = {}
+                for name in key:
+                    for tool, rank in self._matches(name):
+                        by_container.setdefault(name, set()).add(tool)
+                        if tool not in best or (rank, name) < best[tool]:
+                            best[tool] = (rank, name)
+                self._resolved = {tool: name for tool, (_, name) in best.items()}
+                self._by_container = {name: sorted(tools) for name, tools in by_container.items()}
+                self._names_key = key
+            self._source = container_names
+            return self._resolved, self._by_container
+
+    def resolve(self, container_names):
+        """Map each tool to its container among `container_names`"""
+        return self._state(container_names)[0]
+
+    def container_for_tool(self, tool, container_names):
+        """Container running `tool`, or None if it is not present"""
+        return self._state(container_names)[0].get(tool)
+
+    def tools_for_container(self, container_name, container_names):
+        """Tools served by a container (reverse lookup)"""
+        return self._state(container_names)[1].get(container_name, [])
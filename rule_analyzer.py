@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox - Rule Analyzer
+Audits the Suricata rule set and writes a pruned, deduplicated bundle of the enabled rules
+
+Usage:
+    python3 rule_analyzer.py report                       # findings and per-file cost
+    python3 rule_analyzer.py bundle --write-config suricata/suricata-bundle.yaml
+    python3 rule_analyzer.py bench [--suricata /usr/bin/suricata]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import subprocess
+
+DEFAULT_CONFIG = os.path.join("suricata", "suricata.yaml")
+DEFAULT_BUNDLE = "cyberblue-bundle.rules"
+PRUNE_CHOICES = ("no-fast-pattern", "broad-ip-only", "dead-flowbits")
+
+# Rule header: action proto src sport direction dst dport, then the option list
+HEADER_RE = re.compile(r'^\s*(#\s*)?(alert|drop|pass|reject|rejectsrc|rejectdst|rejectboth)\s+(\S+)\s+'
+                       r'(.+?)\s+(\S+)\s+(->|<>)\s+(.+?)\s+(\S+)\s*\((.*)\)\s*$')
+# One `keyword;` or `keyword:value;` option; quoted values may hold escaped quotes and semicolons
+OPTION_RE = re.compile(r'\s*([A-Za-z0-9_.\-]+)\s*(?::\s*((?:"(?:[^"\\]|\\.)*"|\\.|[^;"\\])*))?\s*;')
+# Keywords that do not inspect packets; a rule with nothing else only looks at addresses
+NON_INSPECTING = {"msg", "sid", "rev", "gid", "classtype", "reference", "metadata", "priority", "target",
+                  "threshold", "noalert", "tag"}
+FLOWBITS_POSTMATCH = ("set", "unset", "toggle", "noalert")
+EVENT_KEYWORDS = {"app-layer-event", "decode-event", "stream-event", "engine-event"}
+PAYLOAD_KEYWORDS = {"pcre", "byte_test", "byte_jump", "byte_extract", "byte_math", "isdataat", "dsize",
+                    "base64_decode", "entropy"}
+
+
+class RuleError(Exception):
+    """Raised when the Suricata configuration cannot be read"""
+
+
+class Rule:
+    """One rule line, with just enough structure for auditing and bundling"""
+
+    __slots__ = ("file", "line", "enabled", "action", "proto", "src", "sport", "direction", "dst", "dport",
+                 "options", "text", "gid", "sid", "rev", "msg")
+
+    def __init__(self, file, line, enabled, header, options, text):
+        self.file = file
+        self.line = line
+        self.enabled = enabled
+        self.action, self.proto, self.src, self.sport, self.direction, self.dst, self.dport = header
+        self.options = options
+        self.text = text
+        values = {}
+        for key, value in options:
+            values.setdefault(key, value)
+        self.gid = int(values["gid"]) if values.get("gid", "").isdigit() else 1
+        self.sid = int(values["sid"]) if values.get("sid", "").isdigit() else None
+        self.rev = int(values["rev"]) if values.get("rev", "").isdigit() else 0
+        self.msg = (values.get("msg") or "").strip('"')
+
+    def keywords(self):
+        return [key for key, _ in self.options]
+
+    def contents(self):
+        """Positive content patterns, the only candidates for the multi-pattern prefilter"""
+        return [value for key, value in self.options
+                if key == "content" and value and not value.lstrip().startswith("!")]
+
+    def flowbits(self):
+        """[(command, name)] of the rule's flowbits options"""
+        bits = []
+        for key, value in self.options:
+            if key == "flowbits" and value:
+                parts = [part.strip() for part in value.split(",", 1)]
+                bits.append((parts[0], parts[1] if len(parts) > 1 else ""))
+        return bits
+
+    def checks_unset_flowbit(self, set_bits):
+        """Requires a flowbit that no rule in `set_bits` sets, so it can never fire"""
+        for command, name in self.flowbits():
+            if command != "isset":
+                continue
+            if "|" in name:
+                if not any(bit.strip() in set_bits for bit in name.split("|")):
+                    return True
+            elif any(bit.strip() not in set_bits for bit in name.split("&")):
+                return True
+        return False
+
+    def is_ip_only(self):
+        """Only addresses (and protocol) decide a match: Suricata's cheap IP-only class"""
+        if self.sport != "any" or self.dport != "any":
+            return False
+        for key, value in self.options:
+            if key in NON_INSPECTING:
+                continue
+            if key == "flowbits" and (value or "").split(",")[0].strip() in FLOWBITS_POSTMATCH:
+                continue
+            return False
+        return True
+
+    def is_broad_ip_only(self):
+        """IP-only with no concrete address on either side, i.e. it matches all traffic between networks"""
+        return self.is_ip_only() and not _has_address(self.src) and not _has_address(self.dst)
+
+    def is_event_only(self):
+        return any(key in EVENT_KEYWORDS for key in self.keywords()) and not self.contents()
+
+    def lacks_fast_pattern(self):
+        """Inspects packets but has no positive content for the prefilter, so it runs on every
+        packet its header matches"""
+        return not self.is_ip_only() and not self.is_event_only() and not self.contents()
+
+    def address_count(self):
+        return _list_size(self.src) + _list_size(self.dst)
+
+    def load_cost(self):
+        """Relative cost of parsing and building this rule at startup"""
+        keywords = self.keywords()
+        content_bytes = sum(len(value) for value in self.contents())
+        return (1 + 0.2 * len(keywords) + 5 * keywords.count("pcre") + 0.02 * content_bytes
+                + 0.05 * self.address_count())
+
+    def match_cost(self):
+        """Relative per-packet cost once loaded"""
+        keywords = self.keywords()
+        pcres = keywords.count("pcre")
+        if self.is_ip_only() or self.is_event_only():
+            return 0.5
+        if self.contents():
+            # Only evaluated when its fast pattern hits
+            return 1 + 2 * pcres
+        breadth = 5 if self.dport == "any" and self.sport == "any" else 1
+        return 20 * breadth + 30 * pcres + 5 * sum(keywords.count(k) for k in PAYLOAD_KEYWORDS)
+
+
+def _has_address(spec):
+    return bool(re.search(r'(^|[\[,!\s])\d', spec)) or ":" in spec.replace("::", ":")
+
+
+def _list_size(spec):
+    return spec.count(",") + 1 if spec.startswith("[") or spec.startswith("![") else 1
+
+
+def parse_rule_text(text, file="", line=0):
+    """A Rule from one (possibly commented-out) rule line, or None for other lines"""
+    match = HEADER_RE.match(text)
+    if not match:
+        return None
+    commented, action, proto, src, sport, direction, dst, dport, body = match.groups()
+    options = [(key, value.strip() if value is not None else None) for key, value in OPTION_RE.findall(body)]
+    if not options:
+        return None
+    return Rule(file, line, not commented, (action, proto, src, sport, direction, dst, dport), options,
+                text.lstrip("# \t") if commented else text.strip())
+
+
+def parse_rule_file(path):
+    """Every rule in a file, commented-out ones included (enabled=False)"""
+    rules = []
+    name = os.path.basename(path)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        pending = ""
+        start = 0
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            # A trailing backslash continues the rule on the next line
+            if line.endswith("\\"):
+                if not pending:
+                    start = number
+                pending += line[:-1]
+                continue
+            if pending:
+                line, pending = pending + line, ""
+            else:
+                start = number
+            stripped = line.lstrip()
+            if not stripped or (stripped.startswith("#") and "(" not in stripped):
+                continue
+            rule = parse_rule_text(line, name, start)
+            if rule is not None:
+                rules.append(rule)
+    return rules
+
+
+def read_rule_config(config_path):
+    """(default-rule-path, enabled files, disabled files) from suricata.yaml.
+
+    Only the two top-level keys are needed, so they are read line by line
+    rather than with a YAML parser: `rule-files:` list items count as enabled,
+    commented-out items (`# - name.rules`) as disabled.
+    """
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        raise RuleError(f"Cannot read {config_path}: {e}")
+    rule_path = None
+    enabled, disabled = [], []
+    in_list = False
+    for line in lines:
+        if line.startswith("default-rule-path:"):
+            rule_path = line.split(":", 1)[1].split("#", 1)[0].strip().strip('"\'')
+            continue
+        if line.startswith("rule-files:"):
+            in_list = True
+            continue
+        if not in_list:
+            continue
+        item = re.match(r'^\s*(#\s*)?-\s*([^\s#]+)', line)
+        if item:
+            (disabled if item.group(1) else enabled).append(item.group(2).strip('"\''))
+        elif line.strip() and not line.lstrip().startswith("#"):
+            break  # the next top-level key
+    if not enabled and not disabled:
+        raise RuleError(f"No rule-files list in {config_path}")
+    return rule_path, enabled, disabled
+
+
+class RuleSet:
+    """Every rule file in a directory, plus which of them suricata.yaml enables"""
+
+    def __init__(self, rules_dir, enabled_files, disabled_files=()):
+        self.rules_dir = rules_dir
+        self.enabled_files = list(enabled_files)
+        self.disabled_files = list(disabled_files)
+        self.files = {}
+        for name in sorted(os.listdir(rules_dir)):
+            # A bundle written earlier would otherwise duplicate every rule it holds
+            if name.endswith(".rules") and (name != DEFAULT_BUNDLE or name in self.enabled_files):
+                self.files[name] = parse_rule_file(os.path.join(rules_dir, name))
+        self.missing_files = [name for name in self.enabled_files if name not in self.files]
+
+    @classmethod
+    def from_config(cls, config_path, rules_dir=None):
+        _, enabled, disabled = read_rule_config(config_path)
+        rules_dir = rules_dir or os.path.join(os.path.dirname(config_path) or ".", "rules")
+        return cls(rules_dir, enabled, disabled)
+
+    def loaded_rules(self):
+        """What Suricata loads: uncommented rules of the enabled files, in config order"""
+        for name in self.enabled_files:
+            for rule in self.files.get(name, ()):
+                if rule.enabled:
+                    yield rule
+
+    def duplicates(self, loaded_only=False):
+        """{(gid, sid): [rules]} for SIDs defined more than once"""
+        seen = {}
+        rules = self.loaded_rules() if loaded_only else (r for rules in self.files.values() for r in rules if r.enabled)
+        for rule in rules:
+            if rule.sid is not None:
+                seen.setdefault((rule.gid, rule.sid), []).append(rule)
+        return {key: rules for key, rules in seen.items() if len(rules) > 1}
+
+    def set_flowbits(self):
+        """Flowbits set (or toggled) by some loaded rule"""
+        return {name for rule in self.loaded_rules() for command, name in rule.flowbits()
+                if command in ("set", "toggle")}
+
+    def file_report(self):
+        """Per-file rule counts, findings and estimated costs, costliest first"""
+        enabled = set(self.enabled_files)
+        set_bits = self.set_flowbits()
+        report = []
+        for name, rules in self.files.items():
+            active = [rule for rule in rules if rule.enabled]
+            report.append({
+                "file": name,
+                "loaded": name in enabled,
+                "rules": len(active),
+                "commented_out": len(rules) - len(active),
+                "no_fast_pattern": sum(1 for rule in active if rule.lacks_fast_pattern()),
+                "ip_only": sum(1 for rule in active if rule.is_ip_only()),
+                "broad_ip_only": sum(1 for rule in active if rule.is_broad_ip_only()),
+                "dead_flowbits": sum(1 for rule in active if rule.checks_unset_flowbit(set_bits)),
+                "pcre": sum(rule.keywords().count("pcre") for rule in active),
+                "load_cost": round(sum(rule.load_cost() for rule in active), 1),
+                "match_cost": round(sum(rule.match_cost() for rule in active), 1),
+                "bytes": os.path.getsize(os.path.join(self.rules_dir, name))
+            })
+        report.sort(key=lambda entry: (not entry["loaded"], -entry["match_cost"]))
+        return report
+
+
+def build_bundle(ruleset, prune=()):
+    """(kept rules, {reason: [dropped rules]}) for the enabled set.
+
+    Duplicated SIDs keep the highest revision (the first loaded on a tie).
+    Pruned rules that set a flowbit some kept rule checks are kept, or that
+    rule could never fire.
+    """
+    dropped = {"duplicate": [], "no-fast-pattern": [], "broad-ip-only": [], "dead-flowbits": [], "no-sid": []}
+    best = {}
+    order = []
+    for rule in ruleset.loaded_rules():
+        if rule.sid is None:
+            dropped["no-sid"].append(rule)
+            continue
+        key = (rule.gid, rule.sid)
+        current = best.get(key)
+        if current is None:
+            best[key] = rule
+            order.append(key)
+        elif rule.rev > current.rev:
+            dropped["duplicate"].append(current)
+            best[key] = rule
+        else:
+            dropped["duplicate"].append(rule)
+    candidates = [best[key] for key in order]
+    set_bits = ruleset.set_flowbits()
+
+    def prune_reason(rule):
+        if "no-fast-pattern" in prune and rule.lacks_fast_pattern():
+            return "no-fast-pattern"
+        if "broad-ip-only" in prune and rule.is_broad_ip_only():
+            return "broad-ip-only"
+        if "dead-flowbits" in prune and rule.checks_unset_flowbit(set_bits):
+            return "dead-flowbits"
+        return None
+
+    reasons = {id(rule): prune_reason(rule) for rule in candidates}
+    # Keep setters of any flowbit a surviving rule checks; repeat, since setters can check bits too
+    while True:
+        checked = {name for rule in candidates if reasons[id(rule)] is None
+                   for command, name in rule.flowbits() if command in ("isset", "isnotset")}
+        rescued = [rule for rule in candidates if reasons[id(rule)] is not None
+                   and any(command in ("set", "toggle") and name in checked for command, name in rule.flowbits())]
+        if not rescued:
+            break
+        for rule in rescued:
+            reasons[id(rule)] = None
+    kept = []
+    for rule in candidates:
+        reason = reasons[id(rule)]
+        if reason is None:
+            kept.append(rule)
+        else:
+            dropped[reason].append(rule)
+    return kept, dropped
+
+
+def write_bundle(path, kept, dropped, ruleset):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# CyberBlueBox rule bundle generated by rule_analyzer.py on "
+                f"{time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"# {len(kept)} rules from {len(ruleset.enabled_files) - len(ruleset.missing_files)} enabled files; "
+                + ", ".join(f"{len(rules)} {reason}" for reason, rules in dropped.items() if rules) + " removed\n")
+        current = None
+        for rule in kept:
+            if rule.file != current:
+                current = rule.file
+                f.write(f"\n# --- {current}\n")
+            f.write(rule.text + "\n")
+
+
+def write_bundle_config(config_path, output_path, bundle_name):
+    """Copy suricata.yaml with the rule-files list replaced by the bundle"""
+    with open(config_path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    out = []
+    in_list = False
+    for line in lines:
+        if line.startswith("rule-files:"):
+            in_list = True
+            out.append(line)
+            out.append(f" - {bundle_name}")
+            continue
+        if in_list:
+            if re.match(r'^\s*(#\s*)?-\s', line) or not line.strip():
+                continue
+            if line.lstrip().startswith("#"):
+                continue
+            in_list = False
+        out.append(line)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out) + "\n")
+
+
+def print_report(ruleset, top):
+    loaded = list(ruleset.loaded_rules())
+    print(f"📋 {sum(len(r) for r in ruleset.files.values())} rule lines in {len(ruleset.files)} files; "
+          f"{len(loaded)} rules loaded from {len(ruleset.enabled_files) - len(ruleset.missing_files)} enabled files")
+    if ruleset.missing_files:
+        print(f"⚠️  Enabled in suricata.yaml but not in {ruleset.rules_dir}: {', '.join(ruleset.missing_files)}")
+
+    duplicates = ruleset.duplicates()
+    loaded_duplicates = ruleset.duplicates(loaded_only=True)
+    print(f"\n🔁 Duplicate SIDs: {len(duplicates)} across all files, {len(loaded_duplicates)} among loaded rules")
+    for (gid, sid), rules in sorted(loaded_duplicates.items())[:top]:
+        places = ", ".join(f"{r.file}:{r.line} rev {r.rev}" for r in rules)
+        print(f"  {gid}:{sid} {rules[0].msg[:60]} - {places}")
+
+    no_fast = [rule for rule in loaded if rule.lacks_fast_pattern()]
+    print(f"\n🐢 Loaded rules without a fast_pattern-able content: {len(no_fast)}")
+    for rule in sorted(no_fast, key=lambda r: -r.match_cost())[:top]:
+        print(f"  {rule.sid} {rule.file}:{rule.line} {rule.proto} {rule.sport}->{rule.dport} {rule.msg[:60]}")
+
+    ip_only = [rule for rule in loaded if rule.is_ip_only()]
+    broad = [rule for rule in ip_only if rule.is_broad_ip_only()]
+    print(f"\n🌐 IP-only rules loaded: {len(ip_only)} "
+          f"({sum(rule.address_count() for rule in ip_only)} address entries), {len(broad)} with no concrete address")
+    for rule in broad[:top]:
+        print(f"  {rule.sid} {rule.file}:{rule.line} {rule.src} -> {rule.dst} {rule.msg[:60]}")
+
+    set_bits = ruleset.set_flowbits()
+    dead = [rule for rule in loaded if rule.checks_unset_flowbit(set_bits)]
+    print(f"\n💤 Loaded rules checking a flowbit no loaded rule sets (can never fire): {len(dead)}")
+    for rule in dead[:top]:
+        bits = ", ".join(name for command, name in rule.flowbits() if command == "isset")
+        print(f"  {rule.sid} {rule.file}:{rule.line} isset {bits} {rule.msg[:50]}")
+
+    print("\n💰 Estimated cost per file (relative units; loaded files first)")
+    print(f"  {'file':<36} {'loaded':>6} {'rules':>6} {'no-fp':>6} {'ip-only':>7} {'dead':>5} {'pcre':>5} "
+          f"{'load':>9} {'match':>9}")
+    for entry in ruleset.file_report():
+        print(f"  {entry['file']:<36} {'yes' if entry['loaded'] else 'no':>6} {entry['rules']:>6} "
+              f"{entry['no_fast_pattern']:>6} {entry['ip_only']:>7} {entry['dead_flowbits']:>5} {entry['pcre']:>5} "
+              f"{entry['load_cost']:>9,.0f} {entry['match_cost']:>9,.0f}")
+
+
+def _timed_parse(paths, rounds):
+    best = None
+    for _ in range(rounds):
+        tracemalloc.start()
+        started = time.perf_counter()
+        rules = [rule for path in paths for rule in parse_rule_file(path) if rule.enabled]
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if best is None or elapsed < best[0]:
+            best = (elapsed, peak, len(rules), sum(os.path.getsize(p) for p in paths))
+    return best
+
+
+def _run_suricata(binary, args):
+    """(seconds, peak RSS MB, return code) of one `suricata -T` run.
+
+    The peak comes from the child's own VmHWM: wait4's ru_maxrss would also
+    count this process, which the child inherits across fork.
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen([binary] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak_kb = 0
+    while process.poll() is None:
+        try:
+            with open(f"/proc/{process.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peak_kb = max(peak_kb, int(line.split()[1]))
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.05)
+    return time.perf_counter() - started, peak_kb / 1024, process.returncode
+
+
+def bench(ruleset, config_path, bundle_path, rounds, suricata=None):
+    before = [os.path.join(ruleset.rules_dir, name) for name in ruleset.enabled_files if name in ruleset.files]
+    results = {"before": _timed_parse(before, rounds), "after": _timed_parse([bundle_path], rounds)}
+    print(f"⏱️  Rule parse, best of {rounds} (this tool's parser: signature text to options)")
+    for label, (elapsed, peak, count, size) in results.items():
+        print(f"  {label:<7} {count:>6} rules  {size / 1024:8,.0f} KB  {elapsed * 1000:8.1f} ms  "
+              f"{peak / 1024 / 1024:6.1f} MB peak")
+    if not suricata:
+        print("  (pass --suricata to also time `suricata -T` startup with both rule sets)")
+        return
+    print(f"\n⏱️  {suricata} -T (loads and compiles every rule, then exits)")
+    config_dir = os.path.abspath(ruleset.rules_dir)
+    runs = {
+        "before": ["-T", "-c", config_path, "--set", f"default-rule-path={config_dir}"],
+        "after": ["-T", "-c", config_path, "--set", f"default-rule-path={config_dir}", "-S", bundle_path]
+    }
+    for label, args in runs.items():
+        elapsed, rss, code = _run_suricata(suricata, args)
+        print(f"  {label:<7} {elapsed:8.2f} s  {rss:8.1f} MB peak RSS  exit {code}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit the Suricata rule set and build a pruned bundle")
+    parser.add_argument("-c", "--config", default=DEFAULT_CONFIG, help="suricata.yaml (for rule-files:)")
+    parser.add_argument("--rules-dir", help="rule directory (default: rules/ next to the config)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="print findings and per-file cost")
+    report.add_argument("--top", type=int, default=10, help="examples listed per finding")
+    report.add_argument("--json", action="store_true", help="print the per-file report as JSON")
+    for name, help_text in (("bundle", "write a deduplicated bundle of the enabled rules"),
+                            ("bench", "write the bundle, then compare parsing it with the configured files")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("-o", "--output", help=f"bundle path (default: <rules-dir>/{DEFAULT_BUNDLE})")
+        command.add_argument("--prune", action="append", choices=PRUNE_CHOICES, default=[],
+                             help="also drop rules of this kind (repeatable)")
+        if name == "bundle":
+            command.add_argument("--write-config", help="write a copy of suricata.yaml that loads only the bundle")
+        else:
+            command.add_argument("--rounds", type=int, default=3)
+            command.add_argument("--suricata", help="Suricata binary to time `-T` startup with")
+    args = parser.parse_args()
+
+    try:
+        ruleset = RuleSet.from_config(args.config, args.rules_dir)
+    except (RuleError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    if args.command == "report":
+        if args.json:
+            print(json.dumps({
+                "missing_files": ruleset.missing_files,
+                "duplicate_sids": {f"{gid}:{sid}": [f"{r.file}:{r.line}" for r in rules]
+                                   for (gid, sid), rules in ruleset.duplicates().items()},
+                "files": ruleset.file_report()
+            }, indent=2))
+        else:
+            print_report(ruleset, args.top)
+        return
+
+    output = args.output or os.path.join(ruleset.rules_dir, DEFAULT_BUNDLE)
+    kept, dropped = build_bundle(ruleset, args.prune)
+    write_bundle(output, kept, dropped, ruleset)
+    print(f"📦 Wrote {len(kept)} rules to {output} "
+          f"({', '.join(f'{len(rules)} {reason}' for reason, rules in dropped.items() if rules) or 'nothing'} removed)")
+    if args.command == "bundle":
+        if args.write_config:
+            write_bundle_config(args.config, args.write_config, os.path.basename(output))
+            print(f"📝 Wrote {args.write_config}: rule-files loads only {os.path.basename(output)}")
+    else:
+        bench(ruleset, args.config, output, max(args.rounds, 1), args.suricata)
+
+
+if __name__ == '__main__':
+    main()
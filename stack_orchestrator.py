@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+CyberBlueBox - Stack Orchestrator
+Dependency-ordered, readiness-gated parallel startup of the compose stack
+
+Usage:
+    sudo python3 stack_orchestrator.py                  # whole stack
+    sudo python3 stack_orchestrator.py misp-core        # one service and its dependencies
+    python3 stack_orchestrator.py --dry-run             # print the plan only
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_TIMELINE_FILE = ".stack-timeline.json"
+DEFAULT_TIMEOUT = 300
+DEFAULT_INTERVAL = 2.0
+# Assumed boot time of a service with no recorded timeline yet
+DEFAULT_DURATION = 10.0
+
+
+class StackError(Exception):
+    """Raised when the compose configuration cannot be loaded or planned"""
+
+
+def load_compose_config(compose_files, config_path=None):
+    """The fully resolved compose model, from `docker compose config --format json`"""
+    if config_path:
+        with open(config_path, 'r') as f:
+            return json.load(f)
+    cmd = ["docker", "compose"]
+    for path in compose_files:
+        cmd += ["-f", path]
+    cmd += ["config", "--format", "json"]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise StackError(f"docker compose config failed: {result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def readiness_probe(service):
+    """How to tell a service is ready: (kind, target)
+
+    An explicit `x-readiness` ({"tcp": port}, {"http": url} or {"none": true})
+    wins, then the compose healthcheck, then the first published TCP port;
+    otherwise running (or exited 0, for one-shot services) is enough.
+    """
+    override = service.get("x-readiness") or {}
+    if override.get("none"):
+        return ("running", None)
+    if "http" in override:
+        return ("http", override["http"])
+    if "tcp" in override:
+        return ("tcp", int(override["tcp"]))
+    healthcheck = service.get("healthcheck") or {}
+    if healthcheck and not healthcheck.get("disable") and healthcheck.get("test") not in (["NONE"], "NONE"):
+        return ("healthcheck", None)
+    for port in service.get("ports") or []:
+        if isinstance(port, dict) and port.get("published") and port.get("protocol", "tcp") == "tcp":
+            return ("tcp", int(str(port["published"]).split("-")[0]))
+    return ("running", None)
+
+
+def build_graph(config):
+    """{service: [dependencies]} plus per-service probes and timeouts"""
+    services = config.get("services") or {}
+    graph = {}
+    probes = {}
+    timeouts = {}
+    for name, service in services.items():
+        # Every condition (started, healthy, completed) is gated on our own readiness probe
+        graph[name] = sorted(service.get("depends_on") or [])
+        probes[name] = readiness_probe(service)
+        timeouts[name] = float((service.get("x-readiness") or {}).get("timeout", DEFAULT_TIMEOUT))
+    for name, deps in graph.items():
+        missing = [dep for dep in deps if dep not in graph]
+        if missing:
+            raise StackError(f"{name} depends on unknown service(s): {', '.join(missing)}")
+    return graph, probes, timeouts
+
+
+def select_services(graph, wanted):
+    """`wanted` plus everything it transitively depends on (all services if empty)"""
+    if not wanted:
+        return set(graph)
+    unknown = [name for name in wanted if name not in graph]
+    if unknown:
+        raise StackError(f"Unknown service(s): {', '.join(unknown)}")
+    selected = set()
+    stack = list(wanted)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(graph[name])
+    return selected
+
+
+def topological_stages(graph, selected):
+    """Services grouped into stages whose dependencies are all in earlier stages"""
+    remaining = {name: {d for d in graph[name] if d in selected} for name in selected}
+    stages = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            raise StackError(f"Dependency cycle between {', '.join(sorted(remaining))}")
+        stages.append(ready)
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return stages
+
+
+def critical_path_ranks(graph, selected, durations):
+    """Longest expected time from each service becoming startable to the end of its
+    dependent chain. Starting the highest-ranked ready service first keeps the
+    longest chain (the stack's real boot time) moving."""
+    dependents = {name: [] for name in selected}
+    for name in selected:
+        for dep in graph[name]:
+            if dep in selected:
+                dependents[dep].append(name)
+    ranks = {}
+    for stage in reversed(topological_stages(graph, selected)):
+        for name in stage:
+            tail = max((ranks[d] for d in dependents[name]), default=0.0)
+            ranks[name] = durations.get(name, DEFAULT_DURATION) + tail
+    return ranks
+
+
+def load_durations(path):
+    """Per-service boot durations recorded by the previous run"""
+    try:
+        with open(path, 'r') as f:
+            timeline = json.load(f)
+        return {name: entry["ready_after"] - entry["started_after"] for name, entry in timeline.get("services", {}).items()
+                if entry.get("status") == "ready"}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+class Orchestrator:
+    """Starts services as soon as their dependencies are ready, at most `parallel`
+    booting at a time. A slot is held from `docker compose up` until the readiness
+    probe passes, so heavy services do not all contend for CPU and disk at once."""
+
+    def __init__(self, graph, probes, timeouts, selected, compose_files=(), parallel=4,
+                 interval=DEFAULT_INTERVAL, build=False, durations=None):
+        self.graph = graph
+        self.probes = probes
+        self.timeouts = timeouts
+        self.selected = selected
+        self.compose_files = list(compose_files)
+        self.parallel = parallel
+        self.interval = interval
+        self.build = build
+        self.ranks = critical_path_ranks(graph, selected, durations or {})
+        self.timeline = {}
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.total = 0.0
+
+    def _compose(self, *args):
+        cmd = ["docker", "compose"]
+        for path in self.compose_files:
+            cmd += ["-f", path]
+        return subprocess.run(cmd + list(args), capture_output=True, text=True)
+
+    def _elapsed(self):
+        return round(time.monotonic() - self.started_at, 2)
+
+    def _record(self, name, **fields):
+        with self._lock:
+            self.timeline.setdefault(name, {}).update(fields)
+
+    def run(self):
+        """Bring up every selected service; returns True if all became ready"""
+        self.started_at = time.monotonic()
+        pending = set(self.selected)
+        ready = set()
+        failed = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="stack-up") as executor:
+            while pending or running:
+                # Anything depending on a failed service cannot come up
+                skipped = True
+                while skipped:
+                    skipped = False
+                    for name in sorted(pending):
+                        blocked = [d for d in self.graph[name] if d in failed]
+                        if blocked:
+                            pending.discard(name)
+                            failed.add(name)
+                            skipped = True
+                            self._record(name, status="skipped", error=f"dependency {', '.join(blocked)} not ready")
+                            print(f"⏭️  {name}: skipped ({', '.join(blocked)} not ready)")
+                startable = [name for name in pending
+                             if all(d in ready for d in self.graph[name] if d in self.selected)]
+                startable.sort(key=lambda name: (-self.ranks[name], name))
+                while startable and len(running) < self.parallel:
+                    name = startable.pop(0)
+                    pending.discard(name)
+                    self._record(name, queued_at=self._elapsed())
+                    running[executor.submit(self._bring_up, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    (ready if future.result() else failed).add(name)
+        self.total = self._elapsed()
+        return not failed
+
+    def _bring_up(self, name):
+        kind, target = self.probes[name]
+        self._record(name, probe=kind if target is None else f"{kind}:{target}", started_after=self._elapsed())
+        print(f"🚀 {name}: starting")
+        args = ["up", "-d", "--no-deps"] + (["--build"] if self.build else []) + [name]
+        result = self._compose(*args)
+        self._record(name, up_after=self._elapsed())
+        if result.returncode != 0:
+            error = (result.stderr.strip().splitlines() or ["docker compose up failed"])[-1]
+            self._record(name, status="failed", error=error, failed_after=self._elapsed())
+            print(f"❌ {name}: {error}")
+            return False
+        try:
+            self._wait_ready(name, kind, target)
+        except Exception as e:
+            self._record(name, status="failed", error=str(e), failed_after=self._elapsed())
+            print(f"❌ {name}: {e}")
+            return False
+        self._record(name, status="ready", ready_after=self._elapsed())
+        entry = self.timeline[name]
+        print(f"✅ {name}: ready in {entry['ready_after'] - entry['started_after']:.1f}s")
+        return True
+
+    def _container_state(self, name):
+        ids = self._compose("ps", "-a", "-q", name).stdout.split()
+        if not ids:
+            return None
+        result = subprocess.run(["docker", "inspect", "--format", "{{json .State}}", ids[0]],
+                                capture_output=True, text=True)
+        return json.loads(result.stdout) if result.returncode == 0 else None
+
+    def _wait_ready(self, name, kind, target):
+        deadline = time.monotonic() + self.timeouts[name]
+        while True:
+            state = self._container_state(name) or {}
+            status = state.get("Status")
+            if status == "exited":
+                # One-shot services (cert generators, init jobs) are done when they exit cleanly
+                if state.get("ExitCode") == 0 and kind == "running":
+                    return
+                raise RuntimeError(f"container exited with code {state.get('ExitCode')}")
+            if status == "running":
+                if kind == "running":
+                    return
+                if kind == "healthcheck" and (state.get("Health") or {}).get("Status") == "healthy":
+                    return
+                if kind == "tcp" and _tcp_ready(target):
+                    return
+                if kind == "http" and _http_ready(target):
+                    return
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"not ready after {self.timeouts[name]:.0f}s ({kind} probe)")
+            time.sleep(self.interval)
+
+    def critical_path(self):
+        """The chain of services that determined the total startup time"""
+        chain = []
+        candidates = [n for n, e in self.timeline.items() if e.get("status") == "ready"]
+        name = max(candidates, key=lambda n: self.timeline[n]["ready_after"], default=None)
+        while name:
+            chain.append(name)
+            deps = [d for d in self.graph[name] if self.timeline.get(d, {}).get("status") == "ready"]
+            name = max(deps, key=lambda d: self.timeline[d]["ready_after"], default=None)
+        return list(reversed(chain))
+
+    def report(self, width=50):
+        """Per-service timeline as text, ordered by start time"""
+        total = max(self.total, 0.01)
+        lines = [f"\n{'service':<26} {'probe':<18} {'start':>7} {'ready':>7} {'boot':>7}  timeline"]
+        for name, entry in sorted(self.timeline.items(), key=lambda item: item[1].get("started_after", float('inf'))):
+            start = entry.get("started_after")
+            end = entry.get("ready_after")
+            stop = end if end is not None else entry.get("failed_after", total)
+            if start is None:
+                lines.append(f"{name:<26} {'-':<18} {'-':>7} {'-':>7} {'-':>7}  {entry.get('status')}")
+                continue
+            boot = f"{end - start:.1f}s" if end is not None else entry.get("status", "")
+            first = int(start / total * width)
+            last = int(stop / total * width)
+            bar = " " * first + ("█" if end is not None else "░") * max(last - first, 1)
+            lines.append(f"{name:<26} {entry.get('probe', ''):<18} {start:>6.1f}s "
+                         f"{(f'{end:.1f}s' if end is not None else '-'):>7} {boot:>7}  {bar}")
+        lines.append(f"\nTotal: {self.total:.1f}s with up to {self.parallel} services booting at once")
+        path = self.critical_path()
+        if path:
+            lines.append(f"Critical path: {' -> '.join(path)}")
+        return "\n".join(lines)
+
+    def save_timeline(self, path):
+        with open(path, 'w') as f:
+            json.dump({"total": self.total, "parallel": self.parallel,
+                       "finished": time.time(), "services": self.timeline}, f, indent=2)
+
+
+def _tcp_ready(port, host="127.0.0.1"):
+    try:
+        with socket.create_connection((host, port), timeout=2):
+            return True
+    except OSError:
+        return False
+
+
+def _http_ready(url):
+    import ssl
+    import urllib.request
+    import urllib.error
+    # Most tools serve self-signed certificates
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        with urllib.request.urlopen(url, timeout=5, context=context) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (OSError, ValueError):
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start the CyberBlueBox compose stack in dependency order")
+    parser.add_argument("services", nargs="*", help="services to start, with their dependencies (default: all)")
+    parser.add_argument("-f", "--file", action="append", dest="files", default=[], help="compose file (repeatable)")
+    parser.add_argument("-j", "--parallel", type=int, default=os.cpu_count() or 4,
+                        help="services booting at the same time (default: CPU count)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between readiness checks")
+    parser.add_argument("--build", action="store_true", help="build images before starting")
+    parser.add_argument("--timeline", default=DEFAULT_TIMELINE_FILE,
+                        help="timeline file; the previous run's boot times prioritise long chains")
+    parser.add_argument("--config", help="read `docker compose config --format json` output from a file")
+    parser.add_argument("--dry-run", action="store_true", help="print the startup plan without starting anything")
+    args = parser.parse_args()
+
+    try:
+        graph, probes, timeouts = build_graph(load_compose_config(args.files, args.config))
+        selected = select_services(graph, args.services)
+        stages = topological_stages(graph, selected)
+    except (StackError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    durations = load_durations(args.timeline)
+    orchestrator = Orchestrator(graph, probes, timeouts, selected, args.files, max(args.parallel, 1),
+                                args.interval, args.build, durations)
+
+    if args.dry_run:
+        print(f"📋 {len(selected)} services in {len(stages)} dependency stages, up to {orchestrator.parallel} at once")
+        for index, stage in enumerate(stages):
+            described = ", ".join(f"{name} [{probes[name][0]}]" for name in
+                                  sorted(stage, key=lambda n: (-orchestrator.ranks[n], n)))
+            print(f"  stage {index}: {described}")
+        return
+
+    print(f"🚀 Starting {len(selected)} services, up to {orchestrator.parallel} booting at once")
+    ok = orchestrator.run()
+    print(orchestrator.report())
+    try:
+        orchestrator.save_timeline(args.timeline)
+    except OSError as e:
+        print(f"⚠️  Could not save the timeline to {args.timeline}: {e}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()